@@ -4,8 +4,10 @@ documentation
 """
 from __future__ import division, unicode_literals, print_function
 
+import sys
+
 from .mm.highlevel import main
 
 if __name__ == '__main__':
     # noinspection PyUnresolvedReferences
-    main()
+    sys.exit(main())
@@ -5,14 +5,18 @@ etc.py contains various helper functions and classes, which are not directly rel
 from __future__ import division, unicode_literals, print_function
 import os
 import sys
+import glob
 import hashlib
 import time
 import logging
 import sqlite3
+import signal
+import threading
 
 import numpy as np
 
-from io import BytesIO
+from io import BytesIO, BufferedReader, RawIOBase
+from contextlib import contextmanager
 from ..debugging import DebugPlot
 
 try:
@@ -180,6 +184,25 @@ try:
 except ImportError:
     import thread as _thread
 
+import zlib
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+try:
+    # noinspection PyUnresolvedReferences
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    # noinspection PyUnresolvedReferences
+    import zstandard
+except ImportError:
+    zstandard = None
+
 if os.name != 'nt':
     def correct_windows_signal_handlers():
         """
@@ -212,6 +235,64 @@ else:
                            "Fix: Install the module!")
 
 
+class TimeLimitExceeded(Exception):
+    """
+    Raised if a block guarded by :py:func:`time_limit` took too long.
+    """
+    pass
+
+
+def time_limit_available():
+    """
+    Returns whether :py:func:`time_limit` can limit blocks executed by the calling thread,
+    *i.e.* whether SIGALRM is available and the calling thread is the main thread.
+
+    :return: True if time limits are enforced
+
+    >>> time_limit_available() == hasattr(signal, 'setitimer')
+    True
+    """
+    return hasattr(signal, 'setitimer') and isinstance(threading.current_thread(), threading._MainThread)
+
+
+@contextmanager
+def time_limit(seconds):
+    """
+    Raises TimeLimitExceeded within the guarded block, if it takes longer than seconds.
+    Uses SIGALRM, hence only works on POSIX systems and within the main thread, otherwise
+    (or if seconds is 0) the block is not limited. Native code (*e.g.* a long running C function)
+    is not interrupted, the exception is raised once it returns.
+
+    :param seconds: time limit in seconds, 0 for no limit
+
+    >>> with time_limit(0.1):
+    ...     while True:
+    ...         pass
+    Traceback (most recent call last):
+    ...
+    molyso.generic.etc.TimeLimitExceeded: Time limit of 0.1s exceeded.
+    """
+    if seconds <= 0 or not hasattr(signal, 'setitimer'):
+        yield
+        return
+
+    def _handler(_, __):
+        raise TimeLimitExceeded("Time limit of %ss exceeded." % (seconds,))
+
+    try:
+        previous_handler = signal.signal(signal.SIGALRM, _handler)
+    except ValueError:  # not within the main thread
+        yield
+        return
+
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
 def debug_init():
     """
     Initialized debug mode, as of now this means that DebugPlot is set to active (it will produce a debug.pdf)
@@ -301,9 +382,151 @@ def bits_to_numpy_type(bits):
     }[int(bits)]
 
 
+# compression codecs for cache values, mapping names to (compressor(level), decompressor()) tuples of factories
+# of incremental (de)compression objects, with compress(data)/flush() and decompress(data) methods respectively
+cache_codecs = {
+    'zlib': (lambda level: zlib.compressobj(6 if level is None else level), zlib.decompressobj),
+}
+
+if lzma is not None:
+    cache_codecs['lzma'] = (lambda level: lzma.LZMACompressor(preset=level), lzma.LZMADecompressor)
+
+if lz4 is not None:
+    cache_codecs['lz4'] = (lambda level: lz4.frame.LZ4FrameCompressor(compression_level=level or 0),
+                           lz4.frame.LZ4FrameDecompressor)
+
+if zstandard is not None:
+    cache_codecs['zstd'] = (lambda level: zstandard.ZstdCompressor(level=3 if level is None else level).compressobj(),
+                            lambda: zstandard.ZstdDecompressor().decompressobj())
+
+
+def parse_cache_codec(spec):
+    """
+    Parses a cache codec specification of the form 'codec' or 'codec:level'.
+    'none' disables compression.
+
+    :param spec: specification
+    :return: tuple (codec, level), codec being None if compression is disabled, level None for the codec's default
+    :raises ValueError: if the codec is not available or the level is invalid
+
+    >>> parse_cache_codec('zlib:1')
+    ('zlib', 1)
+    >>> parse_cache_codec('none')
+    (None, None)
+    """
+    name, _, level = spec.partition(':')
+
+    if name == 'none':
+        return None, None
+
+    if name not in cache_codecs:
+        raise ValueError("Unknown or unavailable cache codec \"%s\", available are: none, %s" % (
+            name, ', '.join(sorted(cache_codecs.keys()))))
+
+    try:
+        return name, int(level) if level != '' else None
+    except ValueError:
+        raise ValueError("Invalid compression level \"%s\" for cache codec \"%s\"." % (level, name))
+
+
+class CompressingWriter(object):
+    """
+    File-like object compressing the data written to it block by block into another file-like object,
+    so that neither the uncompressed nor the compressed data is ever held in memory as a whole.
+
+    :param fp: file-like object to write the compressed data to
+    :param compressor: incremental compression object (see :py:data:`cache_codecs`), None to pass the data through
+    :param block_size: size of the blocks data is compressed in
+    """
+    def __init__(self, fp, compressor, block_size=1024 * 1024):
+        self.fp = fp
+        self.compressor = compressor
+        self.block_size = block_size
+        # count of (uncompressed) bytes written
+        self.size = 0
+
+        # frame based compressors (lz4) emit their frame header upon beginning
+        if hasattr(compressor, 'begin'):
+            self.fp.write(compressor.begin())
+
+    def write(self, data):
+        """
+        Writes data.
+
+        :param data: bytes-like object
+        :return: count of bytes written
+        """
+        data = memoryview(data).cast('B')
+
+        if self.compressor is None:
+            self.fp.write(data)
+        else:
+            for offset in range(0, len(data), self.block_size):
+                compressed = self.compressor.compress(data[offset:offset + self.block_size])
+                if compressed:
+                    self.fp.write(compressed)
+
+        self.size += len(data)
+        return len(data)
+
+    def close(self):
+        """
+        Writes the remaining compressed data, does not close the underlying file-like object.
+
+        """
+        if self.compressor is not None:
+            self.fp.write(self.compressor.flush())
+            self.compressor = None
+
+
+class DecompressingReader(RawIOBase):
+    """
+    Raw stream decompressing the data read from another file-like object piece by piece.
+    The decompressed data kept at a time is bounded by the size of the pieces (times the compression ratio).
+
+    :param fp: file-like object to read the compressed data from
+    :param decompressor: incremental decompression object (see :py:data:`cache_codecs`)
+    :param piece_size: size of the compressed pieces read at a time
+    """
+    def __init__(self, fp, decompressor, piece_size=64 * 1024):
+        super(DecompressingReader, self).__init__()
+        self.fp = fp
+        self.decompressor = decompressor
+        self.piece_size = piece_size
+        self.pending = memoryview(b'')
+
+    def readable(self):
+        """
+        Returns whether the stream is readable, which it is.
+
+        :return: True
+        """
+        return True
+
+    def readinto(self, buffer):
+        """
+        Reads decompressed data into buffer.
+
+        :param buffer: writable buffer
+        :return: count of bytes read, 0 at the end of the stream
+        """
+        while len(self.pending) == 0:
+            piece = self.fp.read(self.piece_size)
+            if not piece:
+                return 0
+            self.pending = memoryview(self.decompressor.decompress(piece))
+
+        buffer = memoryview(buffer).cast('B')
+        count = min(len(buffer), len(self.pending))
+        buffer[:count] = self.pending[:count]
+        self.pending = self.pending[count:]
+        return count
+
+
 class BaseCache(object):
     """
-    A caching class
+    A caching class. Subclasses implement contains, get, set and delete (and keys),
+    and may implement open_read and open_write to stream values instead of handling them as a whole.
     """
 
     @staticmethod
@@ -319,15 +542,30 @@ class BaseCache(object):
             return repr(key)
 
     @staticmethod
-    def serialize(data):
+    def dump(data, fp, persistent_id=None):
         """
+        Pickles data into a file-like object.
 
         :param data:
+        :param fp: file-like object
+        :param persistent_id: function returning references for objects stored outside of the pickle, or None
+        """
+        pickler = pickle.Pickler(fp, protocol=pickle.HIGHEST_PROTOCOL)
+        if persistent_id is not None:
+            pickler.persistent_id = persistent_id
+        pickler.dump(data)
+
+    @classmethod
+    def serialize(cls, data, persistent_id=None):
+        """
+
+        :param data:
+        :param persistent_id: function returning references for objects stored outside of the pickle, or None
         :return:
         """
         try:
             bio = BytesIO()
-            pickle.dump(data, bio, protocol=pickle.HIGHEST_PROTOCOL)
+            cls.dump(data, bio, persistent_id=persistent_id)
             try:
                 # noinspection PyUnresolvedReferences
                 pickled_data = bio.getbuffer()
@@ -342,25 +580,215 @@ class BaseCache(object):
     def deserialize(data):
         """
 
-        :param data:
+        :param data: serialized data, or a file-like object to read it from
         :return:
         """
         assert data is not None
-        bio = BytesIO(data)
-        return pickle.load(bio)
+        unpickler = pickle.Unpickler(data if hasattr(data, 'read') else BytesIO(data))
 
-    def __init__(self, filename_to_be_hashed, ignore_cache='nothing', cache_token=None):
+        mapped_files = {}
+
+        def _persistent_load(reference):
+            kind, filename, offset, shape, dtype = reference
+            assert kind == 'npy'
+            if filename not in mapped_files:
+                # copy-on-write, so accidental writes do not reach the file
+                mapped_files[filename] = np.load(filename, mmap_mode='c')
+            dtype = np.dtype(dtype)
+            size = int(np.prod(shape)) * dtype.itemsize
+            return mapped_files[filename][offset:offset + size].view(dtype).reshape(shape)
+
+        unpickler.persistent_load = _persistent_load
+
+        return unpickler.load()
+
+    # alignment of the arrays stored in external files
+    external_alignment = 64
+
+    def external_filename(self, key):
+        """
+        Returns the name of the file the external arrays of an entry are stored in.
+
+        :param key: prepared key
+        :return:
+        """
+        return "%s.%s.npy" % (self.cache_token, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    def write_external(self, key, arrays):
+        """
+        Writes arrays contiguously into the external file of an entry, see :py:meth:`store`.
+
+        :param key: prepared key
+        :param arrays: list of arrays
+        :return: dictionary mapping the ids of the arrays to references
+        """
+        filename = self.external_filename(key)
+
+        offsets, references, total = {}, {}, 0
+
+        for array in arrays:
+            if id(array) in offsets:
+                continue
+            offsets[id(array)] = total
+            total += -(-array.nbytes // self.external_alignment) * self.external_alignment
+
+        # written to a new file, which replaces the old one, so that arrays mapped from the old one remain valid
+        temporary_filename = filename + '.tmp.npy'
+
+        mapped = np.lib.format.open_memmap(temporary_filename, mode='w+', dtype=np.uint8, shape=(total,))
+
+        for array in arrays:
+            offset = offsets[id(array)]
+            mapped[offset:offset + array.nbytes] = np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+            references[id(array)] = ('npy', filename, offset, tuple(array.shape), array.dtype.str)
+
+        mapped.flush()
+        del mapped
+
+        getattr(os, 'replace', os.rename)(temporary_filename, filename)
+
+        return references
+
+    def remove_external(self, key):
+        """
+        Removes the external file of an entry, if any.
+
+        :param key: prepared key
+        """
+        filename = self.external_filename(key)
+
+        if os.path.isfile(filename):
+            os.remove(filename)
+
+    # header of compressed values, followed by the codec name, a NUL byte and the compressed data.
+    # uncompressed values are plain pickles, which never start with it.
+    codec_header = b'\x89molyso\x00'
+
+    def compressing_writer(self, fp):
+        """
+        Returns a file-like object compressing the data written to it with the cache's codec into fp,
+        after a header naming the codec. It has to be closed to write the remaining data.
+
+        :param fp: file-like object
+        :return: CompressingWriter
+        """
+        if self.codec is None:
+            return CompressingWriter(fp, None)
+
+        compressor, _ = cache_codecs[self.codec]
+
+        fp.write(self.codec_header + self.codec.encode() + b'\x00')
+
+        return CompressingWriter(fp, compressor(self.codec_level))
+
+    def decompressing_reader(self, fp):
+        """
+        Returns a file-like object reading the decompressed data from fp according to its header,
+        data without header is read as is.
+
+        :param fp: buffered file-like object (supporting peek)
+        :return: file-like object
+        """
+        if bytes(fp.peek(len(self.codec_header))[:len(self.codec_header)]) != self.codec_header:
+            return fp
+
+        fp.read(len(self.codec_header))
+
+        codec = b''
+        while not codec.endswith(b'\x00'):
+            byte = fp.read(1)
+            if not byte:
+                raise ValueError("Truncated cache value header.")
+            codec += byte
+
+        _, decompressor = cache_codecs[codec[:-1].decode()]
+
+        return BufferedReader(DecompressingReader(fp, decompressor()))
+
+    def compress(self, data):
+        """
+        Compresses serialized data with the cache's codec, prepending a header naming the codec.
+
+        :param data:
+        :return:
+        """
+        bio = BytesIO()
+        writer = self.compressing_writer(bio)
+        writer.write(data)
+        writer.close()
+        return bio.getvalue()
+
+    def decompress(self, data):
+        """
+        Decompresses data according to its header, data without header is returned as is.
+
+        :param data:
+        :return:
+
+        >>> cache = BaseCache('file', codec='zlib')
+        >>> cache.deserialize(cache.decompress(cache.compress(cache.serialize([1, 2]))))
+        [1, 2]
+        >>> cache.deserialize(cache.decompress(bytes(cache.serialize([1, 2]))))
+        [1, 2]
+        """
+        return self.decompressing_reader(BufferedReader(BytesIO(data))).read()
+
+    def open_read(self, key):
+        """
+        Returns a buffered file-like object to read the (stored) value of key from.
+        The default implementation reads the value as a whole via get.
+
+        :param key: prepared key
+        :return: file-like object
+        """
+        return BufferedReader(BytesIO(self.get(key)))
+
+    @contextmanager
+    def open_write(self, key):
+        """
+        Context manager providing a file-like object to write the (stored) value of key to,
+        which is stored once the context is left without an exception.
+        The default implementation stores the value as a whole via set.
+
+        :param key: prepared key
+        """
+        bio = BytesIO()
+        yield bio
+        self.set(key, bio.getvalue())
+
+    @staticmethod
+    def default_cache_token(filename):
+        """
+        Returns the cache token used for a file, if none is given explicitly.
+
+        :param filename:
+        :return:
+        """
+        return "%s.%s" % (
+            os.path.basename(filename).replace('.', '_').replace('?', '_').replace(',', '_'),
+            hashlib.sha1(str(os.path.abspath(filename).lower()).encode()).hexdigest()[:8])
+
+    def __init__(self, filename_to_be_hashed, ignore_cache='nothing', cache_token=None, stage_digests=None,
+                 codec='none', cache_directory=None):
         self.logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
 
+        self.codec, self.codec_level = parse_cache_codec(codec)
+
         self.filename_hash_source = filename_to_be_hashed
 
+        self.stage_digests = stage_digests if stage_digests is not None else {}
+
         if cache_token is None:
-            self.cache_token = "%s.%s" % (
-                os.path.basename(filename_to_be_hashed).replace('.', '_').replace('?', '_').replace(',', '_'),
-                hashlib.sha1(str(os.path.abspath(filename_to_be_hashed).lower()).encode()).hexdigest()[:8])
+            self.cache_token = self.default_cache_token(filename_to_be_hashed)
         else:
             self.cache_token = cache_token
 
+        if cache_directory is not None:
+            self.cache_token = os.path.join(cache_directory, self.cache_token)
+
+            if ignore_cache != 'everything' and not os.path.isdir(cache_directory):
+                os.makedirs(cache_directory)
+
         if ignore_cache == 'everything':
             self.ignore_cache = True
         elif ignore_cache == 'nothing':
@@ -368,6 +796,37 @@ class BaseCache(object):
         else:
             self.ignore_cache = ignore_cache.split(',')
 
+    def qualify_key(self, key):
+        """
+        Qualifies the tuple keys of stages a digest is known for, *i.e.* ('stage', ...) becomes
+        ('stage', digest, ...), so that entries computed with a different configuration are not used.
+
+        :param key:
+        :return:
+
+        >>> BaseCache('file', stage_digests={'stage': 'abc'}).qualify_key(('stage', 1))
+        ('stage', 'abc', 1)
+        >>> BaseCache('file', stage_digests={'stage': 'abc'}).qualify_key('stage')
+        'stage'
+        """
+        if isinstance(key, tuple) and key[0] in self.stage_digests:
+            return (key[0], self.stage_digests[key[0]],) + key[1:]
+        return key
+
+    def ignores(self, key):
+        """
+        Checks whether the key should be ignored. Tuple keys, *e.g.* per frame entries, are ignored
+        if their first element, *i.e.* the stage they belong to, is ignored.
+
+        :param key:
+        :return:
+        """
+        if self.ignore_cache is True:
+            return True
+        if isinstance(key, tuple):
+            key = key[0]
+        return key in self.ignore_cache
+
     def contains(self, key):
         """
 
@@ -393,13 +852,21 @@ class BaseCache(object):
         """
         return
 
+    def delete(self, key):
+        """
+
+        :param key:
+        :return:
+        """
+        return
+
     def __contains__(self, key):
-        if self.ignore_cache is True or key in self.ignore_cache:
+        if self.ignores(key):
             return False
         else:
             try:
                 self.logger.debug("Checking whether '%s' exists", key)
-                return self.contains(self.prepare_key(key))
+                return self.contains(self.prepare_key(self.qualify_key(key)))
             except Exception as e:
                 self.logger.exception(
                     "While %s an Exception occurred (but continuing): %",
@@ -410,7 +877,8 @@ class BaseCache(object):
     def __getitem__(self, key):
         try:
             self.logger.debug("Getting data for '%s'", key)
-            return self.deserialize(self.get(self.prepare_key(key)))
+            with self.open_read(self.prepare_key(self.qualify_key(key))) as fp:
+                return self.deserialize(self.decompressing_reader(fp))
         except Exception as e:
             self.logger.exception(
                 "While %s an Exception occurred (but continuing): %s. Note that this will yield undefined behavior.",
@@ -419,18 +887,64 @@ class BaseCache(object):
             # this is technically wrong ...
             return None
 
-    def __setitem__(self, key, value):
-        if self.ignore_cache is True or key in self.ignore_cache:
-            return
+    def store(self, key, value, external=None):
+        """
+        Stores value, like setting an item, but returns the size of the serialized data (before compression).
+        Arrays passed as external are not pickled, but written uncompressed into a separate .npy file,
+        when loading the value, they are memory-mapped lazily from there.
+
+        :param key:
+        :param value:
+        :param external: list of (large) arrays contained in value, to be stored externally
+        :return: size in bytes, 0 if nothing was stored
+        """
+        if self.ignores(key):
+            return 0
         else:
             try:
                 self.logger.debug("Setting data for '%s'", key)
-                self.set(self.prepare_key(key), self.serialize(value))
+                key = self.prepare_key(self.qualify_key(key))
+
+                if external:
+                    references = self.write_external(key, external)
+
+                    def external_persistent_id(obj):
+                        return references.get(id(obj)) if isinstance(obj, np.ndarray) else None
+                else:
+                    self.remove_external(key)
+
+                persistent_id = external_persistent_id if external else None
+
+                with self.open_write(key) as fp:
+                    writer = self.compressing_writer(fp)
+                    self.dump(value, writer, persistent_id=persistent_id)
+                    writer.close()
+
+                return writer.size
             except Exception as e:
                 self.logger.exception(
                     "While %s an Exception occurred (but continuing): %s",
                     repr(self.__setitem__), repr(e)
                 )
+                return 0
+
+    def __setitem__(self, key, value):
+        self.store(key, value)
+
+    def __delitem__(self, key):
+        if self.ignores(key):
+            return
+        else:
+            try:
+                self.logger.debug("Deleting data for '%s'", key)
+                key = self.prepare_key(self.qualify_key(key))
+                self.delete(key)
+                self.remove_external(key)
+            except Exception as e:
+                self.logger.exception(
+                    "While %s an Exception occurred (but continuing): %s",
+                    repr(self.__delitem__), repr(e)
+                )
 
 
 class FileCache(BaseCache):
@@ -471,14 +985,177 @@ class FileCache(BaseCache):
         with open(self.build_cache_filename(key), 'wb+') as fp:
             fp.write(value)
 
+    def open_read(self, key):
+        """
+
+        :param key:
+        :return:
+        """
+        return open(self.build_cache_filename(key), 'rb')
+
+    @contextmanager
+    def open_write(self, key):
+        """
+
+        :param key:
+        """
+        with open(self.build_cache_filename(key), 'wb+') as fp:
+            yield fp
+
+    def delete(self, key):
+        """
+
+        :param key:
+        """
+        if self.contains(key):
+            os.remove(self.build_cache_filename(key))
+
 
 Cache = FileCache
 
 
+class Sqlite3ChunkWriter(object):
+    """
+    File-like object writing a value of a :py:class:`Sqlite3Cache` in chunks, as the data arrives.
+    Values fitting into one chunk are stored within the entry itself.
+
+    :param conn: database connection
+    :param key: prepared key
+    :param chunk_size: size of the chunks
+    """
+    def __init__(self, conn, key, chunk_size):
+        self.conn = conn
+        self.key = key
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.chunks = 0
+        self.size = 0
+
+        self.conn.execute('DELETE FROM chunks WHERE name = ?', (key,))
+
+    def write_chunk(self, data):
+        """
+        Writes one chunk.
+
+        :param data: bytes-like object
+        """
+        self.conn.execute('INSERT INTO chunks (name, sequence, data) VALUES (?, ?, ?)', (self.key, self.chunks, data,))
+        self.chunks += 1
+
+    def write(self, data):
+        """
+        Writes data.
+
+        :param data: bytes-like object
+        :return: count of bytes written
+        """
+        data = memoryview(data).cast('B')
+
+        offset = 0
+
+        while offset < len(data):
+            if len(self.buffer) == 0 and len(data) - offset >= self.chunk_size:
+                # whole chunks of large writes are passed on without being copied into the buffer
+                self.write_chunk(data[offset:offset + self.chunk_size])
+                offset += self.chunk_size
+                continue
+
+            count = min(len(data) - offset, self.chunk_size - len(self.buffer))
+            self.buffer += data[offset:offset + count]
+            offset += count
+
+            if len(self.buffer) == self.chunk_size:
+                self.write_chunk(self.buffer)
+                self.buffer = bytearray()
+
+        self.size += len(data)
+        return len(data)
+
+    def close(self, additional_size=0):
+        """
+        Writes the entry (and the remaining chunk) and commits.
+
+        :param additional_size: size to account the entry with in addition, *e.g.* of its external files
+        """
+        value = None
+
+        if self.chunks == 0:
+            value = self.buffer
+        elif len(self.buffer) > 0:
+            self.write_chunk(self.buffer)
+
+        self.buffer = bytearray()
+
+        self.conn.execute(
+            'INSERT OR REPLACE INTO entries (name, value, accessed, size) VALUES (?, ?, ?, ?)',
+            (self.key, value, time.time(), self.size + additional_size,)
+        )
+
+        self.conn.commit()
+
+
+class Sqlite3ChunkReader(RawIOBase):
+    """
+    Raw stream reading a value of a :py:class:`Sqlite3Cache` chunk by chunk.
+
+    :param conn: database connection
+    :param key: prepared key
+    :param value: value stored within the entry, None if it is stored in chunks
+    """
+    def __init__(self, conn, key, value):
+        super(Sqlite3ChunkReader, self).__init__()
+        self.conn = conn
+        self.key = key
+        self.chunk = memoryview(value if value is not None else b'')
+        # sequence number of the next chunk, None if there is none
+        self.sequence = 0 if value is None else None
+
+    def readable(self):
+        """
+        Returns whether the stream is readable, which it is.
+
+        :return: True
+        """
+        return True
+
+    def readinto(self, buffer):
+        """
+        Reads data into buffer.
+
+        :param buffer: writable buffer
+        :return: count of bytes read, 0 at the end of the stream
+        """
+        while len(self.chunk) == 0:
+            if self.sequence is None:
+                return 0
+
+            row = self.conn.execute('SELECT data FROM chunks WHERE name = ? AND sequence = ?',
+                                    (self.key, self.sequence,)).fetchone()
+
+            if row is None:
+                self.sequence = None
+                return 0
+
+            self.chunk = memoryview(row[0])
+            self.sequence += 1
+
+        buffer = memoryview(buffer).cast('B')
+        count = min(len(buffer), len(self.chunk))
+        buffer[:count] = self.chunk[:count]
+        self.chunk = self.chunk[count:]
+        return count
+
+
 class Sqlite3Cache(BaseCache):
     """
     A caching class which stores the data in a sqlite3 database.
+    Values are streamed from and to the database in chunks, so that large values are never held in memory at once.
     """
+    suffix = '.sq3.cache'
+
+    # size of the chunks large values are stored in
+    chunk_size = 4 * 1024 * 1024
+
     def contains(self, key):
         """
 
@@ -496,9 +1173,49 @@ class Sqlite3Cache(BaseCache):
         :param key:
         :return:
         """
-        result = self.conn.execute('SELECT value FROM entries WHERE name = ?', (key,))
-        for row in result:
-            return row[0]
+        if not self.contains(key):
+            return None
+
+        with self.open_read(key) as fp:
+            return fp.read()
+
+    def open_read(self, key):
+        """
+
+        :param key:
+        :return:
+        """
+        row = self.conn.execute('SELECT value FROM entries WHERE name = ?', (key,)).fetchone()
+
+        if row is None:
+            raise KeyError(key)
+
+        # the access time is the basis of the least recently used eviction
+        self.conn.execute('UPDATE entries SET accessed = ? WHERE name = ?', (time.time(), key,))
+        self.conn.commit()
+
+        return BufferedReader(Sqlite3ChunkReader(self.conn, key, row[0]))
+
+    @contextmanager
+    def open_write(self, key):
+        """
+
+        :param key:
+        """
+        writer = Sqlite3ChunkWriter(self.conn, key, self.chunk_size)
+
+        try:
+            yield writer
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        additional_size = 0
+
+        if os.path.isfile(self.external_filename(key)):
+            additional_size = os.path.getsize(self.external_filename(key))
+
+        writer.close(additional_size=additional_size)
 
     def keys(self):
         """
@@ -509,18 +1226,57 @@ class Sqlite3Cache(BaseCache):
         result = self.conn.execute('SELECT name FROM entries')
         return [row[0] for row in result]
 
+    def entries(self):
+        """
+        Returns the entries, with their size (including external files) and the time they were last accessed
+        (0 if unknown).
+
+        :return: list of (name, size, accessed) tuples
+        """
+        result = self.conn.execute('SELECT name, COALESCE(size, LENGTH(value)), COALESCE(accessed, 0) FROM entries')
+        return [tuple(row) for row in result]
+
+    def compact(self, full=False):
+        """
+        Returns the space of deleted entries to the file system.
+
+        :param full: whether to rebuild the database (VACUUM), which requires exclusive access,
+                     otherwise only free pages are released (if the database was created with incremental vacuum)
+        """
+        if full:
+            self.conn.isolation_level = None
+            self.conn.execute('VACUUM')
+            self.conn.isolation_level = 'DEFERRED'
+        else:
+            self.conn.execute('PRAGMA incremental_vacuum')
+            self.conn.commit()
+
+    @classmethod
+    def from_filename(cls, filename, **kwargs):
+        """
+        Opens an existing cache database by its file name.
+
+        :param filename: file name (ending in .sq3.cache)
+        :return: cache
+        """
+        return cls(filename, cache_token=filename[:-len(cls.suffix)], **kwargs)
+
     def set(self, key, value):
         """
 
         :param key:
         :param value:
         """
-        self.conn.execute('DELETE FROM entries WHERE name = ?', (key,))
+        with self.open_write(key) as fp:
+            fp.write(value)
 
-        self.conn.execute(
-            'INSERT INTO entries (name, value) VALUES (?, ?)',
-            (key, sqlite3.Binary(value),)
-        )
+    def delete(self, key):
+        """
+
+        :param key:
+        """
+        self.conn.execute('DELETE FROM entries WHERE name = ?', (key,))
+        self.conn.execute('DELETE FROM chunks WHERE name = ?', (key,))
 
         self.conn.commit()
 
@@ -530,19 +1286,225 @@ class Sqlite3Cache(BaseCache):
         self.conn = None
 
         if self.ignore_cache is not True:
-            self.conn = sqlite3.connect('%s.sq3.cache' % (self.cache_token, ))
+            self.conn = sqlite3.connect(self.cache_token + self.suffix)
             self.conn.isolation_level = None
+            # only effective for new databases, allows returning the space of evicted entries
+            self.conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
             self.conn.execute('PRAGMA journal_mode = WAL')
             self.conn.execute('PRAGMA synchronous = NORMAL')
             self.conn.isolation_level = 'DEFERRED'
-            self.conn.execute('CREATE TABLE IF NOT EXISTS entries (name TEXT, value BLOB)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS entries (name TEXT, value BLOB, accessed REAL, size INTEGER)')
             self.conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS entries_name ON entries (name)')
+            # large values are stored in chunks, the value of their entry being NULL
+            self.conn.execute('CREATE TABLE IF NOT EXISTS chunks (name TEXT, sequence INTEGER, data BLOB)')
+            self.conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS chunks_name ON chunks (name, sequence)')
+
+            # databases of older versions lack the columns
+            columns = [row[1] for row in self.conn.execute('PRAGMA table_info(entries)')]
+            for column, column_type in [('accessed', 'REAL'), ('size', 'INTEGER')]:
+                if column not in columns:
+                    self.conn.execute('ALTER TABLE entries ADD COLUMN %s %s' % (column, column_type))
+            self.conn.commit()
 
     def __del__(self):
         if self.conn:
             self.conn.close()
 
 
+def cache_files(directory):
+    """
+    Returns the cache files within a directory.
+
+    :param directory: cache directory
+    :return: tuple (list of sqlite3 cache databases, list of flat cache files)
+    """
+    filenames = sorted(glob.glob(os.path.join(directory, '*.cache')))
+
+    return ([filename for filename in filenames if filename.endswith(Sqlite3Cache.suffix)],
+            [filename for filename in filenames if not filename.endswith(Sqlite3Cache.suffix)])
+
+
+def prune_cache(directory, max_size=None, max_age=None, vacuum=False):
+    """
+    Evicts cache entries of all caches within a directory, least recently used first.
+
+    :param directory: cache directory
+    :param max_size: size in bytes the entries may occupy in total, None for no limit
+    :param max_age: age in seconds since the last access after which entries are evicted, None for no limit
+    :param vacuum: whether to rebuild the databases afterwards (requires exclusive access), otherwise only their
+                   free pages are released
+    :return: tuple (count of evicted entries, their total size)
+    """
+    databases, flat_files = cache_files(directory)
+
+    caches = {database: Sqlite3Cache.from_filename(database) for database in databases}
+
+    # (accessed, size, database or None for flat files, name)
+    candidates = []
+
+    for database, cache in caches.items():
+        candidates += [(accessed, size, database, name) for name, size, accessed in cache.entries()]
+
+    for filename in flat_files:
+        candidates.append((max(os.path.getatime(filename), os.path.getmtime(filename)), os.path.getsize(filename),
+                           None, filename))
+
+    candidates.sort(key=lambda candidate: candidate[0])
+
+    total = sum(candidate[1] for candidate in candidates)
+
+    now = time.time()
+
+    evicted, evicted_size = 0, 0
+
+    for accessed, size, database, name in candidates:
+        too_large = max_size is not None and total > max_size
+        too_old = max_age is not None and now - accessed > max_age
+
+        if not too_large and not too_old:
+            continue
+
+        if database is None:
+            os.remove(name)
+        else:
+            del caches[database][name]
+
+        total -= size
+        evicted += 1
+        evicted_size += size
+
+    for database, cache in caches.items():
+        try:
+            cache.compact(full=vacuum)
+        except sqlite3.Error as e:
+            logger.warning("Could not compact %s: %s" % (database, e))
+
+    return evicted, evicted_size
+
+
+class Prefetcher(object):
+    """
+    Reads items ahead of time in a background thread, so reading and processing can overlap.
+    The keys to prefetch are passed in the order they will presumably be requested,
+    at most ``depth`` read items are kept until they are requested.
+
+    Note that the read function is called from the background thread, it must therefore not share
+    non thread-safe resources (*e.g.* file handles) with the requesting thread.
+
+    :param read: callable, reading the value for a key
+    :param depth: maximum count of items read ahead
+
+    >>> p = Prefetcher(lambda key: key * 2)
+    >>> p.prefetch([1, 2, 3])
+    >>> p.get(1)
+    2
+    >>> p.get(5) is None
+    True
+    >>> p.close()
+    """
+
+    def __init__(self, read, depth=2):
+        self.read = read
+        self.depth = depth
+
+        self.condition = threading.Condition()
+
+        self.wanted = []
+        self.in_flight = None
+        self.done = {}
+        self.stopped = False
+
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def prefetch(self, keys):
+        """
+        Sets the keys to prefetch, replacing the ones set before. Already read items no longer wanted are dropped.
+
+        :param keys: iterable of keys
+        """
+        with self.condition:
+            if self.stopped:
+                return
+
+            self.wanted = list(keys)
+            wanted = set(self.wanted)
+            for key in list(self.done.keys()):
+                if key not in wanted:
+                    del self.done[key]
+                else:
+                    wanted.remove(key)
+            self.wanted = [key for key in self.wanted if key in wanted and key != self.in_flight]
+            self.condition.notify_all()
+
+    def get(self, key, default=None):
+        """
+        Returns the prefetched value of key, waiting for it if it is currently (or next) being read.
+        If the key is not prefetched (or reading it failed), default is returned.
+
+        :param key: key
+        :param default: value returned if key was not prefetched
+        :return: value
+        """
+        with self.condition:
+            # wait if the key is being read, or will be read next anyways
+            while key == self.in_flight or \
+                    (len(self.wanted) > 0 and self.wanted[0] == key and len(self.done) < self.depth):
+                self.condition.wait()
+
+            if key in self.wanted:
+                # if the requested key is still pending, the keys before it were skipped
+                self.wanted = self.wanted[self.wanted.index(key) + 1:]
+
+            result = self.done.pop(key, default)
+            self.condition.notify_all()
+            return result
+
+    def close(self):
+        """
+        Stops the background thread, waiting for the item currently being read, and drops all read items.
+        Afterwards, nothing is prefetched anymore.
+
+        """
+        with self.condition:
+            self.stopped = True
+            self.wanted = []
+            self.condition.notify_all()
+
+        self.thread.join()
+
+        self.done = {}
+
+    def run(self):
+        """
+        Background thread main loop.
+
+        """
+        while True:
+            with self.condition:
+                while not self.stopped and (len(self.wanted) == 0 or len(self.done) >= self.depth):
+                    self.condition.wait()
+
+                if self.stopped:
+                    return
+
+                key = self.in_flight = self.wanted.pop(0)
+
+            try:
+                value = self.read(key)
+            except Exception as e:
+                # the requesting side will read the item by itself, and encounter the error there
+                logger.debug("Prefetching %s failed: %s", repr(key), repr(e))
+                value = None
+
+            with self.condition:
+                if value is not None:
+                    self.done[key] = value
+                self.in_flight = None
+                self.condition.notify_all()
+
+
 class NotReallyATree(list):
     """
         The class is a some-what duck-type compatible (it has a ``query`` method) dumb replacement
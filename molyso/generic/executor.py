@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+executor.py contains the registry of execution backends, *i.e.* pool-like objects frames are processed with.
+All of them offer (a subset of) the interface of :py:class:`multiprocessing.Pool`.
+Further backends can be added via :py:func:`register_executor`, *e.g.* from a module loaded with `-m`.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import multiprocessing
+import multiprocessing.pool
+
+
+class SerialResult(object):
+    """
+    Result of :py:meth:`SerialPool.apply_async`, which was already computed.
+
+    :param value: result value
+    :param exception: exception raised, if any
+    """
+    def __init__(self, value=None, exception=None):
+        self.value = value
+        self.exception = exception
+
+    def ready(self):
+        """
+        Returns whether the result is ready, which it always is.
+
+        :return: True
+        """
+        return True
+
+    def get(self, timeout=None):
+        """
+        Returns the result value, or raises the exception raised while computing it.
+
+        :param timeout: ignored
+        :return: value
+        """
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+
+class SerialPool(object):
+    """
+    Stand-in for :py:class:`multiprocessing.Pool`, executing all tasks within the calling thread,
+    as their results are requested.
+
+    :param processes: ignored
+    :param initializer: function to call upon creation
+    :param initargs: arguments for the initializer
+    :param maxtasksperchild: ignored
+
+    >>> pool = SerialPool()
+    >>> list(pool.imap_unordered(abs, [-1, -2]))
+    [1, 2]
+    >>> pool.apply_async(abs, (-3,)).get()
+    3
+    """
+    def __init__(self, processes=None, initializer=None, initargs=(), maxtasksperchild=None):
+        if initializer is not None:
+            initializer(*initargs)
+
+    def imap(self, function, iterable):
+        """
+        Lazily applies function to each item of iterable.
+
+        :param function: function
+        :param iterable: iterable
+        :return: generator of results
+        """
+        for item in iterable:
+            yield function(item)
+
+    imap_unordered = imap
+
+    def map(self, function, iterable):
+        """
+        Applies function to each item of iterable.
+
+        :param function: function
+        :param iterable: iterable
+        :return: list of results
+        """
+        return list(self.imap(function, iterable))
+
+    def apply_async(self, function, args=(), kwds=None):
+        """
+        Calls function immediately.
+
+        :param function: function
+        :param args: arguments
+        :param kwds: keyword arguments
+        :return: SerialResult
+        """
+        try:
+            return SerialResult(value=function(*args, **(kwds or {})))
+        except Exception as e:
+            return SerialResult(exception=e)
+
+    def close(self):
+        """
+        Does nothing.
+
+        """
+        pass
+
+    def join(self):
+        """
+        Does nothing.
+
+        """
+        pass
+
+    def terminate(self):
+        """
+        Does nothing.
+
+        """
+        pass
+
+
+def create_process_pool(processes, initializer, initargs, maxtasksperchild=None):
+    """
+    Creates a pool of worker processes.
+
+    :param processes: count of workers
+    :param initializer: worker set-up function
+    :param initargs: arguments for the set-up function
+    :param maxtasksperchild: count of tasks after which a worker is replaced, None for never
+    :return: pool
+    """
+    return multiprocessing.Pool(processes, initializer, initargs, maxtasksperchild=maxtasksperchild)
+
+
+def create_thread_pool(processes, initializer, initargs, maxtasksperchild=None):
+    """
+    Creates a pool of worker threads. Threads are not replaced, maxtasksperchild is ignored.
+
+    :param processes: count of workers
+    :param initializer: worker set-up function
+    :param initargs: arguments for the set-up function
+    :param maxtasksperchild: ignored
+    :return: pool
+    """
+    return multiprocessing.pool.ThreadPool(processes, initializer, initargs)
+
+
+executors = {}
+
+# executors whose workers share the memory (and thus the globals) of the calling process
+in_process_executors = set()
+
+# executors whose tasks do not run within the main thread of a process, hence can not be limited in time
+# (see :py:func:`~molyso.generic.etc.time_limit`, which relies on SIGALRM)
+unlimited_executors = set()
+
+
+def register_executor(name, factory, in_process=False, main_thread=True):
+    """
+    Registers an execution backend.
+
+    :param name: name, as selected on the command line
+    :param factory: callable(processes, initializer, initargs, maxtasksperchild) returning a pool-like object
+    :param in_process: whether the workers run within the calling process (*e.g.* threads)
+    :param main_thread: whether tasks run within the main thread of their process
+    """
+    executors[name] = factory
+
+    if in_process:
+        in_process_executors.add(name)
+    else:
+        in_process_executors.discard(name)
+
+    if main_thread:
+        unlimited_executors.discard(name)
+    else:
+        unlimited_executors.add(name)
+
+
+def create_executor(name, processes, initializer, initargs, maxtasksperchild=None):
+    """
+    Creates a pool-like object with the registered backend name.
+
+    :param name: name of the backend
+    :param processes: count of workers
+    :param initializer: worker set-up function
+    :param initargs: arguments for the set-up function
+    :param maxtasksperchild: count of tasks after which a worker is replaced, None for never
+    :return: pool-like object
+
+    >>> create_executor('serial', 1, None, ()).map(abs, [-1])
+    [1]
+    """
+    return executors[name](processes, initializer, initargs, maxtasksperchild)
+
+
+register_executor('process', create_process_pool)
+register_executor('thread', create_thread_pool, in_process=True, main_thread=False)
+register_executor('serial', SerialPool, in_process=True)
@@ -1,17 +1,298 @@
 # -*- coding: utf-8 -*-
 """
 fft.py contains Fourier transform related helper functions
-mainly it abstracts the Fourier transform itself
-(currently just passing the calls through to the numpy functions)
+mainly it abstracts the Fourier transform itself: the transforms are dispatched to a backend,
+which is numpy by default, or pyFFTW (with cached plans) or scipy.fft (with a selectable count of worker threads)
+if selected. Further backends can be added via :py:func:`register_fft_backend`.
+As other backends round differently, results may differ slightly from those with numpy.
+Phase correlations use complex transforms by default. Real transforms of their (real) inputs are faster, but round
+differently as well, hence they are only used if selected via :py:func:`set_real_transforms`.
 """
 
+import functools
+
 import numpy as np
 from scipy.fftpack import next_fast_len
 
-fft = np.fft.fft
-ifft = np.fft.ifft
+from .precision import processing_type
+
 fftfreq = np.fft.fftfreq
 
+# names of the transforms a backend provides
+fft_functions = ('fft', 'ifft', 'rfft', 'irfft')
+
+
+def numpy_fft_backend(workers=1):
+    """
+    Creates the numpy backend. numpy does not support multiple workers, workers is ignored.
+
+    :param workers: ignored
+    :return: dictionary mapping the names of the transforms to functions
+    """
+    return {name: getattr(np.fft, name) for name in fft_functions}
+
+
+def scipy_fft_backend(workers=1):
+    """
+    Creates the scipy.fft backend.
+
+    :param workers: count of worker threads per transform
+    :return: dictionary mapping the names of the transforms to functions
+    """
+    import scipy.fft
+
+    return {name: functools.partial(getattr(scipy.fft, name), workers=workers) for name in fft_functions}
+
+
+def pyfftw_fft_backend(workers=1):
+    """
+    Creates the pyFFTW backend, its plans are cached and reused for transforms of the same shape.
+
+    :param workers: count of worker threads per transform
+    :return: dictionary mapping the names of the transforms to functions
+    """
+    # noinspection PyUnresolvedReferences
+    import pyfftw.interfaces.numpy_fft
+    # noinspection PyUnresolvedReferences
+    import pyfftw.interfaces.cache
+
+    pyfftw.interfaces.cache.enable()
+
+    return {name: functools.partial(getattr(pyfftw.interfaces.numpy_fft, name), threads=workers)
+            for name in fft_functions}
+
+
+fft_backends = {}
+
+
+def register_fft_backend(name, factory):
+    """
+    Registers a Fourier transform backend.
+
+    :param name: name, as selected via :py:func:`set_fft_backend`
+    :param factory: callable(workers) returning a dictionary mapping the names of the transforms
+                    (see :py:data:`fft_functions`) to functions with numpy's signatures
+    """
+    fft_backends[name] = factory
+
+
+register_fft_backend('numpy', numpy_fft_backend)
+register_fft_backend('scipy', scipy_fft_backend)
+register_fft_backend('pyfftw', pyfftw_fft_backend)
+
+_backend = {}
+
+
+def set_fft_backend(name='numpy', workers=1):
+    """
+    Selects the Fourier transform backend. 'auto' selects pyfftw if available, otherwise scipy if multiple workers
+    are requested, numpy else (the transforms molyso performs are small, scipy's dispatching overhead outweighs
+    its benefits for single threaded transforms).
+
+    :param name: name of the backend
+    :param workers: count of worker threads per transform (if supported by the backend)
+    :return: name of the selected backend
+    :raises ValueError: if the backend is unknown or not available
+
+    >>> set_fft_backend('numpy')
+    'numpy'
+    >>> set_fft_backend('nonexistent')
+    Traceback (most recent call last):
+        ...
+    ValueError: Unknown or unavailable FFT backend "nonexistent".
+    >>> set_fft_backend('auto') in fft_backends
+    True
+    >>> set_fft_backend()
+    'numpy'
+    """
+    if name == 'auto':
+        candidates = ['pyfftw', 'scipy', 'numpy'] if workers > 1 else ['pyfftw', 'numpy']
+    else:
+        candidates = [name]
+
+    for candidate in candidates:
+        if candidate not in fft_backends:
+            continue
+
+        try:
+            functions = fft_backends[candidate](workers)
+        except ImportError:
+            continue
+
+        _backend.clear()
+        _backend.update(functions)
+        _backend['name'] = candidate
+        return candidate
+
+    raise ValueError("Unknown or unavailable FFT backend \"%s\"." % (name,))
+
+
+def parse_fft_backend(spec):
+    """
+    Parses a Fourier transform backend specification of the form 'backend' or 'backend:workers'.
+
+    :param spec: specification
+    :return: tuple (backend, workers)
+    :raises ValueError: if the backend is unknown or the count of workers is invalid
+
+    >>> parse_fft_backend('scipy:4')
+    ('scipy', 4)
+    >>> parse_fft_backend('auto')
+    ('auto', 1)
+    """
+    name, _, workers = spec.partition(':')
+
+    if name != 'auto' and name not in fft_backends:
+        raise ValueError("Unknown FFT backend \"%s\", available are: auto, %s" % (
+            name, ', '.join(sorted(fft_backends.keys()))))
+
+    try:
+        workers = int(workers) if workers != '' else 1
+    except ValueError:
+        raise ValueError("Invalid count of workers \"%s\" for FFT backend \"%s\"." % (workers, name))
+
+    if workers < 1:
+        raise ValueError("The count of workers for FFT backend \"%s\" must be positive." % (name,))
+
+    return name, workers
+
+
+def _processing_precision(signal, keep_precision=False):
+    """
+    Converts the input of a transform to (at least) the processing precision (see
+    :py:func:`molyso.generic.precision.processing_type`), as backends (and numpy since 2.0) transform single
+    precision inputs in single precision.
+
+    :param signal: input signal
+    :param keep_precision: whether to keep the precision of the input signal
+    :return: input signal in processing precision
+
+    >>> _processing_precision(np.zeros(2, dtype=np.float32)).dtype
+    dtype('float64')
+    >>> _processing_precision(np.zeros(2, dtype=np.float32), keep_precision=True).dtype
+    dtype('float32')
+    """
+    signal = np.asarray(signal)
+
+    if keep_precision:
+        return signal
+
+    return signal.astype(np.result_type(signal.dtype, processing_type()), copy=False)
+
+
+def fft(signal, n=None, axis=-1, keep_precision=False):
+    """
+    Computes the discrete Fourier transform with the current backend.
+
+    :param signal: input signal
+    :param n: length of the transform (the signal is cropped or zero-padded)
+    :param axis: axis to transform along
+    :param keep_precision: whether to transform in the precision of the input signal,
+                           rather than (at least) the processing precision
+    :return: Fourier transformed data
+    """
+    return _backend['fft'](_processing_precision(signal, keep_precision), n=n, axis=axis)
+
+
+def ifft(signal, n=None, axis=-1, keep_precision=False):
+    """
+    Computes the inverse discrete Fourier transform with the current backend.
+
+    :param signal: input (Fourier transformed) signal
+    :param n: length of the transform
+    :param axis: axis to transform along
+    :param keep_precision: whether to transform in the precision of the input signal,
+                           rather than (at least) the processing precision
+    :return: inverse Fourier transformed data
+    """
+    return _backend['ifft'](_processing_precision(signal, keep_precision), n=n, axis=axis)
+
+
+def rfft(signal, n=None, axis=-1, keep_precision=False):
+    """
+    Computes the discrete Fourier transform of a real signal with the current backend,
+    *i.e.* only the non-negative frequency terms.
+
+    :param signal: input signal (real)
+    :param n: length of the transform (the signal is cropped or zero-padded)
+    :param axis: axis to transform along
+    :param keep_precision: whether to transform in the precision of the input signal,
+                           rather than (at least) the processing precision
+    :return: Fourier transformed data
+    """
+    return _backend['rfft'](_processing_precision(signal, keep_precision), n=n, axis=axis)
+
+
+def irfft(signal, n=None, axis=-1, keep_precision=False):
+    """
+    Computes the inverse of :py:func:`rfft` with the current backend.
+
+    :param signal: input (Fourier transformed) signal
+    :param n: length of the output, *i.e.* of the original signal
+    :param axis: axis to transform along
+    :param keep_precision: whether to transform in the precision of the input signal,
+                           rather than (at least) the processing precision
+    :return: inverse Fourier transformed data (real)
+    """
+    return _backend['irfft'](_processing_precision(signal, keep_precision), n=n, axis=axis)
+
+
+set_fft_backend('numpy')
+
+_real_transforms = False
+
+
+def set_real_transforms(enabled=False):
+    """
+    Selects whether phase correlations of real signals (see :py:func:`molyso.generic.signal.find_phase`)
+    are computed by real transforms, which roughly halves their work, but rounds differently than the complex
+    transforms used by default, so that results may differ slightly.
+
+    :param enabled: whether to use real transforms
+
+    >>> set_real_transforms(True)
+    >>> real_transforms()
+    True
+    >>> set_real_transforms()
+    """
+    global _real_transforms
+
+    _real_transforms = bool(enabled)
+
+
+def real_transforms():
+    """
+    Returns whether phase correlations are computed by real transforms, see :py:func:`set_real_transforms`.
+
+    :return: whether real transforms are used
+    :rtype: bool
+
+    >>> real_transforms()
+    False
+    """
+    return _real_transforms
+
+
+_fast_lengths = {}
+
+
+def fast_length(length):
+    """
+    Returns the next length at least as long as length, which can be transformed fast (see next_fast_len).
+    The lengths are cached.
+
+    :param length: length
+    :type length: int
+    :return: fast length
+    :rtype: int
+
+    >>> fast_length(1021)
+    1024
+    """
+    if length not in _fast_lengths:
+        _fast_lengths[length] = next_fast_len(length)
+    return _fast_lengths[length]
+
 
 def spectrum_fourier(signal):
     """
@@ -91,7 +372,7 @@ def hires_power_spectrum(signal, oversampling=1):
     :rtype: tuple(numpy.array, numpy.array)
     """
     arr_len = len(signal)
-    fast_size = next_fast_len(oversampling * arr_len)
+    fast_size = fast_length(oversampling * arr_len)
 
     tmp_data = np.zeros(fast_size)
     tmp_data[:arr_len] = signal
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+precision.py contains the selection of the floating point precision intermediate results (profiles, spectra,
+binarized images, ...) are computed in. The images themselves are always read as float32, by default (float64)
+intermediate results are computed in double precision, with float32, single precision is kept throughout.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import numpy as np
+
+precisions = {'float32': np.dtype(np.float32), 'float64': np.dtype(np.float64)}
+
+_processing_type = precisions['float64']
+
+
+def set_precision(name='float64'):
+    """
+    Selects the floating point precision intermediate results are computed in.
+
+    :param name: name of the precision, float32 or float64
+    :raises ValueError: if the precision is unknown
+
+    >>> set_precision('float32')
+    >>> processing_type()
+    dtype('float32')
+    >>> set_precision('float16')
+    Traceback (most recent call last):
+        ...
+    ValueError: Unknown precision "float16", available are: float32, float64
+    >>> set_precision()
+    """
+    global _processing_type
+
+    if name not in precisions:
+        raise ValueError("Unknown precision \"%s\", available are: %s" % (name, ', '.join(sorted(precisions.keys()))))
+
+    _processing_type = precisions[name]
+
+
+def processing_type():
+    """
+    Returns the floating point type intermediate results are computed in.
+
+    :return: dtype
+    :rtype: numpy.dtype
+
+    >>> processing_type()
+    dtype('float64')
+    """
+    return _processing_type
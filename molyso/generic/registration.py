@@ -6,6 +6,7 @@ which registers images by checking the individual horizontal and vertical shifts
 from __future__ import division, unicode_literals, print_function
 
 from .signal import find_phase, vertical_mean, horizontal_mean
+from .fft import ifft
 
 import numpy as np
 
@@ -52,6 +53,44 @@ def translation_2x1d(image_a=None, image_b=None, ffts_a=(), ffts_b=(), return_a=
     return result
 
 
+def registration_quality(ffts_a, ffts_b):
+    """
+    Returns the quality of a registration by :py:func:`translation_2x1d`, *i.e.* the lower of the normalized
+    cross-correlation coefficients of the (mean-free) vertical and horizontal mean profiles at their best shift.
+    It is 1.0 for images which are identical up to the shift, and drops as they become dissimilar.
+
+    :param ffts_a: FT pair of the first image, as returned by :py:func:`translation_2x1d`
+    :param ffts_b: FT pair of the second image
+    :return: quality
+
+    >>> image = np.random.RandomState(0).rand(32, 32)
+    >>> _, ffts = translation_2x1d(image, image, return_a=True)
+    >>> round(registration_quality(ffts, ffts), 6)
+    1.0
+    >>> _, other_ffts = translation_2x1d(image, image.T, return_b=True)
+    >>> registration_quality(ffts, other_ffts) < 0.9
+    True
+    """
+    qualities = []
+
+    for fft_a, fft_b in zip(ffts_a, ffts_b):
+        # without the constant component, i.e. the mean
+        fft_a, fft_b = fft_a[1:], fft_b[1:]
+
+        energy = np.sqrt(np.sum(np.absolute(fft_a) ** 2) * np.sum(np.absolute(fft_b) ** 2))
+
+        if energy == 0.0:
+            qualities.append(0.0)
+            continue
+
+        # like the correlation of find_phase, with the selected backend
+        correlation = np.absolute(ifft(np.concatenate(([0.0], fft_a * fft_b.conjugate())), keep_precision=True))
+
+        qualities.append(float(np.max(correlation) * len(correlation) / energy))
+
+    return min(qualities)
+
+
 def shift_image(image, shift, background='input'):
     """
 
@@ -8,7 +8,8 @@ from __future__ import division, unicode_literals, print_function
 import math
 import numpy as np
 
-from .signal import find_phase, vertical_mean, remove_outliers, each_image_slice, hamming_smooth
+from .signal import find_consecutive_phases, remove_outliers, hamming_smooth
+from .precision import processing_type
 from ..test import test_image
 
 
@@ -33,33 +34,18 @@ def find_rotation(image, steps=10, smoothing_signal_length=15, maximum_angle=45.
     -1.5074357587749678
     """
 
-    shifts = np.zeros(steps)
-
-    last_signal = None
-    last_fft = None
-
-    step = 0
-
-    all_profiles = []
+    height, width = image.shape[:2]
+    step = width // steps
 
-    for n, the_step, image_slice in each_image_slice(image, steps, direction='vertical'):
-        step = the_step
-        profile = vertical_mean(image_slice)
+    # the vertical mean profiles of all slices (as in each_image_slice), one per row
+    profiles = np.add.reduceat(image[:, :step * steps], np.arange(0, step * steps, step), axis=1,
+                               dtype=processing_type()).T / step
 
-        profile = hamming_smooth(profile, smoothing_signal_length)
-        profile = np.diff(profile)
+    profiles = hamming_smooth(profiles, smoothing_signal_length, axis=1)
+    profiles = np.diff(profiles, axis=1)
 
-        all_profiles.append(profile)
-
-        if n == 0:
-            last_signal = profile
-            last_fft = None
-            continue
-
-        shift, current_fft = find_phase(last_signal, profile, last_fft, return_2=True)
-        last_signal, last_fft = profile, current_fft
-
-        shifts[n] = shift
+    shifts = np.zeros(steps)
+    shifts[1:] = find_consecutive_phases(profiles)
 
     maximum_shift = np.tan(np.deg2rad(maximum_angle)) * step
 
@@ -99,6 +85,31 @@ try:
                               cv2.getRotationMatrix2D((image.shape[1] * 0.5, image.shape[0] * 0.5), angle, 1.0),
                               (image.shape[1], image.shape[0]))
 
+    def rotate_image_rows(image, angle, top, bottom):
+        """
+        Rotates image for angle degrees (like :py:func:`rotate_image`), but only computes the rows top to bottom
+        of the result. The rows equal those computed by :py:func:`rotate_image` up to rounding, as OpenCV
+        interpolates the output in blocks, which may round differently (by one for integer images).
+
+        :param image: input image
+        :param angle: angle to rotate
+        :param top: first row to compute
+        :param bottom: row after the last row to compute
+        :type image: numpy.ndarray
+        :type angle: float
+        :type top: int
+        :type bottom: int
+        :rtype: numpy.ndarray
+        :return: rows of the rotated image
+
+        >>> rotate_image_rows(np.eye(4, dtype=np.uint8), 45.0, 2, 3)
+        array([[1, 1, 1, 1]], dtype=uint8)
+        """
+        matrix = cv2.getRotationMatrix2D((image.shape[1] * 0.5, image.shape[0] * 0.5), angle, 1.0)
+        # the first row to compute becomes the first row of the output
+        matrix[1, 2] -= top
+        return cv2.warpAffine(image, matrix, (image.shape[1], bottom - top))
+
 except ImportError:
     # DO NOT USE from scipy.misc import imrotate
     from scipy.ndimage.interpolation import rotate
@@ -112,6 +123,19 @@ except ImportError:
         """
         return rotate(image, angle=angle, reshape=False)
 
+    def rotate_image_rows(image, angle, top, bottom):
+        """
+        Rotates image for angle degrees, and returns the rows top to bottom of the result.
+        Without OpenCV, the whole image is rotated.
+
+        :param image:
+        :param angle:
+        :param top:
+        :param bottom:
+        :return:
+        """
+        return rotate_image(image, angle)[top:bottom]
+
 
 def calculate_crop_for_angle(image, angle):
     """
@@ -134,23 +158,44 @@ def calculate_crop_for_angle(image, angle):
     return hd, wd
 
 
-def apply_rotate_and_cleanup(image, angle):
+def apply_rotate_and_cleanup(image, angle, rows=None):
     """
     Rotates image for angle degrees, and crops the result to only return defined contents.
+    If rows are given, only these rows (of the cropped result) are rotated, all others are left zero
+    (as the zeroed array is allocated lazily, they do not occupy memory unless written to).
 
     :param image: input image
     :param angle: angle to rotate
+    :param rows: None, or a (top, bottom) pair of the rows of the result to compute
     :type image: numpy.ndarray
     :type angle: float
+    :type rows: tuple(int, int)
     :return: the rotated and cropped image, the angle, the horizontal crop, the vertical crop
     :rtype: tuple(numpy.ndarray, float, int, int)
 
     >>> apply_rotate_and_cleanup(np.zeros((32, 32,)), 45.0)
     (array([[0., 0.],
            [0., 0.]]), 45.0, 15, 15)
+    >>> image = test_image()
+    >>> full, _, _, _ = apply_rotate_and_cleanup(image, 2.0)
+    >>> region, _, _, _ = apply_rotate_and_cleanup(image, 2.0, rows=(100, 200))
+    >>> full.shape == region.shape, bool(region[:100].any())
+    (True, False)
+    >>> np.allclose(full[100:200], region[100:200], rtol=0, atol=1)  # up to rounding, see rotate_image_rows
+    True
     """
-    new_image = rotate_image(image, angle)
     h, w = calculate_crop_for_angle(image, angle)
+
+    if rows is not None:
+        height, width = image.shape[0] - 2 * h, image.shape[1] - 2 * w
+        top, bottom = min(max(rows[0], 0), height), min(max(rows[1], 0), height)
+
+        new_image = np.zeros((height, width), dtype=image.dtype)
+        if top < bottom:
+            new_image[top:bottom] = rotate_image_rows(image, angle, top + h, bottom + h)[:, w:w + width]
+        return new_image, angle, h, w
+
+    new_image = rotate_image(image, angle)
     lh, rh = (h, -h) if h else (None, None)
     lw, rw = (w, -w) if w else (None, None)
     new_image = new_image[lh:rh, lw:rw]
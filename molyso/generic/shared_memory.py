@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+shared_memory.py contains a ring of fixed size slots in shared memory, which can be used to pass
+large arrays, *e.g.* decoded frames, from one process to others without pickling them.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import os
+import multiprocessing
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+
+class SharedMemoryRing(object):
+    """
+    A ring of equally shaped array slots residing in one shared memory block.
+    Free slot numbers are passed around via a queue: A producer acquires a free slot, writes into it and
+    passes the slot number on, the consumer reads (copies) the slot and releases it again.
+
+    The object must be passed to other processes upon their creation (*e.g.* as Process or Pool initializer
+    arguments), as the contained queue may only be shared by inheritance.
+
+    :param slots: number of slots
+    :param shape: shape of each slot
+    :param dtype: dtype of each slot
+
+    >>> ring = SharedMemoryRing(2, (2, 2), np.float32)
+    >>> slot = ring.write(np.ones((2, 2)))
+    >>> ring.read(slot)
+    array([[1., 1.],
+           [1., 1.]], dtype=float32)
+    >>> ring.close()
+    """
+
+    available = shared_memory is not None
+
+    def __init__(self, slots, shape, dtype):
+        self.slots = int(slots)
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+        self.slot_size = int(np.prod(self.shape)) * self.dtype.itemsize
+
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, self.slots * self.slot_size))
+        self.name = self.memory.name
+        # only the creating process frees the memory, other processes might have inherited the object by forking
+        self.owner = os.getpid()
+
+        self.free = multiprocessing.Queue()
+        for slot in range(self.slots):
+            self.free.put(slot)
+
+        # remaining count of consumers of each pinned slot
+        self.users = multiprocessing.Array('i', max(1, self.slots))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['memory'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def slot(self, slot):
+        """
+        Returns an array view of a slot.
+
+        :param slot: slot number
+        :return: array
+        :rtype: numpy.ndarray
+        """
+        if self.memory is None:
+            self.memory = shared_memory.SharedMemory(name=self.name)
+
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.memory.buf, offset=slot * self.slot_size)
+
+    def acquire(self):
+        """
+        Waits for a free slot and returns its number.
+
+        :return: slot number
+        """
+        return self.free.get()
+
+    def release(self, slot):
+        """
+        Marks a slot as free.
+
+        :param slot: slot number
+        """
+        self.free.put(slot)
+
+    def write(self, data):
+        """
+        Writes data into a free slot (waiting for one if necessary).
+
+        :param data: array of the ring's shape
+        :return: slot number
+        """
+        slot = self.acquire()
+        self.slot(slot)[...] = data
+        return slot
+
+    def read(self, slot):
+        """
+        Copies the data out of a slot and releases it.
+
+        :param slot: slot number
+        :return: array
+        :rtype: numpy.ndarray
+        """
+        data = self.slot(slot).copy()
+        self.release(slot)
+        return data
+
+    def peek(self, slot):
+        """
+        Copies the data out of a slot, without releasing it.
+
+        :param slot: slot number
+        :return: array
+        :rtype: numpy.ndarray
+        """
+        return self.slot(slot).copy()
+
+    def pin(self, slot, users):
+        """
+        Marks a slot as read by multiple consumers, it is released once all of them called :py:meth:`unpin`.
+
+        :param slot: slot number
+        :param users: count of consumers
+
+        >>> ring = SharedMemoryRing(1, (1,), np.uint8)
+        >>> slot = ring.write(np.ones(1))
+        >>> ring.pin(slot, 2)
+        >>> ring.unpin(slot)
+        >>> ring.unpin(slot)
+        >>> ring.acquire() == slot
+        True
+        >>> ring.close()
+        """
+        with self.users.get_lock():
+            self.users[slot] = users
+
+    def unpin(self, slot):
+        """
+        Signals that a consumer of a pinned slot is done with it, the last one releases the slot.
+
+        :param slot: slot number
+        """
+        with self.users.get_lock():
+            self.users[slot] -= 1
+            last = self.users[slot] == 0
+
+        if last:
+            self.release(slot)
+
+    def close(self):
+        """
+        Detaches from the shared memory, the creating process additionally frees it.
+
+        """
+        if self.memory is not None:
+            self.memory.close()
+            if self.owner == os.getpid():
+                self.memory.unlink()
+            self.memory = None
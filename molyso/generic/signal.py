@@ -15,6 +15,7 @@ from collections import namedtuple
 
 from .smoothing import hamming_smooth
 from .fft import *
+from .precision import processing_type
 
 
 def find_phase(signal_1=None, signal_2=None,
@@ -24,6 +25,11 @@ def find_phase(signal_1=None, signal_2=None,
     Finds the phase (time shift) between two signals.
     Either signalX or fftX should be set; the FFTs can be returned
     in order to cache them locally...
+    The transforms are computed with the selected backend (see :py:mod:`molyso.generic.fft`), as complex
+    transforms of the unpadded signals in their own precision: the location of the correlation maximum is
+    sensitive to rounding, and padding would change the (circular) correlation itself.
+    If selected (see :py:func:`molyso.generic.fft.set_real_transforms`), signals whose transforms are not kept
+    are correlated by real transforms instead.
 
     :param signal_1: first input signal
     :type signal_1: numpy.ndarray or None
@@ -44,12 +50,18 @@ def find_phase(signal_1=None, signal_2=None,
     (2,)
     """
 
-    if signal_1 is not None and fft_1 is None:
-        fft_1 = fft(signal_1)
-    if signal_2 is not None and fft_2 is None:
-        fft_2 = fft(signal_2)
+    if real_transforms() and fft_1 is None and fft_2 is None and not (return_1 or return_2):
+        length = len(signal_1)
+        corr = irfft(rfft(signal_1, keep_precision=True) * -rfft(signal_2, keep_precision=True).conjugate(),
+                     n=length, keep_precision=True)
+    else:
+        if signal_1 is not None and fft_1 is None:
+            fft_1 = fft(signal_1, keep_precision=True)
+        if signal_2 is not None and fft_2 is None:
+            fft_2 = fft(signal_2, keep_precision=True)
 
-    corr = ifft(fft_1 * -fft_2.conjugate())
+        length = len(fft_1)
+        corr = ifft(fft_1 * -fft_2.conjugate(), keep_precision=True)
 
     corr = np.absolute(corr)
     the_max = np.argmax(corr)
@@ -57,7 +69,7 @@ def find_phase(signal_1=None, signal_2=None,
     #    sur = corr[the_max-1:the_max+2]
     #    the_max += -0.5*sur[0] + 0.5*sur[2]
 
-    the_max = -the_max if the_max < len(fft_1) / 2 else len(fft_1) - the_max
+    the_max = -the_max if the_max < length / 2 else length - the_max
 
     result = (the_max,)
     if return_1:
@@ -67,6 +79,38 @@ def find_phase(signal_1=None, signal_2=None,
     return result
 
 
+def find_consecutive_phases(signals):
+    """
+    Finds the phases (time shifts) between consecutive signals, *i.e.* rows, like :py:func:`find_phase` would
+    for each pair, but with the Fourier transforms and cross-correlations of all signals computed at once,
+    by one batched complex transform each (with the selected backend as well). Real transforms are used if
+    selected (see :py:func:`molyso.generic.fft.set_real_transforms`), like :py:func:`find_phase` does, as they
+    round differently, resolving nearly equal correlation maxima differently.
+
+    :param signals: input signals, one per row
+    :type signals: numpy.ndarray
+    :return: shifts between each row and the next one
+    :rtype: numpy.ndarray
+
+    >>> find_consecutive_phases(np.array([[0, 1, 0, 0, 0], [0, 0, 0, 1, 0], [0, 0, 1, 0, 0]]))
+    array([ 2, -1])
+    """
+    length = signals.shape[1]
+
+    if real_transforms():
+        ffts = rfft(signals, axis=1, keep_precision=True)
+        correlations = irfft(ffts[:-1] * -ffts[1:].conjugate(), n=length, axis=1, keep_precision=True)
+    else:
+        ffts = fft(signals, axis=1, keep_precision=True)
+        correlations = ifft(ffts[:-1] * -ffts[1:].conjugate(), axis=1, keep_precision=True)
+
+    correlations = np.absolute(correlations)
+
+    the_max = np.argmax(correlations, axis=1)
+
+    return np.where(the_max < length / 2, -the_max, length - the_max)
+
+
 class ExtremeAndProminence(namedtuple('ExtremeAndProminence', ['maxima', 'minima', 'signal', 'order', 'max_spline',
                                                                'min_spline', 'xpts', 'max_spline_points',
                                                                'min_spline_points', 'prominence'])):
@@ -313,7 +357,7 @@ def normalize(data):
     >>> normalize(np.array([10, 15, 20]))
     array([0. , 0.5, 1. ])
     """
-    result = data.astype(float)
+    result = data.astype(processing_type())
     result -= result.min()
     result /= result.max()
     return result
@@ -331,7 +375,7 @@ def fit_to_type(image, new_dtype):
     array([  0,   6,  14, 255], dtype=uint8)
     >>> fit_to_type(np.array([-7, 4, 18, 432]), np.int8)
     array([-128, -121, -113,  127], dtype=int8)
-    >>> fit_to_type(np.array([-7, 4, 18, 432]), np.bool)
+    >>> fit_to_type(np.array([-7, 4, 18, 432]), np.bool_)
     array([False, False, False,  True])
     >>> fit_to_type(np.array([-7, 4, 18, 432]), np.float32)
     array([ -7.,   4.,  18., 432.], dtype=float32)
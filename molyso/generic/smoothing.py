@@ -8,30 +8,73 @@ from __future__ import division, unicode_literals, print_function
 
 import numpy as np
 
+from .precision import processing_type
 
-def smooth(signal, kernel):
+
+def smooth(signal, kernel, axis=-1):
     """
     Generic smoothing function, smooths by convolving one signal with another.
+    Multi-dimensional inputs are treated as a batch of signals along axis, which are smoothed at once.
 
     :param signal: input signal to be smoothed
     :type signal: numpy.ndarray
     :param kernel: smoothing kernel to be used. will be normalized to :math:`\sum=1`
     :type kernel: numpy.ndarray
+    :param axis: axis along which multi-dimensional inputs are smoothed
+    :type axis: int
     :return: The signal convolved with the kernel
     :rtype: numpy.ndarray
 
     >>> smooth(np.array([0, 0, 0, 0, 1, 0, 0, 0, 0]), np.ones(3))
     array([0.        , 0.        , 0.        , 0.        , 0.33333333,
            0.33333333, 0.33333333, 0.        , 0.        ])
+    >>> smooth(np.array([[0, 0, 0, 0, 1, 0, 0, 0, 0], [0, 1, 0, 0, 0, 0, 0, 0, 0]]), np.ones(3), axis=1)
+    array([[0.        , 0.        , 0.        , 0.        , 0.33333333,
+            0.33333333, 0.33333333, 0.        , 0.        ],
+           [0.33333333, 0.66666667, 0.33333333, 0.33333333, 0.        ,
+            0.        , 0.        , 0.        , 0.        ]])
     """
 
+    kernel = kernel.astype(processing_type(), copy=False)
+
+    if signal.ndim > 1:
+        return _smooth_batch(signal, kernel, axis)
+
     return np.convolve(
         kernel / kernel.sum(),
         np.r_[signal[kernel.size - 1:0:-1], signal, signal[-1:-kernel.size:-1]],
         mode='valid')[kernel.size // 2 - 1:-kernel.size // 2][0:len(signal)]
 
 
-def hamming_smooth(signal, window_width, no_cache=False):
+def _smooth_batch(signal, kernel, axis):
+    """
+    Batched variant of :py:func:`smooth`, with the same (mirrored) padding and alignment. The convolution is
+    performed as a sum of the shifted signals weighted by the kernel, so it is vectorized over all signals.
+
+    :param signal: input signals to be smoothed
+    :param kernel: smoothing kernel to be used
+    :param axis: axis along which the signals are smoothed
+    :return: The signals convolved with the kernel
+    """
+    signal = np.moveaxis(signal, axis, -1)
+
+    padded = np.concatenate(
+        (signal[..., kernel.size - 1:0:-1], signal, signal[..., -1:-kernel.size:-1]), axis=-1).astype(processing_type())
+
+    weights = kernel[::-1] / kernel.sum()
+    length = padded.shape[-1] - kernel.size + 1
+
+    result = np.zeros(padded.shape[:-1] + (length,), dtype=padded.dtype)
+
+    for n, weight in enumerate(weights):
+        result += weight * padded[..., n:n + length]
+
+    result = result[..., kernel.size // 2 - 1:-kernel.size // 2][..., 0:signal.shape[-1]]
+
+    return np.moveaxis(result, -1, axis)
+
+
+def hamming_smooth(signal, window_width, no_cache=False, axis=-1):
     """
     Smooths a signal by convolving with a hamming window of given width. Caches by the hamming windows by default.
 
@@ -41,6 +84,8 @@ def hamming_smooth(signal, window_width, no_cache=False):
     :type window_width: int
     :param no_cache: default `False`, disables caching, *e.g.*, for non-standard window sizes
     :type no_cache: bool
+    :param axis: axis along which multi-dimensional inputs (batches of signals) are smoothed
+    :type axis: int
     :return: the smoothed signal
     :rtype: numpy.ndarray
 
@@ -49,16 +94,18 @@ def hamming_smooth(signal, window_width, no_cache=False):
            0.86206897, 0.06896552, 0.        , 0.        ])
     """
 
-    if len(signal) == 1:
+    length = signal.shape[axis]
+
+    if length == 1:
         return signal
 
-    if len(signal) < window_width:
-        window_width = len(signal)
+    if length < window_width:
+        window_width = length
         no_cache = True
 
     return smooth(signal,
                   np.hamming(window_width) if no_cache
-                  else signals(np.hamming, window_width))
+                  else signals(np.hamming, window_width), axis=axis)
 
 
 _signals = {}
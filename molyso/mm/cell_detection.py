@@ -7,6 +7,7 @@ from __future__ import division, unicode_literals, print_function
 import numpy as np
 
 from ..generic.otsu import threshold_otsu
+from ..generic.precision import processing_type
 from ..generic.signal import hamming_smooth,  simple_baseline_correction, find_extrema_and_prominence, \
     vertical_mean, threshold_outliers
 
@@ -197,7 +198,7 @@ def find_cells_in_channel_classic(image):
                                description="Bias factor for the cell detection Otsu image."
                            ))
 
-    profile_of_binary_image = vertical_mean(binary_image.astype(float))
+    profile_of_binary_image = vertical_mean(binary_image.astype(processing_type()))
 
     # the profile is first baseline corrected and smoothed ...
     profile = simple_baseline_correction(profile)
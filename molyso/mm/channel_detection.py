@@ -356,11 +356,13 @@ def horizontal_channel_detection(image):
 # TODO fix the proper one, or merge them, or document this here, or use just the new one
 
 
-def alternate_vertical_channel_region_detection(image):
+def alternate_vertical_channel_region_detection(image, rows=None):
 
     """
 
     :param image:
+    :param rows: None, or a (top, bottom) pair of the only rows of the image which are defined (see
+                 :py:meth:`molyso.mm.image.Image.autorotate`), slices not lying within are treated as empty
     :return:
     """
     f = spectrum_bins_by_length(image.shape[1])
@@ -393,6 +395,9 @@ def alternate_vertical_channel_region_detection(image):
     collector = np.zeros(image.shape[0])
 
     for n, the_step, image_slice in each_image_slice(image, split_factor, direction='horizontal'):
+        if rows is not None and not (rows[0] <= n * the_step and (n + 1) * the_step <= rows[1]):
+            continue
+
         power_local_f, local_f = horizontal_mean_frequency(image_slice)
 
         collector[n*the_step:(n+1)*the_step] = local_f
@@ -520,10 +525,12 @@ def vertical_channel_region_detection(image):
     return sorted(find_insides(collector), key=lambda pair: pair[1] - pair[0], reverse=True)[0]
 
 
-def find_channels(image):
+def find_channels(image, rows=None):
     """
     channel finder
     :param image:
+    :param rows: None, or a (top, bottom) pair of the only rows of the image which are defined,
+                 only supported by the alternate vertical method
     :return:
     """
 
@@ -533,8 +540,11 @@ def find_channels(image):
         description="For channel detection, vertical method to use (either alternate or recursive).")
 
     if method_to_use == 'alternate':
-        upper, lower = alternate_vertical_channel_region_detection(image)
+        upper, lower = alternate_vertical_channel_region_detection(image, rows=rows)
     elif method_to_use == 'recursive':
+        if rows is not None:
+            raise RuntimeError("The recursive vertical channel detection method requires the whole image.")
+
         upper, lower = vertical_channel_region_detection(image)
     else:
         raise RuntimeError("Tunable set to unsupported vertical channel detection method.")
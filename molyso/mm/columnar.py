@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+columnar.py contains a columnar representation of flattened images (see :py:meth:`molyso.mm.image.Image.flatten`).
+The per channel and per cell lists of all images are stored as few contiguous arrays (with offsets for the ragged
+nesting), so that a whole position can be stored and loaded in bulk instead of as many small Python objects.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import numpy as np
+
+# attributes of flattened images which are stored as columns, with the nesting depth of their lists,
+# the leaves being either scalars or arrays (channel images)
+column_attributes = {
+    'channels_left': 1,
+    'channels_right': 1,
+    'channels_real_top': 1,
+    'channels_real_bottom': 1,
+    'channels_putative_orientations': 1,
+    'channels_cells_local_top': 2,
+    'channels_cells_local_bottom': 2,
+    'channel_images': 1,
+    # FluorescentImage
+    'background_fluorescences': 1,
+    'channels_cells_fluorescences_mean': 3,
+    'channels_cells_fluorescences_std': 3,
+    'channels_cells_fluorescences_min': 3,
+    'channels_cells_fluorescences_max': 3,
+    'channels_cells_fluorescences_median': 3,
+    'channel_fluorescences_images': 2,
+}
+
+
+def pack_nested(values, depth):
+    """
+    Packs a list of nested lists into the list of their leaves, and the offsets of each nesting level.
+
+    :param values: list of nested lists
+    :param depth: nesting depth
+    :return: tuple (leaves, offsets)
+    :raises TypeError: if the values are not nested as deep
+
+    >>> pack_nested([[[1], [2, 3]], [[]]], 2)
+    ([1, 2, 3], [array([0, 2, 3]), array([0, 1, 3, 3])])
+    """
+    offsets = []
+
+    for _ in range(depth):
+        if not all(isinstance(value, (list, tuple)) for value in values):
+            raise TypeError("Values are not nested as deep as expected.")
+
+        offsets.append(np.cumsum([0] + [len(value) for value in values], dtype=np.int64))
+        values = [item for value in values for item in value]
+
+    return values, offsets
+
+
+def unpack_nested(leaves, offsets):
+    """
+    Reconstructs nested lists from their leaves and offsets, see :py:func:`pack_nested`.
+
+    :param leaves: list of leaves
+    :param offsets: offsets of each nesting level
+    :return: list of nested lists
+
+    >>> unpack_nested([1, 2, 3], [np.array([0, 2, 3]), np.array([0, 1, 3, 3])])
+    [[[1], [2, 3]], [[]]]
+    """
+    for offset in reversed(offsets):
+        offset = offset.tolist()
+        leaves = [leaves[begin:end] for begin, end in zip(offset[:-1], offset[1:])]
+
+    return leaves
+
+
+class PackedImages(object):
+    """
+    Columnar representation of flattened images, *e.g.* of all timepoints of one position.
+    Attributes listed in :py:data:`column_attributes` are stored as contiguous arrays in :py:attr:`columns`
+    (named '<attribute>.values', '<attribute>.shapes' for array leaves and '<attribute>.offsets<level>'),
+    all remaining (scalar) attributes are kept per image. Attributes whose leaves are not uniformly typed
+    are kept per image as well.
+
+    :param images: dictionary mapping timepoints to flattened images
+
+    >>> class Frame(object):
+    ...     pass
+    >>> frame = Frame()
+    >>> frame.channels_left, frame.channels_cells_local_top, frame.tag = [1.0, 2.0], [[3.0], []], 'a'
+    >>> packed = PackedImages({5: frame})
+    >>> sorted(packed.columns.keys())
+    ['channels_cells_local_top.offsets0', 'channels_cells_local_top.offsets1', 'channels_cells_local_top.values', \
+'channels_left.offsets0', 'channels_left.values']
+    >>> image = packed.unpack()[5]
+    >>> image.channels_left, image.channels_cells_local_top, image.tag
+    ([1.0, 2.0], [[3.0], []], 'a')
+    """
+
+    def __init__(self, images):
+        self.timepoints = sorted(images.keys())
+
+        images = [images[t] for t in self.timepoints]
+
+        self.classes = [image.__class__ for image in images]
+        self.attributes = [dict(vars(image)) for image in images]
+
+        self.columns = {}
+        # names of the columns whose scalar leaves were native Python types
+        self.native = set()
+
+        for name, depth in column_attributes.items():
+            try:
+                leaves, offsets = pack_nested([attributes[name] for attributes in self.attributes], depth)
+            except (KeyError, TypeError):
+                continue
+
+            if not self.pack_leaves(name, leaves):
+                continue
+
+            for level, offset in enumerate(offsets):
+                self.columns['%s.offsets%d' % (name, level)] = offset
+
+            for attributes in self.attributes:
+                del attributes[name]
+
+    def __len__(self):
+        return len(self.timepoints)
+
+    def pack_leaves(self, name, leaves):
+        """
+        Stores the leaves of a column as contiguous array.
+
+        :param name: attribute name
+        :param leaves: list of leaves
+        :return: whether the leaves could be stored, *i.e.* were uniformly typed
+        """
+        if len(leaves) > 0 and all(isinstance(leaf, np.ndarray) for leaf in leaves):
+            dtype, ndim = leaves[0].dtype, leaves[0].ndim
+
+            if any(leaf.dtype != dtype or leaf.ndim != ndim for leaf in leaves):
+                return False
+
+            self.columns[name + '.values'] = np.concatenate([leaf.ravel() for leaf in leaves])
+            self.columns[name + '.shapes'] = np.array([leaf.shape for leaf in leaves], dtype=np.int64)
+            return True
+
+        types = set(type(leaf) for leaf in leaves)
+
+        if len(types) > 1 or not all(issubclass(t, (bool, int, float, np.number, np.bool_)) for t in types):
+            return False
+
+        if len(types) == 0 or types.pop() in (bool, int, float):
+            self.native.add(name)
+
+        self.columns[name + '.values'] = np.array(leaves)
+        return True
+
+    def image_arrays(self):
+        """
+        Returns the contiguous arrays of the columns whose leaves are arrays (*i.e.* the channel images),
+        *e.g.* to be stored separately from the remaining data.
+
+        :return: list of arrays
+        """
+        return [self.columns[name[:-len('.shapes')] + '.values'] for name in sorted(self.columns.keys())
+                if name.endswith('.shapes')]
+
+    def unpack_leaves(self, name):
+        """
+        Returns the leaves of a column.
+
+        :param name: attribute name
+        :return: list of leaves
+        """
+        values = self.columns[name + '.values']
+
+        if name + '.shapes' in self.columns:
+            shapes = self.columns[name + '.shapes']
+            ends = np.cumsum(np.prod(shapes, axis=1))
+            begins = ends - np.prod(shapes, axis=1)
+            return [values[begin:end].reshape(shape)
+                    for begin, end, shape in zip(begins.tolist(), ends.tolist(), shapes.tolist())]
+        elif name in self.native:
+            return values.tolist()
+        else:
+            return list(values)
+
+    def unpack(self, timepoints=None):
+        """
+        Reconstructs the flattened images.
+
+        :param timepoints: timepoints to reconstruct, all if None
+        :return: dictionary mapping timepoints to flattened images
+        """
+        names = [name for name in column_attributes.keys() if name + '.values' in self.columns]
+
+        columns = {}
+
+        for name in names:
+            offsets = []
+            while '%s.offsets%d' % (name, len(offsets)) in self.columns:
+                offsets.append(self.columns['%s.offsets%d' % (name, len(offsets))])
+            columns[name] = unpack_nested(self.unpack_leaves(name), offsets)
+
+        images = {}
+
+        for n, t in enumerate(self.timepoints):
+            if timepoints is not None and t not in timepoints:
+                continue
+
+            image = self.classes[n].__new__(self.classes[n])
+            image.__dict__.update(self.attributes[n])
+
+            for name in names:
+                image.__dict__[name] = columns[name][n]
+
+            images[t] = image
+
+        return images
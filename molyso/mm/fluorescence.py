@@ -12,6 +12,7 @@ from .cell_detection import Cell, Cells
 from .channel_detection import Channel, Channels
 from ..generic.rotation import apply_rotate_and_cleanup
 from ..generic.signal import fit_to_type
+from ..generic.precision import processing_type
 
 
 class FluorescentCell(Cell):
@@ -161,14 +162,15 @@ class FluorescentImage(Image):
 
         self.background_fluorescences.append(0.0)
 
-    def autorotate(self):
+    def autorotate(self, region=None):
         """
         Rotates the image, as well as the fluorescence channels.
 
+        :param region: None, or a (top, bottom) pair of rows of the rotated images, only these are computed
         """
-        super(FluorescentImage, self).autorotate()
+        super(FluorescentImage, self).autorotate(region=region)
         self.image_fluorescences = [
-            apply_rotate_and_cleanup(fluorescence_image, self.angle)[0]
+            apply_rotate_and_cleanup(fluorescence_image, self.angle, rows=region)[0]
             for fluorescence_image in self.image_fluorescences]
 
     def clean(self):
@@ -199,7 +201,7 @@ class FluorescentImage(Image):
 
                 fluorescence_image = self.image_fluorescences[i]
 
-                background_fluorescence_means = np.zeros((len(self.channels) - 1, 2), dtype=np.float64)
+                background_fluorescence_means = np.zeros((len(self.channels) - 1, 2), dtype=processing_type())
 
                 channel_iterator = iter(self.channels)
 
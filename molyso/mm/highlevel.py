@@ -5,18 +5,24 @@ documentation
 
 from __future__ import division, unicode_literals, print_function
 
-from .. import __citation__
+from .. import __citation__, __version__
 
 import argparse
 import sys
 import os
-import itertools
 import codecs
 import json
+import hashlib
+import copy
+import glob
 import multiprocessing
 import traceback
 import logging
 import platform
+import collections
+import queue
+import threading
+import time
 
 import numpy as np
 
@@ -31,14 +37,22 @@ from ..debugging.callserialization import CallSerialization
 from ..generic.tunable import TunableManager, tunable
 
 from ..generic.etc import correct_windows_signal_handlers, debug_init, QuickTableDumper, \
-    silent_progress_bar, fancy_progress_bar, bits_to_numpy_type
+    silent_progress_bar, fancy_progress_bar, bits_to_numpy_type, Prefetcher, time_limit, time_limit_available, \
+    parse_cache_codec
 
-from ..generic.etc import Sqlite3Cache as Cache
+from ..generic.etc import Sqlite3Cache as Cache, cache_files, prune_cache
+from ..generic.shared_memory import SharedMemoryRing
+from ..generic.executor import create_executor, executors, in_process_executors, unlimited_executors
+from ..generic.registration import registration_quality
+from ..generic.fft import set_fft_backend, parse_fft_backend, set_real_transforms
+from ..generic.precision import set_precision, precisions
 
 from .image import Image
-from .fluorescence import FluorescentImage
+from .fluorescence import FluorescentImage, FluorescentChannel
+from .columnar import PackedImages
 
-from .tracking import TrackedPosition, analyze_tracking, plot_timeline, tracker_to_cell_list
+from .tracking import TrackedPosition, analyze_tracking, plot_timeline, tracker_to_cell_list, \
+    reset_object_unique_ids
 
 from .highlevel_interactive_viewer import interactive_main
 from .highlevel_interactive_ground_truth import interactive_ground_truth_main
@@ -105,7 +119,8 @@ def create_argparser():
 
     :return:
     """
-    argparser = argparse.ArgumentParser(description="molyso: MOther machine anaLYsis SOftware")
+    argparser = argparse.ArgumentParser(description="molyso: MOther machine anaLYsis SOftware",
+                                        fromfile_prefix_chars='@')
 
     def _error(message=''):
         print(banner())
@@ -115,7 +130,8 @@ def create_argparser():
 
     argparser.error = _error
 
-    argparser.add_argument('input', metavar='input', type=str, help="input file")
+    argparser.add_argument('input', metavar='input', type=str, nargs='+',
+                           help="input file(s), glob patterns are expanded, @file reads arguments from file")
     argparser.add_argument('-m', '--module', dest='modules', type=str, default=None, action='append')
     argparser.add_argument('-p', '--process', dest='process', default=False, action='store_true')
     argparser.add_argument('-gt', '--ground-truth', dest='ground_truth', type=str, default=None)
@@ -123,6 +139,7 @@ def create_argparser():
     argparser.add_argument('-ct', '--cache-token', dest='cache_token', type=str, default=None)
     argparser.add_argument('-tp', '--timepoints', dest='timepoints', default='0-', type=str)
     argparser.add_argument('-mp', '--multipoints', dest='multipoints', default='0-', type=str)
+    argparser.add_argument('-sh', '--shard', dest='shard', default=None, type=str)
     argparser.add_argument('-o', '--table-output', dest='table_output', type=str, default=None)
     argparser.add_argument('--meta', '--meta', dest='meta', type=str, default=None)
     argparser.add_argument('-ot', '--output-tracking', dest='tracking_output', type=str, default=None)
@@ -130,8 +147,19 @@ def create_argparser():
                            type=list, default=None, action='append')
     argparser.add_argument('-nb', '--no-banner', dest='nb', default=False, action='store_true')
     argparser.add_argument('-cpu', '--cpus', dest='mp', default=-1, type=int)
+    argparser.add_argument('-ex', '--executor', dest='executor', default='process', type=str)
+    argparser.add_argument('-fb', '--fft-backend', dest='fft_backend', default='numpy', type=str,
+                           help="FFT backend[:workers], numpy (default), scipy, pyfftw or auto (the fastest "
+                                "available); results of other backends than numpy may differ slightly")
+    argparser.add_argument('-rfft', '--real-transforms', dest='real_transforms', default=False, action='store_true',
+                           help="compute phase correlations by real FFTs, which is faster, but results may "
+                                "differ slightly")
+    argparser.add_argument('-pr', '--precision', dest='precision', default='float64', type=str,
+                           choices=sorted(precisions.keys()))
     argparser.add_argument('-debug', '--debug', dest='debug', default=False, action='store_true')
     argparser.add_argument('-do', '--detect-once', dest='detect_once', default=False, action='store_true')
+    argparser.add_argument('-ri', '--rotation-interval', dest='rotation_interval', default=0, type=int)
+    argparser.add_argument('-cr', '--channel-region', dest='channel_region', default=False, action='store_true')
     argparser.add_argument('-nci', '--no-channel-images', dest='keepchan', default=True, action='store_false')
     argparser.add_argument('-cfi', '--channel-fluorescence-images', dest='keepfluorchan',
                            default=False, action='store_true')
@@ -142,6 +170,28 @@ def create_argparser():
     argparser.add_argument('-q', '--quiet', dest='quiet', default=False, action='store_true')
     argparser.add_argument('-nc', '--no-cache', dest='ignorecache', default='nothing',
                            const='everything', type=str, nargs='?')
+    argparser.add_argument('-cc', '--cache-codec', dest='cache_codec', default='zlib:1', type=str)
+    argparser.add_argument('-cd', '--cache-directory', dest='cache_directory', default=None, type=str)
+    argparser.add_argument('-cs', '--cache-size', dest='cache_size', default=0, type=int)
+    argparser.add_argument('-shm', '--shared-memory-slots', dest='shared_memory_slots', default=0, type=int,
+                           help="read frames in one process and deliver them to the workers via this count of "
+                                "shared memory slots, the positions' first frames (and with -ri the rotation "
+                                "reference frames) are kept in additional slots (single input only, not with -f)")
+    argparser.add_argument('-cl', '--chunk-length', dest='chunk_length', default=16, type=int,
+                           help="maximum count of frames of a position a worker analyzes as one task, "
+                                "their results are checkpointed once the task is finished")
+    argparser.add_argument('-pl', '--pipeline', dest='pipeline', default=False, action='store_true')
+    argparser.add_argument('-pf', '--prefetch', dest='prefetch', default=2, type=int)
+    argparser.add_argument('-mtc', '--max-tasks-per-child', dest='max_tasks_per_child', default=0, type=int)
+    argparser.add_argument('-to', '--frame-timeout', dest='frame_timeout', default=0.0, type=float,
+                           help="time limit per frame in seconds, frames exceeding it fail; relies on SIGALRM, "
+                                "hence it is not enforced on Windows or with the thread executor, and native code "
+                                "(e.g. OpenCV or FFT calls) is only interrupted once it returns")
+    argparser.add_argument('-mb', '--memory-budget', dest='memory_budget', default=0, type=int)
+    argparser.add_argument('-f', '--follow', dest='follow', default=False, action='store_true',
+                           help="follow a growing file while it is acquired (single input only)")
+    argparser.add_argument('-fi', '--follow-interval', dest='follow_interval', default=10.0, type=float)
+    argparser.add_argument('-ft', '--follow-timeout', dest='follow_timeout', default=300.0, type=float)
     argparser.add_argument('-nt', '--no-tracking', dest='no_tracking', default=False, action='store_true')
     argparser.add_argument('-t', '--tunables', dest='tunables', type=str, default=None)
     argparser.add_argument('-s', '--set-tunable', dest='tunable_list',
@@ -153,6 +203,136 @@ def create_argparser():
     return argparser
 
 
+def parse_shard(shard):
+    """
+    Parses a shard specification "i/N", *i.e.* shard i (counting from 0) of N shards.
+
+    :param shard: shard specification
+    :return: tuple (i, N)
+
+    >>> parse_shard('1/4')
+    (1, 4)
+    >>> parse_shard('4/4')
+    Traceback (most recent call last):
+    ...
+    ValueError: Invalid shard "4/4", expected i/N with 0 <= i < N.
+    """
+    try:
+        index, count = (int(part) for part in shard.split('/'))
+    except ValueError:
+        index, count = -1, 0
+
+    if not 0 <= index < count:
+        raise ValueError("Invalid shard \"%s\", expected i/N with 0 <= i < N." % (shard,))
+
+    return index, count
+
+
+def shard_positions(positions, index, count):
+    """
+    Deterministically selects the positions of one shard, positions are distributed round-robin.
+
+    :param positions: list of positions
+    :param index: shard index
+    :param count: shard count
+    :return: list of the shard's positions
+
+    >>> shard_positions([0, 1, 2, 3, 4], 1, 2)
+    [1, 3]
+    """
+    return [pos for n, pos in enumerate(positions) if n % count == index]
+
+
+def shard_cache_token(args, index, count):
+    """
+    Returns the cache token of a shard, so that the shards of one input do not share their cache.
+
+    :param args:
+    :param index: shard index
+    :param count: shard count
+    :return: cache token
+    """
+    return "%s.shard_%d_of_%d" % (
+        args.cache_token if args.cache_token is not None else Cache.default_cache_token(args.input), index, count)
+
+
+# prefixes of tunables which only affect tracking, or only the graphical output
+tracking_tunable_prefixes = ('tracking.',)
+output_tunable_prefixes = ('colors.',)
+
+
+def input_identity(filename):
+    """
+    Returns the identity of an input file, *i.e.* its absolute path and acquisition metadata: the sizes of the
+    image stack besides its count of timepoints, and a digest of its first frame. It does not change while the
+    acquisition grows, hence results cached while following it (-f) are reused by later runs on the finished file.
+
+    :param filename: input file
+    :return: tuple
+    """
+    try:
+        stack = open_image_stack(filename)
+        first = np.ascontiguousarray(stack[0, 0, 0])
+    except Exception:
+        # e.g. a followed acquisition whose first frame was not written yet
+        return os.path.abspath(filename),
+
+    return (os.path.abspath(filename),
+            sorted((dimension.char, size) for dimension, size in stack.size.items() if dimension != Dimensions.Time),
+            first.shape, first.dtype.name, hashlib.sha1(first.tobytes()).hexdigest())
+
+
+def cache_stage_digests(args, tunables=None):
+    """
+    Returns digests of everything the cached results of each stage depend on: the identity of the input,
+    the molyso version, the relevant options and the overridden tunables. Cached results are only used if
+    the digest of their stage is unchanged.
+
+    :param args:
+    :param tunables: overridden tunables, by default those currently set
+    :return: dictionary mapping stage names to digests
+
+    >>> class Args(object):
+    ...     input, keepchan, keepfluorchan, detect_once, modules = 'x.tif', True, False, False, None
+    ...     rotation_interval, channel_region, precision, real_transforms = 0, False, 'float64', False
+    ...     channel_bits, channel_fluorescence_bits = np.uint8, np.float32
+    >>> one = cache_stage_digests(Args(), {'tracking.empty_channel_filtering.minimum_mean_cells': 1.0})
+    >>> other = cache_stage_digests(Args(), {'tracking.empty_channel_filtering.minimum_mean_cells': 2.0})
+    >>> one['imageanalysis'] == other['imageanalysis'], one['tracking'] == other['tracking']
+    (True, False)
+    """
+    if tunables is None:
+        tunables = TunableManager.current
+
+    def _digest(*parts):
+        return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+    def _tunables(prefixes, include):
+        return sorted((k, repr(v)) for k, v in tunables.items()
+                      if k.startswith(prefixes) == include and not k.startswith(output_tunable_prefixes))
+
+    imageanalysis = _digest(
+        __version__,
+        input_identity(args.input),
+        _tunables(tracking_tunable_prefixes, False),
+        args.keepchan, args.keepfluorchan,
+        np.dtype(args.channel_bits).name, np.dtype(args.channel_fluorescence_bits).name,
+        args.detect_once,
+        args.rotation_interval if not args.detect_once else 0,
+        args.channel_region,
+        args.precision,
+        args.real_transforms,
+        args.modules
+    )
+
+    tracking = _digest(
+        imageanalysis,
+        _tunables(tracking_tunable_prefixes, True)
+    )
+
+    return {'imageanalysis': imageanalysis, 'tracking': tracking}
+
+
 def setup_image(i, local_ims, t, pos):
     """
 
@@ -201,13 +381,277 @@ def setup_image(i, local_ims, t, pos):
     i.metadata['tag_number'] = 0
 
 
+def open_image_stack(filename):
+    """
+    Opens the input file as image stack view, as used for processing.
+
+    :param filename: input file name
+    :return: image stack view (position, time, channel)
+    """
+    return ImageStack(filename).view(Dimensions.PositionXY, Dimensions.Time, Dimensions.Channel).filter(FloatFilter)
+
+
+class FrameSource(object):
+    """
+    Stand-in for the image stack view, serving frames obtained by other means than reading them in place.
+    The delivered frames are served from their local copies, all other frames are read from the
+    (lazily opened) image stack itself.
+
+    :param filename: input file name
+    :param size: size of the image stack view
+    :param stack: already opened image stack view, optional
+    """
+    def __init__(self, filename, size, stack=None):
+        self.filename = filename
+        self.size = size
+
+        self.stack = stack
+
+        # (pos, t) -> (data, meta)
+        self.frames = {}
+
+        source = self
+
+        class _MetaAccess(object):
+            def __getitem__(self, item):
+                pos, t, _ = item
+                if source.has_frame(pos, t):
+                    return source.frames[pos, t][1]
+                else:
+                    return source.get_stack().meta[item]
+
+        self.meta = _MetaAccess()
+
+    def get_stack(self):
+        """
+        Returns the image stack, opening it if necessary.
+
+        :return: image stack view
+        """
+        if self.stack is None:
+            self.stack = open_image_stack(self.filename)
+        return self.stack
+
+    def deliver(self, pos, t, data, meta):
+        """
+        Adds a frame to the delivered ones.
+
+        :param pos: position
+        :param t: timepoint
+        :param data: array (or list) of all channels of the frame
+        :param meta: frame metadata
+        """
+        self.frames[pos, t] = (data, meta)
+
+    def release(self):
+        """
+        Discards all delivered frames.
+
+        """
+        self.frames = {}
+
+    def fetch(self, pos, t):
+        """
+        Hook to obtain a frame which was not delivered. Returns (data, meta) or None.
+
+        :param pos: position
+        :param t: timepoint
+        :return: None
+        """
+        return None
+
+    def has_frame(self, pos, t):
+        """
+        Checks whether (pos, t) was delivered, fetching it if possible. A fetched frame replaces
+        the delivered ones.
+
+        :param pos: position
+        :param t: timepoint
+        :return: True if the frame is available locally
+        """
+        if (pos, t) in self.frames:
+            return True
+
+        fetched = self.fetch(pos, t)
+
+        if fetched is None:
+            return False
+
+        self.release()
+        self.deliver(pos, t, *fetched)
+        return True
+
+    def __getitem__(self, item):
+        pos, t, channel = item
+        if self.has_frame(pos, t):
+            return self.frames[pos, t][0][channel]
+        else:
+            return self.get_stack()[item]
+
+
+class SharedMemoryFrameSource(FrameSource):
+    """
+    Frame source for workers which receive their frames via a :py:class:`SharedMemoryRing`,
+    the frames of a task are passed by :py:meth:`FrameSource.deliver`.
+    """
+
+
+class ThreadLocalFrameSource(FrameSource):
+    """
+    Frame source opening one image stack per thread, for executors running multiple workers within
+    one process (*i.e.* threads), as readers are not necessarily thread-safe.
+    """
+    def __init__(self, filename, size):
+        super(ThreadLocalFrameSource, self).__init__(filename, size)
+
+        self.local = threading.local()
+
+    def get_stack(self):
+        if getattr(self.local, 'stack', None) is None:
+            self.local.stack = open_image_stack(self.filename)
+        return self.local.stack
+
+
+def read_frame(local_ims, pos, t):
+    """
+    Reads all channels and the metadata of a frame.
+
+    :param local_ims: image stack view
+    :param pos: position
+    :param t: timepoint
+    :return: (list of channel images, metadata)
+    """
+    return [local_ims[pos, t, channel] for channel in range(local_ims.size[Dimensions.Channel])], \
+        local_ims.meta[pos, t, 0]
+
+
+class PrefetchingFrameSource(FrameSource):
+    """
+    Frame source reading the next frames ahead in a background thread, while the current one is processed.
+    The background thread uses its own image stack, as readers are not necessarily thread-safe.
+
+    :param filename: input file name
+    :param stack: already opened image stack view, used for all frames read directly
+    :param depth: count of frames to read ahead
+    """
+    def __init__(self, filename, stack, depth=2):
+        super(PrefetchingFrameSource, self).__init__(filename, stack.size, stack=stack)
+
+        self.prefetch_stack = None
+
+        self.prefetcher = Prefetcher(self.read, depth=depth)
+
+    def read(self, key):
+        """
+        Reads a frame, called from the background thread.
+
+        :param key: (pos, t) tuple
+        :return: (list of channel images, metadata)
+        """
+        if self.prefetch_stack is None:
+            self.prefetch_stack = open_image_stack(self.filename)
+
+        pos, t = key
+        return read_frame(self.prefetch_stack, pos, t)
+
+    def prefetch(self, keys):
+        """
+        Sets the frames to read ahead, in the order they will be requested.
+
+        :param keys: iterable of (pos, t) tuples
+        """
+        self.prefetcher.prefetch(keys)
+
+    def fetch(self, pos, t):
+        return self.prefetcher.get((pos, t))
+
+    def close(self):
+        """
+        Stops reading ahead, and releases the background thread's image stack and the read frames.
+
+        """
+        self.prefetcher.close()
+        self.prefetch_stack = None
+        self.release()
+
+
+def shared_memory_reader(filename, blocks, ring, reference_ring, ready):
+    """
+    Reads the frames of each block in acquisition order (by timepoint, then position), puts them into the shared
+    memory rings and announces the block's chunks via the ready queue, once all of its frames are read.
+    Every frame is read only once: Reference frames, *i.e.* frames needed by multiple chunks (the positions' first
+    frames and with -ri the frames the rotation is re-estimated at), are pinned in the reference ring, until the
+    last chunk needing them was taken up by a worker. The end is signalled by putting None.
+
+    :param filename: input file name
+    :param blocks: list of blocks, lists of (pos, timepoints, references) tuples, see :py:func:`shared_memory_blocks`
+    :param ring: SharedMemoryRing for the frames only needed by one chunk
+    :param reference_ring: SharedMemoryRing for the reference frames
+    :param ready: queue receiving (pos, timepoints, frames) tuples, frames being a list of
+                  (t, slot, meta, pinned) tuples, or (t, None, error, pinned) if reading failed,
+                  timepoints being None for the position's first frame
+    """
+    local_ims = open_image_stack(filename)
+    channels = local_ims.size[Dimensions.Channel]
+
+    users = collections.Counter((pos, t) for block in blocks for pos, _, references in block for t in references)
+
+    pinned = {}
+
+    for block in blocks:
+        keys = set()
+        for pos, timepoints, references in block:
+            keys |= set((pos, t) for t in timepoints or ())
+            keys |= set((pos, t) for t in references if (pos, t) not in pinned)
+
+        frames = {}
+
+        for pos, t in sorted(keys, key=lambda key: (key[1], key[0])):
+            try:
+                data, meta = read_frame(local_ims, pos, t)
+            except Exception as e:
+                (pinned if (pos, t) in users else frames)[pos, t] = (None, (str(e), traceback.format_exc()))
+                continue
+
+            target = reference_ring if (pos, t) in users else ring
+
+            slot = target.acquire()
+            frame = target.slot(slot)
+            for channel in range(channels):
+                frame[channel] = data[channel]
+            del frame
+
+            if (pos, t) in users:
+                target.pin(slot, users[pos, t])
+                pinned[pos, t] = (slot, meta)
+            else:
+                frames[pos, t] = (slot, meta)
+
+        for pos, timepoints, references in block:
+            ready.put((pos, timepoints,
+                       [(t,) + pinned[pos, t] + (True,) for t in references] +
+                       [(t,) + frames[pos, t] + (False,) for t in timepoints or () if t not in references]))
+
+    ready.put(None)
+    ring.close()
+    reference_ring.close()
+
+
 # globals
 
 ims = None
 
+frame_ring = None
+reference_frame_ring = None
+
 first_frame_cache = {}
 first_to_look_at = 0
 
+# angles of the frames the rotation is re-estimated at, by (pos, t)
+rotation_reference_cache = {}
+
+current_input = None
+
 
 def check_or_get_first_frame(pos, args):
     """
@@ -221,34 +665,108 @@ def check_or_get_first_frame(pos, args):
     if pos in first_frame_cache:
         return first_frame_cache[pos]
     else:
-        if ims.size[Dimensions.Channel] > 1:
-            image = FluorescentImage()
-        else:
-            image = Image()
+        image = analyze_first_frame(pos, args)
+
+        first_frame_cache[pos] = image
+
+        return image
 
-        setup_image(image, ims, first_to_look_at, pos)
 
-        image.autorotate()
-        image.autoregistration(image)
+def analyze_first_frame(pos, args):
+    """
+    Analyzes the first frame of a position, which the further frames of the position are registered to.
+    Only what the analysis of the further frames needs (see :py:func:`processing_frame`) is kept,
+    the image data is dropped, so that the result is cheap to pass to the workers.
 
-        if args.detect_once:
-            from .channel_detection import find_channels
+    :param pos: position
+    :param args:
+    :return: image
+    """
+    if ims.size[Dimensions.Channel] > 1:
+        image = FluorescentImage()
+    else:
+        image = Image()
 
-            def _find_channels(im):
-                image._find_channels_positions = find_channels(im)
-                # noinspection PyProtectedMember
-                return image._find_channels_positions
+    setup_image(image, ims, first_to_look_at, pos)
 
-            image.find_channels_function = _find_channels
+    image.autorotate()
+    image.autoregistration(image)
 
-        image.find_channels()
+    if args.detect_once:
+        from .channel_detection import find_channels
 
-        if args.detect_once:
-            delattr(image, 'find_channels_function')
+        def _find_channels(im):
+            image._find_channels_positions = find_channels(im)
+            # noinspection PyProtectedMember
+            return image._find_channels_positions
 
-        first_frame_cache[pos] = image
+        image.find_channels_function = _find_channels
 
-        return image
+    image.find_channels()
+
+    if args.detect_once:
+        delattr(image, 'find_channels_function')
+
+    image.rotated_height = image.image.shape[0]
+
+    image.image = None
+    image.original_image = None
+
+    if type(image) == FluorescentImage:
+        fluorescences_count = len(image.image_fluorescences)
+        image.image_fluorescences = [None] * fluorescences_count
+        image.original_image_fluorescences = [None] * fluorescences_count
+
+    for channel in image.channels:
+        channel.channel_image = None
+
+        if type(channel) == FluorescentChannel:
+            channel.fluorescences_channel_image = [None] * len(channel.fluorescences_channel_image)
+
+    return image
+
+
+def rotation_reference_timepoint(t, first, interval):
+    """
+    Returns the timepoint the rotation angle of frame t is taken from (with -ri N).
+
+    :param t: timepoint
+    :param first: first timepoint to look at
+    :param interval: rotation interval
+    :return: timepoint
+
+    >>> [rotation_reference_timepoint(t, 1, 3) for t in range(1, 8)]
+    [1, 1, 1, 4, 4, 4, 7]
+    """
+    return first + ((t - first) // interval) * interval
+
+
+def reference_rotation(args, t, pos, first):
+    """
+    Returns the rotation angle frame t of a position reuses (with -ri N), *i.e.* the angle detected at the last
+    timepoint re-estimated at (every N frames, counting from the first frame). It only depends on the timepoint,
+    not on which frames a worker processed before. NaN is returned if t is such a timepoint itself.
+
+    :param args:
+    :param t:
+    :param pos:
+    :param first: the position's first frame
+    :return: angle
+    """
+    reference = rotation_reference_timepoint(t, first_to_look_at, args.rotation_interval)
+
+    if reference == t:
+        return float('NaN')
+
+    if reference == first_to_look_at:
+        return first.angle
+
+    if (pos, reference) not in rotation_reference_cache:
+        image = Image()
+        setup_image(image, ims, reference, pos)
+        rotation_reference_cache[pos, reference] = image.detect_rotation()
+
+    return rotation_reference_cache[pos, reference]
 
 
 def processing_frame(args, t, pos, clean=True):
@@ -260,9 +778,19 @@ def processing_frame(args, t, pos, clean=True):
     :param clean:
     :return:
     """
+    global ims
+
+    if t >= ims.size[Dimensions.Time] and not isinstance(ims, FrameSource):
+        # the file has grown since it was opened (live acquisition)
+        ims = open_image_stack(args.input)
 
     first = check_or_get_first_frame(pos, args)
 
+    reused_angle = float('NaN')
+
+    if args.rotation_interval > 0 and not args.detect_once:
+        reused_angle = reference_rotation(args, t, pos, first)
+
     if ims.size[Dimensions.Channel] > 1:
         image = FluorescentImage()
     else:
@@ -281,9 +809,44 @@ def processing_frame(args, t, pos, clean=True):
 
     if args.detect_once:
         image.angle = first.angle
+    elif reused_angle == reused_angle:
+        minimum_quality = tunable(
+            'orientation-detection.reuse.minimum-registration-quality', 0.95,
+            description="When reusing the rotation angle (-ri), it is detected anew for frames registering worse "
+                        "with the position's first frame.")
 
-    image.autorotate()
-    image.autoregistration(first)
+        if registration_quality(first.fft_pair, image.fft_pair) >= minimum_quality:
+            image.angle = reused_angle
+    elif args.rotation_interval > 0:
+        # the angle is detected, and kept for the following frames of this worker
+        image.angle = image.detect_rotation()
+        rotation_reference_cache[pos, t] = image.angle
+
+    region = None
+
+    # the recursive vertical channel detection requires the whole rotated image
+    if args.channel_region and tunable('channels.vertical.method', 'alternate') == 'alternate':
+        # the frame's shift places the first frame's channel region within this frame
+        if image.angle != image.angle:
+            image.angle = image.detect_rotation()
+
+        image.autoregistration(first)
+
+        # the padding is counted in slices of the vertical channel detection, as the slices at the borders of the
+        # channel region need to be rotated completely to be detected as in the whole image
+        slice_height = first.rotated_height // tunable('channels.vertical.alternate.split_factor', 60)
+
+        region = first.channel_region(
+            image.shift,
+            padding=slice_height * tunable(
+                'channels.region.padding', 4,
+                description="With -cr, count of slices (of the vertical channel detection) around the first frame's "
+                            "channels which are rotated."))
+
+    image.autorotate(region)
+
+    if region is None:
+        image.autoregistration(first)
 
     if args.detect_once:
         from ..generic.registration import shift_image
@@ -301,10 +864,18 @@ def processing_frame(args, t, pos, clean=True):
             return first._find_channels_positions
 
         image.find_channels_function = _find_channels_function
+    elif region is not None:
+        from .channel_detection import find_channels
+
+        # channels are detected as usual, but only within the rotated rows
+        def _find_channels_function(im):
+            return find_channels(im, rows=region)
+
+        image.find_channels_function = _find_channels_function
 
     image.find_channels()
 
-    if args.detect_once:
+    if hasattr(image, 'find_channels_function'):
         delattr(image, 'find_channels_function')
 
     image.find_cells_in_channels()
@@ -318,355 +889,1837 @@ def processing_frame(args, t, pos, clean=True):
     return image
 
 
-def setup_tunables(args, log=None):
-    # load tunables
-    if args.read_tunables:
-        with open(args.read_tunables, 'r') as tunable_file:
-            tunables = json.load(tunable_file)
-            if log:
-                log.info("Loaded tunable file \"%(filename)s\" with data: %(data)s" %
-                         {'filename': args.read_tunables, 'data': repr(tunables)})
-            TunableManager.load_tunables(tunables)
+def select_input(args):
+    """
+    Switches the per input globals, if a worker gets passed a frame of another input than before
+    (*i.e.* if the pool is shared between multiple inputs).
 
-    if args.tunables:
-        tunables = json.loads(args.tunables)
-        if log:
-            log.info("Loaded command line tunables: %(data)s" % {'data': repr(tunables)})
-        TunableManager.load_tunables(tunables)
+    :param args: arguments, args.input being the input file
+    """
+    global ims
+    global first_frame_cache
+    global first_to_look_at
+    global current_input
 
-    if args.tunable_list:
-        tunables = {}
-        for k, v in args.tunable_list:
-            tunables[''.join(k)] = ''.join(v)
-        if log:
-            log.info("Loaded command line tunables: %(data)s" % {'data': repr(tunables)})
-        TunableManager.load_tunables(tunables)
+    if args.input == current_input:
+        return
 
+    ims = open_image_stack(args.input)
+    first_frame_cache = {}
+    rotation_reference_cache.clear()
+    first_to_look_at = args.timepoints[0]
 
-def setup_modules(modules):
+    current_input = args.input
+
+
+def processing_frame_task(task):
     """
+    Wrapper around :py:func:`processing_frame` to be used with the pool's map functions.
+    Exceptions are caught within the worker and returned, so that a single failing frame
+    neither aborts the remaining ones nor loses its traceback. Frames taking longer than
+    args.frame_timeout fail as well.
 
-    :param modules:
+    :param task: tuple of (args, t, pos)
+    :return: tuple of (t, pos, result, error), error being None or a tuple of (message, traceback)
     """
-    import importlib
-    for module in modules:
-        try:
-            importlib.import_module("molyso_%s" % module)
-        except ImportError:
-            try:
-                importlib.import_module(module)
-            except ImportError:
-                print("WARNING: Could not load either module molyso_%s or %s!" % (module, module,))
+    args, t, pos = task
+    try:
+        select_input(args)
+        with time_limit(args.frame_timeout):
+            return t, pos, processing_frame(args, t, pos), None
+    except Exception as e:
+        return t, pos, None, (str(e), traceback.format_exc())
 
 
-def processing_setup(args):
+def reference_task(task):
     """
+    Analyzes the first frame of a position, see :py:func:`analyze_first_frame`, to be used with the pool.
+    Exceptions are caught, the frames of the position report them (see :py:func:`processing_chunk_task`).
 
-    :param args:
+    :param task: tuple of (args, pos)
+    :return: the analyzed first frame, or None if its analysis failed
     """
-    global ims
-    global first_to_look_at
+    args, pos = task
+    try:
+        select_input(args)
+        with time_limit(args.frame_timeout):
+            return check_or_get_first_frame(pos, args)
+    except Exception:
+        return None
 
-    if args.modules:
-        setup_modules(args.modules)
 
-    setup_tunables(args)
+def processing_chunk_task(task):
+    """
+    Processes a chunk of timepoints of a single position within one worker.
+    The position's first frame is passed along, if it was analyzed already (see :py:func:`position_affine_tasks`),
+    otherwise the worker analyzes it.
 
-    if ims is None:
-        ims = ImageStack(args.input).view(Dimensions.PositionXY, Dimensions.Time, Dimensions.Channel).filter(FloatFilter)
+    :param task: tuple of (args, pos, timepoints, first frame or None)
+    :return: list of (t, pos, result, error) tuples, see :py:func:`processing_frame_task`
+    """
+    args, pos, timepoints, first = task
 
-    if isinstance(args.multipoints, str):
-        args.multipoints = parse_range(args.multipoints, maximum=ims.size[Dimensions.PositionXY])
+    if first is not None:
+        select_input(args)
+        first_frame_cache[pos] = first
 
-    if isinstance(args.timepoints, str):
-        args.timepoints = parse_range(args.timepoints, maximum=ims.size[Dimensions.Time])
+    return [processing_frame_task((args, t, pos)) for t in timepoints]
 
-    first_to_look_at = args.timepoints[0]
 
-    correct_windows_signal_handlers()
+def position_affine_chunks(work, workers, chunks_per_worker=4, max_length=16):
+    """
+    Splits the work into chunks of contiguous timepoints, each chunk belonging to one position only.
+    Positions are only split into multiple chunks if there are too few positions to keep all workers busy,
+    or if they have more than max_length timepoints, so that the results of a chunk (which are only returned
+    once it is finished) are never too far behind. The chunks of a position share its first frame,
+    which is analyzed only once (see :py:func:`position_affine_tasks`).
+
+    :param work: dictionary mapping positions to lists of timepoints to process
+    :param workers: number of workers
+    :param chunks_per_worker: desired number of chunks per worker, to balance the load at the end of processing
+    :param max_length: maximum count of timepoints per chunk
+    :return: list of (pos, timepoints) tuples
+
+    >>> position_affine_chunks({0: [0, 1, 2, 3], 1: [0, 1, 2, 3]}, 2, chunks_per_worker=1)
+    [(0, [0, 1, 2, 3]), (1, [0, 1, 2, 3])]
+    >>> position_affine_chunks({0: [0, 1, 2, 3], 1: [2, 3]}, 2, chunks_per_worker=2)
+    [(0, [0, 1]), (0, [2, 3]), (1, [2]), (1, [3])]
+    >>> position_affine_chunks({0: [0, 1, 2, 3, 4], 1: [0, 1]}, 1, chunks_per_worker=1, max_length=2)
+    [(0, [0, 1]), (0, [2, 3]), (0, [4]), (1, [0, 1])]
+    """
+    work = {pos: list(timepoints) for pos, timepoints in work.items() if len(timepoints) > 0}
 
-    # OpenCV takes a moment and often nags about missing libraries, let's load it at the
-    # beginning so the rest runs smoothly
-    try:
-        # noinspection PyPackageRequirements,PyUnresolvedReferences
-        import cv2
-    except ImportError:
-        pass
+    if len(work) == 0:
+        return []
 
+    chunks_per_position = max(1, -(-(workers * chunks_per_worker) // len(work)))
 
-def main():
-    """
+    chunks = []
 
+    for pos in sorted(work.keys()):
+        timepoints = work[pos]
+        count = min(len(timepoints), max(chunks_per_position, -(-len(timepoints) // max(1, max_length))))
+        boundaries = [-(-len(timepoints) * n // count) for n in range(count + 1)]
+        chunks += [(pos, timepoints[start:stop]) for start, stop in zip(boundaries[:-1], boundaries[1:])]
 
-    :return: :raise:
+    return chunks
+
+
+def position_affine_tasks(args, pool, chunks, references=None):
     """
-    global ims
+    Returns the tasks of :py:func:`processing_chunk_task` for the chunks (see :py:func:`position_affine_chunks`).
+    The first frame of each position is analyzed once, by a task of its own which is handed to the pool right away,
+    and passed along with each chunk of the position. Otherwise, each worker which gets handed a chunk of a position
+    would analyze it anew, as the chunks of a position are spread over all workers.
 
-    argparser = create_argparser()
+    :param args:
+    :param pool: pool
+    :param chunks: list of (pos, timepoints) tuples
+    :param references: dictionary mapping positions to the results of their first frame's analysis, filled,
+                       to be reused by later calls
+    :return: generator of tasks
+    """
+    if references is None:
+        references = {}
 
-    args = argparser.parse_args()
+    for pos, _ in chunks:
+        if pos not in references:
+            references[pos] = pool.apply_async(reference_task, ((args, pos),))
 
-    if args.ground_truth or args.advanced_ground_truth:
-        args.process = True
+    def _tasks():
+        for chunk_pos, timepoints in chunks:
+            yield args, chunk_pos, timepoints, references[chunk_pos].get()
 
-    logging.basicConfig(level=logging.INFO, format="%(asctime)-15s.%(msecs)03d %(name)s %(levelname)s %(message)s",
-                        datefmt='%Y-%m-%d %H:%M:%S')
-    log = logging.getLogger(__name__)
+    return _tasks()
 
-    if args.quiet:  # silence the progress bar filter
-        progress_bar = silent_progress_bar
-        log.setLevel(logging.WARN)
-    else:
-        progress_bar = fancy_progress_bar
 
-    if not args.nb:
-        log.info(banner())
+def bounded_imap(pool, function, tasks, bound):
+    """
+    Like the pool's imap, but tasks are taken from the iterable within the calling thread, and at most bound of
+    them are outstanding at any time. (The pool's own map functions consume the iterable as fast as possible.)
 
-    log.info("Started analysis.")
+    :param pool: pool
+    :param function: function to call with each task
+    :param tasks: iterable of tasks
+    :param bound: maximum count of outstanding tasks
+    """
+    pending = collections.deque()
 
-    if args.modules:
-        setup_modules(args.modules)
+    for task in tasks:
+        if len(pending) >= bound:
+            yield pending.popleft().get()
+        pending.append(pool.apply_async(function, (task,)))
 
-    setup_tunables(args, log)
+    while len(pending) > 0:
+        yield pending.popleft().get()
 
-    if sys.maxsize <= 2 ** 32:
-        log.warning("Warning, running on a 32 bit Python interpreter! This is most likely not what you want,"
-                    "and it will significantly reduce functionality!")
 
-    for hook in Hooks.main:
-        hook(args)
+class Spilled(object):
+    """
+    Placeholder for an image analysis result which is not kept in memory, but only in the cache,
+    either as per frame entry ('imageanalysis', pos, t), or within the columnar entry of its position.
+    """
+    __slots__ = []
+
+
+class MemoryBudget(object):
+    """
+    Keeps track of the (serialized) size of the image analysis results kept in memory. Once the budget is
+    exhausted, further results are only kept in the cache, and replaced by :py:class:`Spilled` placeholders.
+
+    :param cache: cache
+    :param budget: budget in bytes, 0 for unlimited
+    """
+    def __init__(self, cache, budget):
+        self.cache = cache
+        self.budget = budget
+        self.resident = 0
+        # (serialized) size of the results kept in memory, by position
+        self.resident_by_position = collections.Counter()
+
+    def checkpoint(self, results, pos, t, result):
+        """
+        Checkpoints a result into the cache, and keeps it in results if the budget allows.
+
+        :param results: dictionary of positions, mapping timepoints to results
+        :param pos: position
+        :param t: timepoint
+        :param result: image analysis result
+        """
+        size = self.cache.store(('imageanalysis', pos, t), result)
+
+        if self.budget > 0 and size > 0 and self.resident + size > self.budget:
+            results[pos][t] = Spilled()
+        else:
+            results[pos][t] = result
+            self.resident += size
+            self.resident_by_position[pos] += size
+
+    def release(self, results, pos):
+        """
+        Replaces the results of a position by :py:class:`Spilled` placeholders, once they are no longer needed
+        in memory (*e.g.* as the position was packed or tracked already), and frees their share of the budget.
+        If the image analysis cache is disabled, the results are kept, as they could not be loaded again.
+
+        :param results: dictionary of positions, mapping timepoints to results
+        :param pos: position
+        """
+        if self.cache.ignores('imageanalysis'):
+            return
+
+        results[pos] = {t: Spilled() for t in results[pos]}
+
+        self.resident -= self.resident_by_position.pop(pos, 0)
+
+
+def load_position(cache, pos, times):
+    """
+    Returns the timepoints of a position, with spilled results loaded from the cache.
+
+    :param cache: cache
+    :param pos: position
+    :param times: dictionary mapping timepoints to results or :py:class:`Spilled` placeholders
+    :return: dictionary mapping timepoints to results
+    """
+    spilled = set(t for t, result in times.items() if isinstance(result, Spilled))
+
+    if len(spilled) == 0:
+        return times
+
+    frames = {}
+
+    packed = packed_timepoints(cache, pos) & spilled
+
+    if len(packed) > 0:
+        packed_images = cache['imageanalysis', pos]
+        if packed_images is not None:
+            frames = packed_images.unpack(packed)
+
+    return {t: (frames[t] if t in frames else cache['imageanalysis', pos, t]) if t in spilled else result
+            for t, result in times.items()}
+
+
+def packed_timepoints(cache, pos):
+    """
+    Returns the timepoints contained in the columnar entry ('imageanalysis', pos) of a position.
+
+    :param cache: cache
+    :param pos: position
+    :return: set of timepoints
+    """
+    if ('imageanalysis', pos, 'timepoints') not in cache:
+        return set()
+
+    return set(cache['imageanalysis', pos, 'timepoints'] or [])
+
+
+def pack_position(cache, pos, times):
+    """
+    Consolidates the per frame entries of a position into its columnar entry ('imageanalysis', pos),
+    see :py:class:`~molyso.mm.columnar.PackedImages`, which is loaded in bulk. The timepoints contained are
+    stored as ('imageanalysis', pos, 'timepoints'), to be looked up without loading the entry.
+
+    :param cache: cache
+    :param pos: position
+    :param times: dictionary mapping timepoints to results or :py:class:`Spilled` placeholders,
+                  results which are no longer flattened (*e.g.* tracked already) are loaded from the cache
+    """
+    if cache.ignores('imageanalysis'):
+        return
+
+    packed = packed_timepoints(cache, pos)
+
+    frames = {}
+
+    for t, result in times.items():
+        if t in packed:
+            continue
+
+        if isinstance(result, Spilled) or not result.flattened:
+            result = cache['imageanalysis', pos, t]
+
+        if result is not None:
+            frames[t] = result
+
+    if len(frames) == 0:
+        return
+
+    per_frame = list(frames.keys())
+
+    if len(packed) > 0:
+        packed_images = cache['imageanalysis', pos]
+
+        if packed_images is None:
+            # rather keep the per frame entries, than losing the packed ones
+            return
+
+        frames.update(packed_images.unpack())
+
+    packed_images = PackedImages(frames)
+
+    # the channel images are memory-mapped when loaded, and only read if accessed
+    cache.store(('imageanalysis', pos), packed_images, external=packed_images.image_arrays())
+    cache['imageanalysis', pos, 'timepoints'] = sorted(frames.keys())
+
+    for t in per_frame:
+        del cache['imageanalysis', pos, t]
+
+
+def frame_references(args, t):
+    """
+    Returns the timepoints of the frames which are needed to analyze frame t of a position besides itself
+    and the position's first frame (which is analyzed once, see :py:func:`shared_memory_reference_task`),
+    *i.e.* (with -ri) the frame the rotation is re-estimated at, unless it is the first frame.
+
+    :param args: arguments, args.timepoints being parsed already
+    :param t: timepoint
+    :return: set of timepoints
+    """
+    first = args.timepoints[0]
+
+    references = set()
+
+    if args.rotation_interval > 0 and not args.detect_once:
+        references.add(rotation_reference_timepoint(t, first, args.rotation_interval))
+
+    return references - {first}
+
+
+def reference_slots(args, positions):
+    """
+    Returns the count of slots of the reference ring, see :py:func:`shared_memory_reader`. Each position needs
+    one for its first frame, and (with -ri) two for the rotation reference frames, as a block of
+    :py:func:`shared_memory_blocks` spans at most two of them.
+
+    :param args: arguments
+    :param positions: count of positions
+    :return: count of slots
+    """
+    return positions * (3 if args.rotation_interval > 0 and not args.detect_once else 1)
+
+
+def shared_memory_blocks(args, work, slots):
+    """
+    Splits the work into blocks of frames to be read in acquisition order (by timepoint, then position) and
+    delivered via the shared memory rings. Each block's frames, apart from reference frames (see
+    :py:func:`frame_references`), fit into the ring, with -ri a block spans less than the rotation interval.
+    Within a block, each position's frames form chunks of at most args.chunk_length timepoints, which list
+    the reference frames they need (or contain). A position's chunks are preceded by one (pos, None, [first])
+    tuple in the block the position appears first, its first frame is analyzed once and passed along.
+
+    :param args: arguments, args.timepoints being parsed already
+    :param work: dictionary mapping positions to lists of timepoints to process
+    :param slots: number of slots of the ring
+    :return: list of blocks, lists of (pos, timepoints, references) tuples
+    """
+    keys = sorted(((pos, t) for pos, timepoints in work.items() for t in timepoints), key=lambda key: (key[1], key[0]))
+
+    first = args.timepoints[0]
+
+    reference_keys = set((pos, r) for pos, t in keys for r in frame_references(args, t))
+    reference_keys |= set((pos, first) for pos, _ in keys)
+
+    interval = args.rotation_interval if args.rotation_interval > 0 and not args.detect_once else 0
+
+    blocks, block, streamed = [], [], 0
+
+    for pos, t in keys:
+        streaming = (pos, t) not in reference_keys
+
+        if len(block) > 0 and (streamed + streaming > slots or (interval > 0 and t - block[0][1] >= interval)):
+            blocks.append(block)
+            block, streamed = [], 0
+
+        block.append((pos, t))
+        streamed += streaming
+
+    if len(block) > 0:
+        blocks.append(block)
+
+    result, announced = [], set()
+
+    for block in blocks:
+        chunks = []
+        for pos in sorted(set(pos for pos, _ in block)):
+            if pos not in announced:
+                chunks.append((pos, None, [first]))
+                announced.add(pos)
+
+            timepoints = [t for p, t in block if p == pos]
+            for n in range(0, len(timepoints), args.chunk_length):
+                piece = timepoints[n:n + args.chunk_length]
+                references = set(r for t in piece for r in frame_references(args, t))
+                references |= set(t for t in piece if (pos, t) in reference_keys)
+                chunks.append((pos, piece, sorted(references)))
+        result.append(chunks)
+
+    return result
+
+
+def shared_memory_tasks(args, pool, ready, reader, interval=1.0):
+    """
+    Yields the tasks of :py:func:`shared_memory_chunk_task`, as the reader process (see
+    :py:func:`shared_memory_reader`) announces them via the ready queue, until it announces the end.
+    The first frame of each position is analyzed once, by a :py:func:`shared_memory_reference_task` handed to the
+    pool as soon as it is announced, and passed along with each chunk of the position (like
+    :py:func:`position_affine_tasks` does). As this waits for pool results, the tasks must not be consumed
+    by the pool's own map functions, see :py:func:`bounded_imap`.
+    The queue is polled, so that a reader which died without announcing the end raises an error,
+    instead of waiting for it forever.
+
+    :param args:
+    :param pool: pool
+    :param ready: queue
+    :param reader: reader process
+    :param interval: polling interval in seconds
+    :raises RuntimeError: if the reader died
+    """
+    references = {}
+
+    while True:
+        try:
+            item = ready.get(timeout=interval)
+        except queue.Empty:
+            if reader.is_alive():
+                continue
+
+            try:
+                # the reader might have announced its last items right before it exited
+                item = ready.get(timeout=interval)
+            except queue.Empty:
+                raise RuntimeError(
+                    "The process reading the frames died (exit code %(exitcode)s) before all frames were read." % {
+                        'exitcode': reader.exitcode})
+
+        if item is None:
+            return
+
+        pos, timepoints, frames = item
+
+        if timepoints is None:
+            references[pos] = pool.apply_async(shared_memory_reference_task, ((args, pos, frames),))
+            continue
+
+        yield args, pos, timepoints, frames, references[pos].get()
+
+
+def deliver_shared_memory_frames(pos, frames):
+    """
+    Delivers the frames of a task from the shared memory rings to the worker's frame source.
+
+    :param pos: position
+    :param frames: list of (t, slot, meta, pinned) tuples, see :py:func:`shared_memory_reader`
+    :return: dictionary mapping the timepoints which could not be read to their errors
+    """
+    errors = {}
+
+    for t, slot, meta, pinned in frames:
+        if slot is None:
+            errors[t] = meta
+        elif pinned:
+            data = reference_frame_ring.peek(slot)
+            reference_frame_ring.unpin(slot)
+            ims.deliver(pos, t, data, meta)
+        else:
+            # the data is copied out of the slot, so that the slot can be reused as soon as possible
+            ims.deliver(pos, t, frame_ring.read(slot), meta)
+
+    return errors
+
+
+def shared_memory_reference_task(task):
+    """
+    Analyzes the first frame of a position, delivered via the reference ring, see :py:func:`reference_task`.
+
+    :param task: tuple of (args, pos, frames), see :py:func:`shared_memory_reader`
+    :return: the analyzed first frame, or None if its analysis failed
+    """
+    args, pos, frames = task
+    try:
+        deliver_shared_memory_frames(pos, frames)
+        return reference_task((args, pos))
+    finally:
+        ims.release()
+
+
+def shared_memory_chunk_task(task):
+    """
+    Processes a chunk of timepoints of a single position, whose frames were delivered via the shared memory rings.
+    The position's first frame is passed along, if its analysis succeeded (see :py:func:`shared_memory_tasks`),
+    otherwise the worker analyzes it, reading it from the file.
+
+    :param task: tuple of (args, pos, timepoints, frames, first frame or None), see :py:func:`shared_memory_reader`
+    :return: list of (t, pos, result, error) tuples, see :py:func:`processing_frame_task`
+    """
+    args, pos, timepoints, frames, first = task
+
+    if first is not None:
+        select_input(args)
+        first_frame_cache[pos] = first
+
+    errors = deliver_shared_memory_frames(pos, frames)
+
+    try:
+        return [(t, pos, None, errors[t]) if t in errors else processing_frame_task((args, t, pos))
+                for t in timepoints]
+    finally:
+        ims.release()
+
+
+def perform_tracking_of_position(times):
+    """
+    Performs all tracking steps for a single position.
+
+    :param times: dictionary mapping timepoints to the position's (flattened) images
+    :return: the TrackedPosition
+    """
+    tracked_position = TrackedPosition()
+    tracked_position.set_times(times)
+    tracked_position.align_channels()
+    tracked_position.remove_empty_channels()
+    tracked_position.guess_channel_orientation()
+    tracked_position.perform_tracking()
+    tracked_position.remove_empty_channels_post_tracking()
+    return tracked_position
+
+
+def log_frame_error(log, t, pos, error):
+    """
+    Logs an error which occurred during the processing of a frame.
+
+    :param log: logger
+    :param t: timepoint
+    :param pos: position
+    :param error: (message, traceback) tuple
+    """
+    log.error(
+        "ERROR: Exception occurred at pos: %(pos)d, time %(time)d: %(e)s\n%(traceback)s" %
+        {'pos': pos, 'time': t, 'e': error[0], 'traceback': error[1]}
+    )
+
+
+def follow_acquisition(args, memory_budget, results, timepoints, log, progress_bar):
+    """
+    Processes a still growing image stack (live acquisition). The file is polled, and new frames are processed
+    as they appear. The last timepoint in the file is held back until the file has grown beyond it,
+    as its positions might not have been written completely yet. Positions are tracked incrementally.
+    The acquisition is considered finished if the file did not grow for args.follow_timeout seconds.
+
+    :param args:
+    :param memory_budget: :py:class:`MemoryBudget`, checkpointing the frames into the cache
+    :param results: dictionary of positions, mapping timepoints to already processed images, filled
+    :param timepoints: timepoint range string, as passed by the user
+    :param log: logger
+    :param progress_bar: progress bar function
+    :return: dictionary of positions, mapping to TrackedPositions (empty if tracking is disabled)
+    """
+    global ims
+
+    positions = sorted(results.keys())
+
+    pool = None
+
+    if args.mp > 0:
+        log.info("... parallel with %(process_count)d processes" % {'process_count': args.mp})
+        pool = create_pool(args, processing_setup, [args])
+    else:
+        processing_setup(args)
+
+    tracking = not args.no_tracking
+
+    tracked_positions = {pos: TrackedPosition() for pos in positions} if tracking else {}
+    # count of available timepoints already passed to incremental tracking
+    tracked_counts = {pos: 0 for pos in positions}
+
+    failed = set()
+
+    # the analyzed first frames of the positions, see position_affine_tasks
+    references = {}
+
+    last_size, last_growth = None, time.time()
+
+    finished = False
+
+    while not finished:
+        ims = open_image_stack(args.input)
+
+        if pool is not None:
+            thread_safe_image_stack(args)
+
+        size = ims.size[Dimensions.Time]
+
+        if size != last_size:
+            last_size, last_growth = size, time.time()
+
+        finished = time.time() - last_growth > args.follow_timeout
+
+        available = parse_range(timepoints, maximum=size)
+
+        if not finished:
+            # the last timepoint might still be incomplete
+            available = [t for t in available if t < size - 1]
+
+        work = {pos: [t for t in available if t not in results[pos] and (pos, t) not in failed] for pos in positions}
+        total = sum(len(timepoints) for timepoints in work.values())
+
+        if total > 0:
+            log.info("Processing %(count)d new frames (%(size)d timepoints acquired) ..." % {
+                'count': total, 'size': size})
+
+            if pool is not None:
+                chunk_results = pool.imap_unordered(processing_chunk_task, position_affine_tasks(
+                    args, pool, position_affine_chunks(work, args.mp, max_length=args.chunk_length), references))
+            else:
+                chunk_results = ([processing_frame_task((args, t, pos))] for t in available for pos in positions
+                                 if t in work[pos])
+
+            progressbar_states = progress_bar(range(total))
+
+            for frame_results in chunk_results:
+                for t, pos, result, error in frame_results:
+                    if error is None:
+                        memory_budget.checkpoint(results, pos, t, result)
+                    else:
+                        log_frame_error(log, t, pos, error)
+                        failed.add((pos, t))
+
+                    next(progressbar_states)
+
+            try:
+                next(progressbar_states)
+            except StopIteration:
+                pass
+
+        for pos in tracked_positions.keys():
+            for t in available[tracked_counts[pos]:]:
+                if t in results[pos]:
+                    tracked_positions[pos].add_time(t, load_position(
+                        memory_budget.cache, pos, {t: results[pos][t]})[t])
+            tracked_counts[pos] = len(available)
+
+        if total == 0 and not finished:
+            time.sleep(args.follow_interval)
+
+    log.info("Acquisition finished, %(size)d timepoints were acquired." % {'size': last_size})
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    return {pos: tracked_position.finish_incremental() for pos, tracked_position in tracked_positions.items()}
+
+
+def tracking_task(task):
+    """
+    Wrapper around :py:func:`perform_tracking_of_position` to be used with the pool's map functions.
+
+    :param task: tuple of (pos, times)
+    :return: tuple of (pos, tracked_position)
+    """
+    pos, times = task
+    return pos, perform_tracking_of_position(times)
+
+
+def setup_tunables(args, log=None):
+    # load tunables
+    if args.read_tunables:
+        with open(args.read_tunables, 'r') as tunable_file:
+            tunables = json.load(tunable_file)
+            if log:
+                log.info("Loaded tunable file \"%(filename)s\" with data: %(data)s" %
+                         {'filename': args.read_tunables, 'data': repr(tunables)})
+            TunableManager.load_tunables(tunables)
+
+    if args.tunables:
+        tunables = json.loads(args.tunables)
+        if log:
+            log.info("Loaded command line tunables: %(data)s" % {'data': repr(tunables)})
+        TunableManager.load_tunables(tunables)
+
+    if args.tunable_list:
+        tunables = {}
+        for k, v in args.tunable_list:
+            tunables[''.join(k)] = ''.join(v)
+        if log:
+            log.info("Loaded command line tunables: %(data)s" % {'data': repr(tunables)})
+        TunableManager.load_tunables(tunables)
+
+
+def setup_modules(modules):
+    """
+
+    :param modules:
+    """
+    import importlib
+    for module in modules:
+        try:
+            importlib.import_module("molyso_%s" % module)
+        except ImportError:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                print("WARNING: Could not load either module molyso_%s or %s!" % (module, module,))
+
+
+def processing_setup(args):
+    """
+
+    :param args:
+    """
+    global ims
+    global first_frame_cache
+    global first_to_look_at
+    global current_input
+
+    if args.modules:
+        setup_modules(args.modules)
+
+    setup_tunables(args)
+
+    set_fft_backend(*parse_fft_backend(args.fft_backend))
+    set_real_transforms(args.real_transforms)
+    set_precision(args.precision)
+
+    if ims is None:
+        ims = open_image_stack(args.input)
+
+    if args.input != current_input:
+        first_frame_cache = {}
+        rotation_reference_cache.clear()
+        current_input = args.input
+
+    if isinstance(args.multipoints, str):
+        args.multipoints = parse_range(args.multipoints, maximum=ims.size[Dimensions.PositionXY])
+
+    if isinstance(args.timepoints, str):
+        args.timepoints = parse_range(args.timepoints, maximum=ims.size[Dimensions.Time])
+
+    first_to_look_at = args.timepoints[0]
+
+    correct_windows_signal_handlers()
+
+    # OpenCV takes a moment and often nags about missing libraries, let's load it at the
+    # beginning so the rest runs smoothly
+    try:
+        # noinspection PyPackageRequirements,PyUnresolvedReferences
+        import cv2
+    except ImportError:
+        pass
+
+
+def prefetching_setup(args):
+    """
+    Wraps the opened image stack to read frames ahead in the background, if enabled.
+    Only sensible if frames are processed by this process one after another.
+
+    :param args:
+    """
+    global ims
+
+    if args.prefetch > 0 and not isinstance(ims, FrameSource):
+        ims = PrefetchingFrameSource(args.input, ims, depth=args.prefetch)
+
+
+def shared_memory_processing_setup(args, ring, reference_ring, size):
+    """
+    Sets up a worker process which receives its frames via shared memory rings.
+
+    :param args:
+    :param ring: SharedMemoryRing
+    :param reference_ring: SharedMemoryRing of the reference frames
+    :param size: size of the image stack view
+    """
+    global ims
+    global frame_ring
+    global reference_frame_ring
+
+    frame_ring = ring
+    reference_frame_ring = reference_ring
+    ims = SharedMemoryFrameSource(args.input, size)
+
+    processing_setup(args)
+
+
+def thread_safe_image_stack(args):
+    """
+    If the workers of the selected executor run within this process (*e.g.* threads),
+    replaces the opened image stack by a frame source opening one stack per thread.
+
+    :param args:
+    """
+    global ims
+
+    if args.executor in in_process_executors and ims is not None and not isinstance(ims, FrameSource):
+        ims = ThreadLocalFrameSource(args.input, ims.size)
+
+
+def create_pool(args, initializer, initargs):
+    """
+    Creates the worker pool with the selected executor (*e.g.* processes or threads),
+    workers are replaced after args.max_tasks_per_child tasks, if set and supported.
+
+    :param args:
+    :param initializer: worker set-up function
+    :param initargs: arguments of the set-up function
+    :return: pool-like object
+    """
+    thread_safe_image_stack(args)
+
+    return create_executor(args.executor, args.mp, initializer, initargs,
+                           maxtasksperchild=args.max_tasks_per_child if args.max_tasks_per_child > 0 else None)
+
+
+def tracking_setup(args):
+    """
+    Sets up a worker process which is only used for tracking, hence does not need to open the input file.
+
+    :param args:
+    """
+    if args.modules:
+        setup_modules(args.modules)
+
+    setup_tunables(args)
+
+    correct_windows_signal_handlers()
+
+
+def process_input(args, log, progress_bar, shared_pool=None):
+    """
+    Processes one input file: image analysis, tracking and output.
+    This is a generator, which yields once all image analysis tasks of the input have been handed to the
+    (shared) pool, so that the tasks of several inputs can be scheduled before any results are collected.
+
+    :param args: arguments, args.input being the input file
+    :param log: logger
+    :param progress_bar: progress bar function
+    :param shared_pool: pool shared between several inputs, or None if a pool should be created as needed
+    """
+    global ims
+
+    cache_token = args.cache_token
+
+    if args.shard is not None:
+        cache_token = shard_cache_token(args, *parse_shard(args.shard))
+
+    cache = Cache(args.input, ignore_cache=args.ignorecache, cache_token=cache_token,
+                  stage_digests=cache_stage_digests(args), codec=args.cache_codec,
+                  cache_directory=args.cache_directory)
+
+    pool = shared_pool
+
+    memory_budget = MemoryBudget(cache, args.memory_budget * 1024 * 1024)
+
+    if args.memory_budget > 0 and cache.ignores('imageanalysis'):
+        log.warning("The image analysis cache is disabled, results can not be spilled, the memory budget is ignored.")
+
+    # positions whose tracking results were taken from the cache, or which were already tracked
+    # while image analysis was still running (pipelined mode)
+    tracked_results = {}
+
+    ims = open_image_stack(args.input)
+
+    timepoints_range = args.timepoints
+
+    args.multipoints = parse_range(args.multipoints, maximum=ims.size[Dimensions.PositionXY])
+    args.timepoints = parse_range(args.timepoints, maximum=ims.size[Dimensions.Time])
+
+    if args.shard is not None:
+        shard, shards = parse_shard(args.shard)
+        log.info("Processing shard %(shard)d of %(shards)d (counting from 0)." % {
+            'shard': shard, 'shards': shards})
+        args.multipoints = shard_positions(args.multipoints, shard, shards)
+
+    positions_to_process = args.multipoints
+    timepoints_to_process = args.timepoints
+
+    log.info("Beginning Processing:")
+    dummy = " " * len("XXXX-XX-XX XX:XX:XX.XXX molyso INFO ")
+    log.info(prettify_numpy_array(positions_to_process,  dummy + "Positions : ").strip())
+    log.info(prettify_numpy_array(timepoints_to_process, dummy + "Timepoints: ").strip())
+
+    # the cache is granular, image analysis results are stored per frame ('imageanalysis', pos, t) while
+    # processing, and consolidated per position ('imageanalysis', pos) afterwards, tracking results are stored
+    # per position ('tracking', pos), along with the timepoints they were tracked from.
+    # whatever subset is already cached is reused, and only the missing frames are processed.
+
+    # the tracking of a growing acquisition can not be reused
+    reuse_tracking = not args.no_tracking and not args.follow
+    # cached frames which are not needed right away are only loaded once needed
+    defer_loading = (args.memory_budget > 0 or args.no_tracking) and not args.follow
+
+    results = {}
+
+    for pos in positions_to_process:
+        packed = packed_timepoints(cache, pos)
+
+        cached = [t for t in timepoints_to_process if t in packed or ('imageanalysis', pos, t) in cache]
+
+        if reuse_tracking and len(cached) == len(timepoints_to_process) and ('tracking', pos) in cache:
+            entry = cache['tracking', pos]
+            if entry is not None and entry[0] == tuple(cached):
+                tracked_results[pos] = entry[1]
+                continue
+
+        results[pos] = {t: Spilled() for t in cached}
+
+        if not defer_loading:
+            results[pos] = {t: result for t, result in load_position(cache, pos, results[pos]).items()
+                            if result is not None}
+
+    reused_positions = set(tracked_results.keys())
+
+    if len(reused_positions) > 0:
+        log.info("Tracking results of %(count)d positions were taken from the cache." % {
+            'count': len(reused_positions)})
+
+    cached_count = sum(len(times) for times in results.values())
+
+    if cached_count > 0:
+        log.info("%(count)d frames were taken from the cache." % {'count': cached_count})
+
+    positions_to_analyze = [pos for pos in positions_to_process if pos in results]
+
+    # positions whose frames were already consolidated into their columnar entry
+    packed_positions = set()
+
+    work = {pos: [t for t in timepoints_to_process if t not in results[pos]] for pos in positions_to_analyze}
+
+    total = sum(len(timepoints) for timepoints in work.values())
+
+    to_process = [(t, pos) for t in timepoints_to_process for pos in positions_to_analyze
+                  if t not in results[pos]]
+
+    if args.follow or total > 0:
+        log.info("Performing image analysis ...")
+
+    if args.follow:
+        log.info("... following the acquisition, polling every %(interval).1f s" % {
+            'interval': args.follow_interval})
+
+        tracked_results = follow_acquisition(args, memory_budget, results, timepoints_range, log, progress_bar)
+    elif total > 0 and args.mp == 0:
+        processing_setup(args)
+        prefetching_setup(args)
+
+        if isinstance(ims, PrefetchingFrameSource):
+            ims.prefetch([(pos, t) for t, pos in to_process])
+
+        try:
+            for t, pos in progress_bar(to_process):
+                if args.frame_timeout > 0:
+                    # frames exceeding the time limit are logged and skipped, like in parallel mode
+                    _, _, result, error = processing_frame_task((args, t, pos))
+                    if error is not None:
+                        log_frame_error(log, t, pos, error)
+                        continue
+                else:
+                    result = processing_frame(args, t, pos)
+
+                # checkpoint every frame, so a crashed run can be resumed
+                memory_budget.checkpoint(results, pos, t, result)
+        finally:
+            if isinstance(ims, PrefetchingFrameSource):
+                ims.close()
+    elif total > 0:
+
+        # ims = None
+
+        log.info("... parallel with %(process_count)d processes" % {'process_count': args.mp})
+
+        ring, reader = None, None
+
+        def _imap_unordered(function, iterable):
+            if args.memory_budget > 0:
+                # the count of tasks whose results are not yet collected is bounded
+                return bounded_imap(pool, function, iterable, 2 * args.mp)
+            else:
+                return pool.imap_unordered(function, iterable)
+
+        if args.shared_memory_slots > 0 and args.executor in in_process_executors:
+            log.warning("Shared memory delivery is not used with in-process executors.")
+        elif args.shared_memory_slots > 0 and not SharedMemoryRing.available:
+            log.warning("Shared memory is not available with this Python version, frames are read by workers.")
+        elif args.shared_memory_slots > 0 and shared_pool is None:
+            t, pos = to_process[0]
+
+            slots = max(1, args.shared_memory_slots)
+
+            shape, dtype = (ims.size[Dimensions.Channel],) + ims[pos, t, 0].shape, ims[pos, t, 0].dtype
+
+            ring = SharedMemoryRing(slots, shape, dtype)
+            reference_ring = SharedMemoryRing(
+                reference_slots(args, len([pos for pos, timepoints in work.items() if len(timepoints) > 0])),
+                shape, dtype)
+
+            log.info("... frames are read by one process and delivered via %(slots)d shared memory slots, "
+                     "and %(references)d for reference frames" % {
+                         'slots': ring.slots, 'references': reference_ring.slots})
+
+            pool = create_pool(args, shared_memory_processing_setup, [args, ring, reference_ring, ims.size])
+
+            ready = multiprocessing.Queue()
+
+            # the reader is started last, it is stopped again if anything fails further on (see below)
+            reader = multiprocessing.Process(
+                target=shared_memory_reader,
+                args=(args.input, shared_memory_blocks(args, work, slots), ring, reference_ring, ready))
+            reader.start()
+
+            # the tasks wait for the analysis of the first frames, which the pool's task handler must not do
+            tasks = bounded_imap(pool, shared_memory_chunk_task, shared_memory_tasks(args, pool, ready, reader),
+                                 2 * args.mp)
+        else:
+            if pool is None:
+                pool = create_pool(args, processing_setup, [args])
+
+            chunks = position_affine_chunks(work, args.mp, max_length=args.chunk_length)
+
+            tasks = _imap_unordered(processing_chunk_task, position_affine_tasks(args, pool, chunks))
+
+        try:
+            # all tasks are handed to the pool, other inputs can be scheduled before the results are collected
+            yield
+
+            progressbar_states = progress_bar(range(total))
+
+            pipeline = args.pipeline and not args.no_tracking
+
+            outstanding = {pos: len(timepoints) for pos, timepoints in work.items()}
+
+            # results are collected in order of completion, the parent blocks until the next one is available
+            for chunk_results in tasks:
+                for t, pos, result, error in chunk_results:
+                    if error is None:
+                        # checkpoint every frame, so a crashed run can be resumed
+                        memory_budget.checkpoint(results, pos, t, result)
+                    else:
+                        log_frame_error(log, t, pos, error)
+
+                    next(progressbar_states)
+
+                    outstanding[pos] -= 1
+
+                    if pipeline and outstanding[pos] == 0:
+                        pack_position(cache, pos, results[pos])
+                        packed_positions.add(pos)
+                        # the parent would idle otherwise, track the position while the others are analyzed
+                        tracked_results[pos] = perform_tracking_of_position(load_position(cache, pos, results[pos]))
+                        # the results are packed into the cache, only their timepoints are needed further on
+                        memory_budget.release(results, pos)
+        except BaseException:
+            # e.g. the reader died, a result failed to be checkpointed or the run was interrupted: the reader might
+            # wait for slots which are never released, and the workers are busy with results never collected
+            if reader is not None:
+                reader.terminate()
+            if pool is not shared_pool:
+                pool.terminate()
+            raise
+        finally:
+            if reader is not None:
+                reader.join()
+                ring.close()
+                reference_ring.close()
+
+        try:
+            # to output the progress bar, the iterator must be pushed beyond its end
+            next(progressbar_states)
+        except StopIteration:
+            pass
+
+    # the per frame entries of each position are consolidated into one columnar entry
+    for pos in positions_to_analyze:
+        if pos not in packed_positions:
+            pack_position(cache, pos, results[pos])
+
+            if args.memory_budget > 0:
+                # with a memory budget, positions are loaded from the cache one by one for tracking
+                memory_budget.release(results, pos)
+
+    ####################################################################################################################
+
+    if not args.no_tracking:
+
+        untracked = {pos: times for pos, times in results.items() if pos not in tracked_results}
+
+        newly_tracked_results = {}
+
+        if len(untracked) == 0:
+            # all positions were taken from the cache or tracked already
+            pass
+        elif args.mp > 0 and len(untracked) > 1:
+            log.info("Performing tracking ...")
+            log.info("... parallel with %(process_count)d processes" % {'process_count': args.mp})
+
+            if pool is None:
+                pool = create_pool(args, tracking_setup, [args])
+
+            # positions are loaded from the cache within this thread, with a memory budget,
+            # only as many as there are workers
+            tracked_positions = bounded_imap(
+                pool, tracking_task,
+                ((pos, load_position(cache, pos, times)) for pos, times in untracked.items()),
+                args.mp if args.memory_budget > 0 else len(untracked))
+
+            progressbar_states = progress_bar(range(len(untracked)))
+
+            # positions are tracked independently, each one as a whole within one worker
+            for pos, tracked_position in tracked_positions:
+                newly_tracked_results[pos] = tracked_position
+
+                next(progressbar_states)
+
+            try:
+                next(progressbar_states)
+            except StopIteration:
+                pass
+        elif args.memory_budget > 0:
+            log.info("Performing tracking, position by position ...")
+
+            for pos in progress_bar(list(untracked.keys())):
+                newly_tracked_results[pos] = perform_tracking_of_position(load_position(cache, pos, untracked[pos]))
+        else:
+            log.info("Set-up for tracking ...")
+
+            pi = progress_bar(range(sum([len(l) - 1 if len(l) > 0 else 0 for l in untracked.values()]) - 1))
+
+            for pos, times in untracked.items():
+                tracked_position = TrackedPosition()
+                tracked_position.set_times(load_position(cache, pos, times))
+                tracked_position.align_channels(progress_indicator=pi)
+                tracked_position.remove_empty_channels()
+                tracked_position.guess_channel_orientation()
+                newly_tracked_results[pos] = tracked_position
+
+            log.info("Performing tracking ...")
+
+            pi = progress_bar(range(sum([tp.get_tracking_work_size() for tp in newly_tracked_results.values()]) - 1))
+
+            for pos, tracked_position in newly_tracked_results.items():
+                tracked_position.perform_tracking(progress_indicator=pi)
+                tracked_position.remove_empty_channels_post_tracking()
+
+        tracked_results.update(newly_tracked_results)
+
+        for pos, tracked_position in tracked_results.items():
+            if pos not in reused_positions:
+                # the channel images are memory-mapped when loaded, and only read if accessed (e.g. for output)
+                cache.store(('tracking', pos), (tuple(sorted(results[pos].keys())), tracked_position),
+                            external=tracked_position.channel_images())
+
+        # the positions tracked by this run and their digest, e.g. for merging shards
+        cache['tracking'] = {'digest': cache.stage_digests['tracking'], 'positions': sorted(tracked_results.keys())}
 
-    if not args.process:
-        setup_matplotlib(log=log)
+    if pool is not None and pool is not shared_pool:
+        pool.close()
+        pool.join()
 
-        return interactive_main(args)
+    if not args.no_tracking:
+
+        # ( Diversion into ground truth processing, if applicable )
+
+        if args.ground_truth:
+            setup_matplotlib(log=log)
+
+            interactive_ground_truth_main(args, tracked_results)
+            return
+
+        if args.advanced_ground_truth:
+            setup_matplotlib(log=log)
+
+            interactive_advanced_ground_truth_main(args, tracked_results)
+            return
+
+        output_results(args, tracked_results, log, progress_bar)
+
+
+def output_results(args, tracked_results, log, progress_bar):
+    """
+    Outputs the tracking results, as table (args.table_output, or stdout) and optionally as graphical
+    tracking output (args.tracking_output).
+
+    :param args:
+    :param tracked_results: dictionary of positions, mapping to TrackedPositions
+    :param log: logger
+    :param progress_bar: progress bar function
+    """
+    # ( Output of textual results: )####################################################################################
+
+    def each_pos_k_tracking_tracker_channels_in_results(inner_tracked_results):
+        """
+
+        :param inner_tracked_results:
+        """
+        for inner_pos in sorted(inner_tracked_results.keys()):
+            inner_tracking = inner_tracked_results[inner_pos]
+            for inner_k in sorted(inner_tracking.tracker_mapping.keys()):
+                inner_tracker = inner_tracking.tracker_mapping[inner_k]
+                inner_channels = inner_tracking.channel_accumulator[inner_k]
+                yield inner_pos, inner_k, inner_tracking, inner_tracker, inner_channels
+
+    if args.table_output is None:
+        recipient = sys.stdout
+    else:
+        recipient = codecs.open(args.table_output, 'wb+', 'utf-8')
+
+    log.info("Outputting tabular data ...")
+
+    flat_results = list(each_pos_k_tracking_tracker_channels_in_results(tracked_results))
+
+    # each output has its own numbering, even if multiple inputs are processed
+    reset_object_unique_ids()
 
     try:
-        if not args.ground_truth:
-            # noinspection PyUnresolvedReferences
-            import matplotlib
+        table_dumper = QuickTableDumper(recipient=recipient)
 
-            matplotlib.use('PDF')
-    except ImportError:
-        if args.debug:
-            args.debug = setup_matplotlib(throw=False, interactive=False, log=log)
+        iterable = progress_bar(flat_results) if recipient is not sys.stdout else silent_progress_bar(flat_results)
 
-    if args.debug:
-        debug_init()
-        if args.mp != 0:
-            log.warning("Debugging enabled, concurrent processing disabled!")
-            args.mp = 0
+        for pos, k, tracking, tracker, channels in iterable:
+            analyze_tracking(tracker_to_cell_list(tracker), lambda x: table_dumper.add(x), meta=args.meta)
 
-    if args.ground_truth or args.advanced_ground_truth:
-        args.debug = False
+    finally:
+        if recipient is not sys.stdout:
+            recipient.close()
+
+    # ( Output of graphical tracking results: )#########################################################################
+
+    if args.tracking_output is not None:
+
+        setup_matplotlib(interactive=False, log=log)
+        # noinspection PyUnresolvedReferences
+        import matplotlib
+        # noinspection PyUnresolvedReferences
+        import matplotlib.pylab
+
+        log.info("Outputting graphical tracking data ...")
 
-    cache = Cache(args.input, ignore_cache=args.ignorecache, cache_token=args.cache_token)
+        figures_directory = os.path.abspath(args.tracking_output)
 
-    if 'tracking' not in cache:
+        if not os.path.isdir(figures_directory):
+            os.mkdir(figures_directory)
 
-        if 'imageanalysis' in cache:
-            results = cache['imageanalysis']
+        if args.tracking_output_format is None:
+            args.tracking_output_format = {'pdf'}
         else:
-            ims = ImageStack(args.input).view(Dimensions.PositionXY, Dimensions.Time, Dimensions.Channel).filter(FloatFilter)
+            args.tracking_output_format = set(''.join(sublist) for sublist in args.tracking_output_format)
 
-            args.multipoints = parse_range(args.multipoints, maximum=ims.size[Dimensions.PositionXY])
-            args.timepoints = parse_range(args.timepoints, maximum=ims.size[Dimensions.Time])
+        for pos, k, tracking, tracker, channels in progress_bar(flat_results):
 
-            positions_to_process = args.multipoints
-            timepoints_to_process = args.timepoints
+            tracking_filename = "%(dir)s/tracking_pt_%(mp)02d_chan_%(k)02d" % \
+                                {'dir': figures_directory, 'mp': pos, 'k': k}
 
-            log.info("Beginning Processing:")
-            dummy = " " * len("XXXX-XX-XX XX:XX:XX.XXX molyso INFO ")
-            log.info(prettify_numpy_array(positions_to_process,  dummy + "Positions : ").strip())
-            log.info(prettify_numpy_array(timepoints_to_process, dummy + "Timepoints: ").strip())
+            cs = CallSerialization()
 
-            results = {pos: {} for pos in positions_to_process}
+            plot_timeline(cs.get_proxy(), channels, tracker_to_cell_list(tracker),
+                          figure_presetup=
+                          lambda p: p.title("Channel #%02d (average cells = %.2f)" % (k, tracker.average_cells)),
+                          figure_finished=
+                          lambda p: p,
+                          show_images=True, show_overlay=True, leave_open=True)
 
-            total = len(timepoints_to_process) * len(positions_to_process)
+            if 'kymograph' in args.tracking_output_format:
+                with open(tracking_filename + '.kymograph', 'wb') as fp:
+                    fp.write(cs.as_pickle)
 
-            if args.mp < 0:
-                args.mp = multiprocessing.cpu_count()
+            if 'pdf' in args.tracking_output_format:
+                pylab = matplotlib.pylab
+                inject_poly_drawing_helper(pylab)
+                cs.execute(pylab)
+                pylab.savefig(tracking_filename + '.pdf')
+                pylab.close('all')
 
-            log.info("Performing image analysis ...")
+            del cs
 
-            to_process = list(itertools.product(timepoints_to_process, positions_to_process))
 
-            if args.mp == 0:
-                processing_setup(args)
+def expand_inputs(inputs):
+    """
+    Expands glob patterns within the list of inputs. Patterns without matches are kept as they are.
 
-                for t, pos in progress_bar(to_process):
-                    results[pos][t] = processing_frame(args, t, pos)
-            else:
+    :param inputs: list of input file names or patterns
+    :return: list of input file names
+    """
+    result = []
+    for item in inputs:
+        matches = sorted(glob.glob(item)) if not os.path.exists(item) else []
+        result += matches if len(matches) > 0 else [item]
+    return result
 
-                # ims = None
 
-                log.info("... parallel with %(process_count)d processes" % {'process_count': args.mp})
+def input_args(args, filename):
+    """
+    Derives the arguments for one of multiple inputs. The placeholder %(name)s in output names and
+    cache token is replaced by the input file name without extension.
 
-                pool = multiprocessing.Pool(args.mp, processing_setup, [args])
+    :param args: arguments
+    :param filename: input file name
+    :return: arguments for the input
+    """
+    args = copy.copy(args)
+    args.input = filename
 
-                worker_states = []
+    replacements = {'name': os.path.splitext(os.path.basename(filename))[0]}
 
-                for t, pos in to_process:
-                    worker_states.append((t, pos, pool.apply_async(processing_frame, (args, t, pos))))
+    for attribute in ['table_output', 'tracking_output', 'cache_token']:
+        if getattr(args, attribute) is not None:
+            setattr(args, attribute, getattr(args, attribute) % replacements)
 
-                pool.close()
+    return args
 
-                progressbar_states = progress_bar(range(total))
 
-                while len(worker_states) > 0:
-                    for i, (t, pos, state) in reversed(list(enumerate(worker_states))):
-                        if state.ready():
-                            try:
-                                results[pos][t] = state.get()
-                            except Exception as e:
-                                log.exception(
-                                    "ERROR: Exception occurred at pos: %(pos)d, time %(time)d: %(e)s\n%(traceback)s" %
-                                    {'pos': pos, 'time': t, 'e': str(e), 'traceback': traceback.format_exc()}
-                                )
+def process_inputs(args, log, progress_bar):
+    """
+    Processes multiple inputs, with one pool shared by all of them. All image analysis tasks are scheduled at first,
+    then the inputs are finished (tracking, output) one after another, while the pool continues with the next.
 
-                            del worker_states[i]
-                            next(progressbar_states)
+    :param args: arguments, args.inputs being the list of input files
+    :param log: logger
+    :param progress_bar: progress bar function
+    """
+    for attribute in ['table_output', 'tracking_output']:
+        if getattr(args, attribute) is not None and '%(name)s' not in getattr(args, attribute):
+            log.warning("Multiple inputs, but the output name %(output)s does not contain %%(name)s, "
+                        "outputs will overwrite each other!" % {'output': getattr(args, attribute)})
 
-                try:
-                    # to output the progress bar, the iterator must be pushed beyond its end
-                    next(progressbar_states)
-                except StopIteration:
-                    pass
+    log.info("Processing %(count)d inputs ..." % {'count': len(args.inputs)})
 
-            cache['imageanalysis'] = results
+    if args.executor in in_process_executors:
+        # the workers share this process' per input globals, hence the inputs are processed one after another
+        for filename in args.inputs:
+            log.info("Processing %(input)s ..." % {'input': filename})
+            for _ in process_input(input_args(args, filename), log, progress_bar):
+                pass
+        return
 
-    ####################################################################################################################
+    shared_pool = None
 
-    if not args.no_tracking:
+    if args.mp > 0:
+        shared_pool = create_pool(args, processing_setup, [input_args(args, args.inputs[0])])
 
-        if 'tracking' in cache:
-            # noinspection PyUnboundLocalVariable
-            results = None
-            del results  # free up some ram?
-            tracked_results = cache['tracking']
-        else:
+    runs = []
 
-            tracked_results = {}
+    for filename in args.inputs:
+        log.info("Scheduling %(input)s ..." % {'input': filename})
+        run = process_input(input_args(args, filename), log, progress_bar, shared_pool=shared_pool)
+        # inputs without image analysis work left run to completion here
+        next(run, None)
+        runs.append((filename, run))
 
-            log.info("Set-up for tracking ...")
+    for filename, run in runs:
+        log.info("Finishing %(input)s ..." % {'input': filename})
+        for _ in run:
+            pass
 
-            # noinspection PyUnboundLocalVariable
-            pi = progress_bar(range(sum([len(l) - 1 if len(l) > 0 else 0 for l in results.values()]) - 1))
+    if shared_pool is not None:
+        shared_pool.close()
+        shared_pool.join()
 
-            for pos, times in results.items():
-                tracked_position = TrackedPosition()
-                tracked_position.set_times(times)
-                tracked_position.align_channels(progress_indicator=pi)
-                tracked_position.remove_empty_channels()
-                tracked_position.guess_channel_orientation()
-                tracked_results[pos] = tracked_position
 
-            log.info("Performing tracking ...")
+def create_merge_argparser():
+    """
 
-            pi = progress_bar(range(sum([tp.get_tracking_work_size() for tp in tracked_results.values()]) - 1))
 
-            for pos, times in results.items():
-                tracked_position = tracked_results[pos]
-                tracked_position.perform_tracking(progress_indicator=pi)
-                tracked_position.remove_empty_channels_post_tracking()
+    :return:
+    """
+    argparser = argparse.ArgumentParser(prog="molyso merge",
+                                        description="molyso merge: Merges the results of sharded (-sh i/N) runs")
 
-            cache['tracking'] = tracked_results
+    argparser.add_argument('input', metavar='input', type=str, help="input file, as passed to the shards")
+    argparser.add_argument('-n', '--shards', dest='shards', type=int, required=True, help="count of shards")
+    argparser.add_argument('-ct', '--cache-token', dest='cache_token', type=str, default=None)
+    argparser.add_argument('-cd', '--cache-directory', dest='cache_directory', type=str, default=None)
+    argparser.add_argument('-o', '--table-output', dest='table_output', type=str, default=None)
+    argparser.add_argument('--meta', '--meta', dest='meta', type=str, default=None)
+    argparser.add_argument('-ot', '--output-tracking', dest='tracking_output', type=str, default=None)
+    argparser.add_argument('-otf', '--output-tracking-format', dest='tracking_output_format',
+                           type=list, action='append', default=None)
+    argparser.add_argument('-q', '--quiet', dest='quiet', default=False, action='store_true')
 
-        # ( Diversion into ground truth processing, if applicable )
+    return argparser
 
-        if args.ground_truth:
-            setup_matplotlib(log=log)
 
-            return interactive_ground_truth_main(args, tracked_results)
+def merge_main(argv):
+    """
+    Merges the tracking results of all shards of an input (as stored in their caches) and outputs them at once,
+    so that the output is the same as if the input had been processed by one run.
 
-        if args.advanced_ground_truth:
-            setup_matplotlib(log=log)
+    :param argv: command line arguments (after 'merge')
+    :return: exit code
+    """
+    args = create_merge_argparser().parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)-15s.%(msecs)03d %(name)s %(levelname)s %(message)s",
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    log = logging.getLogger(__name__)
+
+    if args.quiet:
+        progress_bar = silent_progress_bar
+        log.setLevel(logging.WARN)
+    else:
+        progress_bar = fancy_progress_bar
 
-            return interactive_advanced_ground_truth_main(args, tracked_results)
+    tracked_results = {}
 
-        # ( Output of textual results: )################################################################################
+    for shard in range(args.shards):
+        cache = Cache(args.input, cache_token=shard_cache_token(args, shard, args.shards),
+                      cache_directory=args.cache_directory)
 
-        def each_pos_k_tracking_tracker_channels_in_results(inner_tracked_results):
-            """
+        if 'tracking' not in cache:
+            log.error("Shard %(shard)d of %(shards)d has no tracking results (cache token %(token)s)!" % {
+                'shard': shard, 'shards': args.shards, 'token': cache.cache_token})
+            return 1
 
-            :param inner_tracked_results:
-            """
-            for inner_pos in sorted(inner_tracked_results.keys()):
-                inner_tracking = inner_tracked_results[inner_pos]
-                for inner_k in sorted(inner_tracking.tracker_mapping.keys()):
-                    inner_tracker = inner_tracking.tracker_mapping[inner_k]
-                    inner_channels = inner_tracking.channel_accumulator[inner_k]
-                    yield inner_pos, inner_k, inner_tracking, inner_tracker, inner_channels
+        manifest = cache['tracking']
 
-        if args.table_output is None:
-            recipient = sys.stdout
-        else:
-            recipient = codecs.open(args.table_output, 'wb+', 'utf-8')
+        # the digest of the shard's configuration is taken over, the shard's options are not known here
+        cache.stage_digests['tracking'] = manifest['digest']
+
+        shard_results = {}
+
+        for pos in manifest['positions']:
+            entry = cache['tracking', pos]
+
+            if entry is None:
+                log.error("Shard %(shard)d of %(shards)d lacks the tracking results of position %(pos)d!" % {
+                    'shard': shard, 'shards': args.shards, 'pos': pos})
+                return 1
+
+            shard_results[pos] = entry[1]
+
+        log.info("Shard %(shard)d: %(count)d positions." % {'shard': shard, 'count': len(shard_results)})
+
+        for pos in shard_results.keys():
+            if pos in tracked_results:
+                log.warning("Position %(pos)d is contained in multiple shards." % {'pos': pos})
+
+        tracked_results.update(shard_results)
+
+        del cache
+
+    output_results(args, tracked_results, log, progress_bar)
+
+    log.info("Merge finished.")
+
+    return 0
+
+
+def create_cache_argparser():
+    """
+
+
+    :return:
+    """
+    argparser = argparse.ArgumentParser(
+        prog="molyso cache", description="molyso cache: Lists, inspects and prunes the caches of a directory")
+
+    argparser.add_argument('action', metavar='action', type=str, choices=['list', 'inspect', 'prune'],
+                           help="list the caches, inspect the entries of one cache, or prune the caches")
+    argparser.add_argument('cache', metavar='cache', type=str, nargs='?', default=None,
+                           help="cache (file name or cache token) to inspect")
+    argparser.add_argument('-cd', '--cache-directory', dest='cache_directory', type=str, default='.')
+    argparser.add_argument('-cs', '--cache-size', dest='cache_size', type=int, default=None,
+                           help="size (in MB) to prune the caches to")
+    argparser.add_argument('-ma', '--max-age', dest='max_age', type=float, default=None,
+                           help="age (in days since the last access) after which entries are pruned")
+
+    return argparser
+
+
+def format_size(size):
+    """
+    Formats a size in bytes human readable.
+
+    :param size: size in bytes
+    :return: string
+
+    >>> format_size(123)
+    '123 B'
+    >>> format_size(5 * 1024 * 1024)
+    '5.0 MB'
+    """
+    for unit in ['B', 'kB', 'MB', 'GB']:
+        if size < 1024 or unit == 'GB':
+            break
+        size /= 1024.0
+
+    return ('%d %s' if unit == 'B' else '%.1f %s') % (size, unit)
+
+
+def cache_main(argv):
+    """
+    Lists, inspects or prunes the caches within a directory.
+
+    :param argv: command line arguments (after 'cache')
+    :return: exit code
+    """
+    argparser = create_cache_argparser()
+    args = argparser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)-15s.%(msecs)03d %(name)s %(levelname)s %(message)s",
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    log = logging.getLogger(__name__)
 
-        log.info("Outputting tabular data ...")
+    if args.action == 'list':
+        databases, flat_files = cache_files(args.cache_directory)
 
-        flat_results = list(each_pos_k_tracking_tracker_channels_in_results(tracked_results))
+        total = 0
 
+        for database in databases:
+            entries = Cache.from_filename(database).entries()
+            size = sum(entry[1] for entry in entries)
+            accessed = max([entry[2] for entry in entries] or [0])
+            total += size
+            print("%s\t%d entries\t%s\tlast accessed %s" % (
+                database, len(entries), format_size(size),
+                time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(accessed)) if accessed else 'never'))
+
+        for filename in flat_files:
+            total += os.path.getsize(filename)
+            print("%s\t%s" % (filename, format_size(os.path.getsize(filename))))
+
+        print("Total: %s" % (format_size(total),))
+
+    elif args.action == 'inspect':
+        if args.cache is None:
+            argparser.error("inspect requires a cache.")
+
+        filename = args.cache
+
+        if not filename.endswith(Cache.suffix):
+            filename = os.path.join(args.cache_directory, filename + Cache.suffix)
+
+        if not os.path.isfile(filename):
+            log.error("Cache %(filename)s does not exist!" % {'filename': filename})
+            return 1
+
+        for name, size, accessed in sorted(Cache.from_filename(filename).entries(), key=lambda e: e[0]):
+            print("%s\t%s\t%s" % (
+                name, format_size(size),
+                time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(accessed)) if accessed else 'never'))
+
+    elif args.action == 'prune':
+        if args.cache_size is None and args.max_age is None:
+            argparser.error("prune requires a cache size (-cs) and/or a maximum age (-ma).")
+
+        count, size = prune_cache(
+            args.cache_directory,
+            max_size=args.cache_size * 1024 * 1024 if args.cache_size is not None else None,
+            max_age=args.max_age * 24 * 60 * 60 if args.max_age is not None else None,
+            vacuum=True)
+
+        log.info("Pruned %(count)d cache entries (%(size)s)." % {'count': count, 'size': format_size(size)})
+
+    return 0
+
+
+def read_table(filename):
+    """
+    Reads a result table, as written with -o.
+
+    :param filename: file name
+    :return: tuple (headers, rows), the rows being lists of strings
+    """
+    with codecs.open(filename, 'r', 'utf-8') as fp:
+        lines = [line.rstrip('\r\n').split(QuickTableDumper.delimiter) for line in fp if line.strip('\r\n')]
+
+    if len(lines) == 0:
+        return [], []
+
+    return lines[0], lines[1:]
+
+
+ColumnComparison = collections.namedtuple(
+    'ColumnComparison', ['column', 'count', 'mismatches', 'maximum_absolute', 'maximum_relative'])
+
+
+def compare_tables(table_a, table_b, relative_tolerance=1e-3, absolute_tolerance=1e-6):
+    """
+    Compares two result tables (see :py:func:`read_table`) row by row, column by column. Numerical values
+    match if they are equal within the tolerances (as by :py:func:`numpy.isclose`, NaNs match each other),
+    all other values must be equal.
+
+    :param table_a: tuple (headers, rows) of the first table
+    :param table_b: tuple (headers, rows) of the second table
+    :param relative_tolerance: relative tolerance
+    :param absolute_tolerance: absolute tolerance
+    :return: list of ColumnComparison, one per column of either table
+
+    >>> a = (['length', 'tag'], [['1.0', 'x'], ['2.0', 'x']])
+    >>> b = (['length', 'tag'], [['1.0', 'x'], ['2.0001', 'y']])
+    >>> comparison = compare_tables(a, b)
+    >>> [(c.column, c.mismatches) for c in comparison]
+    [('length', 0), ('tag', 1)]
+    >>> round(comparison[0].maximum_absolute, 6)
+    0.0001
+    """
+    (headers_a, rows_a), (headers_b, rows_b) = table_a, table_b
+
+    count = min(len(rows_a), len(rows_b))
+
+    def _numeric(values):
         try:
-            table_dumper = QuickTableDumper(recipient=recipient)
+            return np.array([float(value) for value in values])
+        except ValueError:
+            return None
 
-            iterable = progress_bar(flat_results) if recipient is not sys.stdout else silent_progress_bar(flat_results)
+    result = []
 
-            for pos, k, tracking, tracker, channels in iterable:
-                analyze_tracking(tracker_to_cell_list(tracker), lambda x: table_dumper.add(x), meta=args.meta)
+    for column in sorted(set(headers_a) | set(headers_b)):
+        if column not in headers_a or column not in headers_b:
+            result.append(ColumnComparison(column, count, count, float('nan'), float('nan')))
+            continue
 
-        finally:
-            if recipient is not sys.stdout:
-                recipient.close()
+        values_a = [row[headers_a.index(column)] for row in rows_a[:count]]
+        values_b = [row[headers_b.index(column)] for row in rows_b[:count]]
+
+        numeric_a, numeric_b = _numeric(values_a), _numeric(values_b)
+
+        if numeric_a is None or numeric_b is None:
+            mismatches = sum(1 for value_a, value_b in zip(values_a, values_b) if value_a != value_b)
+            result.append(ColumnComparison(column, count, mismatches, float('nan'), float('nan')))
+            continue
+
+        close = np.isclose(numeric_a, numeric_b, rtol=relative_tolerance, atol=absolute_tolerance, equal_nan=True)
+
+        both = np.isfinite(numeric_a) & np.isfinite(numeric_b)
+        absolute = np.absolute(numeric_a - numeric_b)[both]
+        relative = absolute / np.maximum(np.absolute(numeric_b[both]), absolute_tolerance)
+
+        result.append(ColumnComparison(
+            column, count, int(np.sum(~close)),
+            float(absolute.max()) if absolute.size else 0.0,
+            float(relative.max()) if relative.size else 0.0))
+
+    return result
+
+
+def create_compare_argparser():
+    """
+
+
+    :return:
+    """
+    argparser = argparse.ArgumentParser(
+        prog="molyso compare",
+        description="molyso compare: Compares two result tables, e.g. of runs with different precisions (-pr)")
+
+    argparser.add_argument('table', metavar='table', type=str, help="result table")
+    argparser.add_argument('reference', metavar='reference', type=str, help="reference result table")
+    argparser.add_argument('-rt', '--relative-tolerance', dest='relative_tolerance', type=float, default=1e-3)
+    argparser.add_argument('-at', '--absolute-tolerance', dest='absolute_tolerance', type=float, default=1e-6)
+
+    return argparser
+
+
+def compare_main(argv):
+    """
+    Compares two result tables, prints a report of the differences per column.
+
+    :param argv: command line arguments (after 'compare')
+    :return: exit code, 0 if the tables match within the tolerances
+    """
+    args = create_compare_argparser().parse_args(argv)
+
+    table, reference = read_table(args.table), read_table(args.reference)
+
+    comparison = compare_tables(table, reference,
+                                relative_tolerance=args.relative_tolerance,
+                                absolute_tolerance=args.absolute_tolerance)
+
+    print("column\tcompared\tmismatches\tmax. absolute difference\tmax. relative difference")
+
+    for column in comparison:
+        print("%s\t%d\t%d\t%g\t%g" % column)
+
+    rows, reference_rows = len(table[1]), len(reference[1])
+    matching = rows == reference_rows and all(column.mismatches == 0 for column in comparison)
+
+    print("Rows: %d (reference: %d)" % (rows, reference_rows))
+    print("Tables %s within tolerance (relative %g, absolute %g)." % (
+        'match' if matching else 'do NOT match', args.relative_tolerance, args.absolute_tolerance))
+
+    return 0 if matching else 1
+
+
+def main():
+    """
+
+
+    :return: :raise:
+    """
+    if len(sys.argv) > 1 and sys.argv[1] == 'merge':
+        return merge_main(sys.argv[2:])
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'cache':
+        return cache_main(sys.argv[2:])
 
-        # ( Output of graphical tracking results: )#####################################################################
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        return compare_main(sys.argv[2:])
 
-        if args.tracking_output is not None:
+    argparser = create_argparser()
+
+    args = argparser.parse_args()
+
+    args.inputs = expand_inputs(args.input)
+    args.input = args.inputs[0]
+
+    if args.ground_truth or args.advanced_ground_truth:
+        args.process = True
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)-15s.%(msecs)03d %(name)s %(levelname)s %(message)s",
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    log = logging.getLogger(__name__)
+
+    if args.quiet:  # silence the progress bar filter
+        progress_bar = silent_progress_bar
+        log.setLevel(logging.WARN)
+    else:
+        progress_bar = fancy_progress_bar
+
+    if not args.nb:
+        log.info(banner())
+
+    log.info("Started analysis.")
+
+    if args.modules:
+        setup_modules(args.modules)
+
+    setup_tunables(args, log)
+
+    if sys.maxsize <= 2 ** 32:
+        log.warning("Warning, running on a 32 bit Python interpreter! This is most likely not what you want,"
+                    "and it will significantly reduce functionality!")
+
+    for hook in Hooks.main:
+        hook(args)
+
+    if not args.process:
+        setup_matplotlib(log=log)
+
+        return interactive_main(args)
 
-            setup_matplotlib(interactive=False, log=log)
+    try:
+        if not args.ground_truth:
             # noinspection PyUnresolvedReferences
             import matplotlib
-            # noinspection PyUnresolvedReferences
-            import matplotlib.pylab
 
-            log.info("Outputting graphical tracking data ...")
+            matplotlib.use('PDF')
+    except ImportError:
+        if args.debug:
+            args.debug = setup_matplotlib(throw=False, interactive=False, log=log)
+
+    if args.debug:
+        debug_init()
+        if args.mp != 0:
+            log.warning("Debugging enabled, concurrent processing disabled!")
+            args.mp = 0
+
+    if args.ground_truth or args.advanced_ground_truth:
+        args.debug = False
+
+    if args.shard is not None:
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            argparser.error(str(e))
 
-            figures_directory = os.path.abspath(args.tracking_output)
+    try:
+        parse_cache_codec(args.cache_codec)
+    except ValueError as e:
+        argparser.error(str(e))
 
-            if not os.path.isdir(figures_directory):
-                os.mkdir(figures_directory)
+    try:
+        fft_backend, fft_workers = parse_fft_backend(args.fft_backend)
+        log.info("Using the %(backend)s FFT backend (%(workers)d workers)." % {
+            'backend': set_fft_backend(fft_backend, fft_workers), 'workers': fft_workers})
+    except ValueError as e:
+        argparser.error(str(e))
 
-            if args.tracking_output_format is None:
-                args.tracking_output_format = {'pdf'}
-            else:
-                args.tracking_output_format = set(''.join(sublist) for sublist in args.tracking_output_format)
+    set_real_transforms(args.real_transforms)
 
-            for pos, k, tracking, tracker, channels in progress_bar(flat_results):
+    if args.executor not in executors:
+        argparser.error("Unknown executor \"%s\", available are: %s" % (
+            args.executor, ', '.join(sorted(executors.keys()))))
 
-                tracking_filename = "%(dir)s/tracking_pt_%(mp)02d_chan_%(k)02d" % \
-                                    {'dir': figures_directory, 'mp': pos, 'k': k}
+    if args.cache_size < 0:
+        argparser.error("The cache size must not be negative.")
 
-                cs = CallSerialization()
+    if args.chunk_length < 1:
+        argparser.error("The chunk length must be at least 1.")
 
-                plot_timeline(cs.get_proxy(), channels, tracker_to_cell_list(tracker),
-                              figure_presetup=
-                              lambda p: p.title("Channel #%02d (average cells = %.2f)" % (k, tracker.average_cells)),
-                              figure_finished=
-                              lambda p: p,
-                              show_images=True, show_overlay=True, leave_open=True)
+    if args.follow and len(args.inputs) > 1:
+        argparser.error("Only a single input can be followed (-f).")
 
-                if 'kymograph' in args.tracking_output_format:
-                    with open(tracking_filename + '.kymograph', 'wb') as fp:
-                        fp.write(cs.as_pickle)
+    if args.shared_memory_slots > 0 and len(args.inputs) > 1:
+        argparser.error("Shared memory delivery (-shm) is only available for a single input.")
 
-                if 'pdf' in args.tracking_output_format:
-                    pylab = matplotlib.pylab
-                    inject_poly_drawing_helper(pylab)
-                    cs.execute(pylab)
-                    pylab.savefig(tracking_filename + '.pdf')
-                    pylab.close('all')
+    if args.shared_memory_slots > 0 and args.follow:
+        argparser.error("Shared memory delivery (-shm) is not available when following an acquisition (-f).")
 
-                del cs
+    if args.mp < 0:
+        args.mp = multiprocessing.cpu_count()
+
+    if args.mp > 0 and args.executor != 'process':
+        log.info("Using the %(executor)s executor." % {'executor': args.executor})
+
+    if args.frame_timeout > 0:
+        if not time_limit_available():
+            log.warning("The frame time limit (-to) relies on SIGALRM, which is not available here, "
+                        "frames are not limited in time.")
+        elif args.mp > 0 and args.executor in unlimited_executors:
+            log.warning("The frame time limit (-to) can not be enforced with the %(executor)s executor, "
+                        "frames are not limited in time." % {'executor': args.executor})
+
+    if len(args.inputs) == 1:
+        for _ in process_input(args, log, progress_bar):
+            pass
+    else:
+        process_inputs(args, log, progress_bar)
+
+    if args.cache_size > 0:
+        count, size = prune_cache(args.cache_directory if args.cache_directory is not None else '.',
+                                  max_size=args.cache_size * 1024 * 1024)
+        if count > 0:
+            log.info("Evicted %(count)d cache entries (%(size)s) to keep the cache below %(limit)d MB." % {
+                'count': count, 'size': format_size(size), 'limit': args.cache_size})
 
     # ( Post-Tracking: Just write some tunables, if desired )###########################################################
 
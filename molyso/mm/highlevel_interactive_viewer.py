@@ -19,11 +19,12 @@ def interactive_main(args):
     from matplotlib.widgets import Slider
     from .image import cell_color, channel_color
 
-    from .highlevel import processing_frame, processing_setup
+    from .highlevel import processing_frame, processing_setup, prefetching_setup
 
     processing_setup(args)
+    prefetching_setup(args)
 
-    from .highlevel import ims, Dimensions
+    from .highlevel import ims, Dimensions, PrefetchingFrameSource
 
     mp_max = ims.size[Dimensions.PositionXY] - 1
     tp_max = ims.size[Dimensions.Time] - 1
@@ -68,6 +69,10 @@ def interactive_main(args):
         plt.xlabel("x [Pixel]")
         plt.ylabel("y [Pixel]")
 
+        if isinstance(ims, PrefetchingFrameSource):
+            # read the following timepoints while this one is being analyzed
+            ims.prefetch([(pos, next_t) for next_t in range(t, min(t + args.prefetch, tp_max) + 1)])
+
         i = processing_frame(args, t, pos, clean=False)
 
         if env['fluor_ind'] is not False:
@@ -135,4 +140,8 @@ def interactive_main(args):
         warnings.simplefilter('ignore')
         fig.tight_layout()
 
-    plt.show()
+    try:
+        plt.show()
+    finally:
+        if isinstance(ims, PrefetchingFrameSource):
+            ims.close()
@@ -108,24 +108,32 @@ class AutoRotationProvider(object):
         self.crop_height = 0.0
         self.crop_width = 0.0
 
-    def autorotate(self):
+    def detect_rotation(self):
+        """
+        performs automatic rotation detection of the (not yet rotated) image
+        :returns: the angle
+        """
+        return find_rotation(
+            self.image,
+            steps=tunable(
+                'orientation-detection.strips', 10,
+                description="Number of strips for orientation correction."
+            )
+        )
+
+    def autorotate(self, region=None):
         """
         performs automatic rotation detection, rotation and cropping of the image
+        :param region: None, or a (top, bottom) pair of rows of the rotated image, only these are computed
         :returns: None
         """
 
         if self.angle != self.angle:
-            self.angle = find_rotation(
-                self.image,
-                steps=tunable(
-                    'orientation-detection.strips', 10,
-                    description="Number of strips for orientation correction."
-                )
-            )
+            self.angle = self.detect_rotation()
 
         # noinspection PyAttributeOutsideInit
         self.image, self.angle, self.crop_height, self.crop_width = \
-            apply_rotate_and_cleanup(self.image, self.angle)
+            apply_rotate_and_cleanup(self.image, self.angle, rows=region)
 
         if self.image.size == 0:
             warnings.warn(
@@ -168,8 +176,11 @@ class AutoRegistrationProvider(object):
 
         :param reference:
         """
-        shift, self._fft_pair_cached = translation_2x1d(None, self.original_image, ffts_a=reference.fft_pair,
-                                                        return_b=True)
+        if getattr(self, '_fft_pair_cached', False):
+            shift, = translation_2x1d(ffts_a=reference.fft_pair, ffts_b=self._fft_pair_cached)
+        else:
+            shift, self._fft_pair_cached = translation_2x1d(None, self.original_image, ffts_a=reference.fft_pair,
+                                                            return_b=True)
 
         air = self.angle * (math.pi / 180)  # angle in rads
         asi, aco = math.sin(air), math.cos(air)
@@ -232,13 +243,14 @@ class Image(AutoRegistrationProvider, AutoRotationProvider, BaseImage):
             p.title("Input image")
             p.imshow(self.image)
 
-    def autorotate(self):
+    def autorotate(self, region=None):
         """
         performs automatic rotation detection, rotation and cropping of the image
+        :param region: None, or a (top, bottom) pair of rows of the rotated image, only these are computed
         :returns: None
         """
 
-        super(Image, self).autorotate()
+        super(Image, self).autorotate(region=region)
 
         with DebugPlot('image', 'rotated') as p:
             p.title("Rotated image")
@@ -266,6 +278,28 @@ class Image(AutoRegistrationProvider, AutoRotationProvider, BaseImage):
                 coords = chan.get_coordinates()
                 p.poly_drawing_helper(coords, lw=1, edgecolor=channel_color, fill=False, closed=True)
 
+    def channel_region(self, shift=(0.0, 0.0), padding=0):
+        """
+        returns the rows of the rotated image the channels occupy, e.g. to only process these rows
+        of further frames (see :py:meth:`autorotate`)
+        :param shift: shift of the further frame relative to this one, the rows are moved accordingly
+        :param padding: count of rows added above and below
+        :return: (top, bottom) pair of rows, or None if no channels were detected
+
+        >>> from molyso.mm.channel_detection import Channel
+        >>> image = Image()
+        >>> image.channels = [Channel(image, 10, 20, 100.0, 300.0)]
+        >>> image.channel_region(shift=(-2.2, 0.0), padding=10)
+        (92, 312)
+        """
+        if not self.channels:
+            return None
+
+        top = min(channel.real_top for channel in self.channels) - shift[0]
+        bottom = max(channel.real_bottom for channel in self.channels) - shift[0]
+
+        return int(math.floor(top + 0.5)) - padding, int(math.floor(bottom + 0.5)) + padding
+
     def find_cells_in_channels(self):
         """
         performs cell detection by calling each channels cell detection routine.
@@ -55,6 +55,10 @@ class TrackedPosition(object):
         self.cell_centroid_accumulator = {}
         self.cell_counts = {}
 
+        # state of incremental tracking, see add_time
+        self.previous_image = None
+        self.previous_channels = {}
+
     # logger is not set as a regular instance variable,
     # as it would make the serialization of the class unpleasant ...
     @property
@@ -91,6 +95,13 @@ class TrackedPosition(object):
 
             self.logger.info("Skipping channel")
 
+        self.setup_channels()
+
+    def setup_channels(self):
+        """
+        Sets up the per channel data structures, according to the channels of the first valid time point.
+
+        """
         key_list = list(range(len(self.first)))
 
         self.tracker_mapping = {c: CellTracker() for c in key_list}
@@ -115,28 +126,52 @@ class TrackedPosition(object):
             previous = image
 
             image = self.times[t]
-            alignment = previous.channels.align_with_and_return_indices(image.channels)
-            alignment_with_first = dict(image.channels.align_with_and_return_indices(self.first))
-
-            for _, current_index in alignment:
-                # ths is not perfectly right, but it's enough work with chan accumulator already
-                self.cell_counts[alignment_with_first[current_index]].append(
-                    len(image.channels.channels_list[current_index].cells))
-
-                centroid_accumulator = self.cell_centroid_accumulator[alignment_with_first[current_index]]
-                for cell in image.channels.channels_list[current_index].cells:
-                    centroid = int(round(cell.centroid_1d))
-                    if centroid in centroid_accumulator:
-                        centroid_accumulator[centroid] += 1
-                    else:
-                        centroid_accumulator[centroid] = 1
-
-                if t not in self.channel_accumulator[alignment_with_first[current_index]]:
-                    self.channel_accumulator[alignment_with_first[current_index]][t] = image.channels.channels_list[
-                        current_index]
+
+            self.align_image(previous, image, t)
 
             ignorant_next(progress_indicator)
 
+        self.finish_channel_accumulator()
+
+    def align_image(self, previous, image, t):
+        """
+        Aligns the channels of one image with the previous one, and accumulates them.
+
+        :param previous: previous image
+        :param image: image
+        :param t: time point of the image
+        :return: list of the channel numbers which were accumulated for this time point
+        """
+        alignment = previous.channels.align_with_and_return_indices(image.channels)
+        alignment_with_first = dict(image.channels.align_with_and_return_indices(self.first))
+
+        accumulated = []
+
+        for _, current_index in alignment:
+            # ths is not perfectly right, but it's enough work with chan accumulator already
+            self.cell_counts[alignment_with_first[current_index]].append(
+                len(image.channels.channels_list[current_index].cells))
+
+            centroid_accumulator = self.cell_centroid_accumulator[alignment_with_first[current_index]]
+            for cell in image.channels.channels_list[current_index].cells:
+                centroid = int(round(cell.centroid_1d))
+                if centroid in centroid_accumulator:
+                    centroid_accumulator[centroid] += 1
+                else:
+                    centroid_accumulator[centroid] = 1
+
+            if t not in self.channel_accumulator[alignment_with_first[current_index]]:
+                self.channel_accumulator[alignment_with_first[current_index]][t] = image.channels.channels_list[
+                    current_index]
+                accumulated.append(alignment_with_first[current_index])
+
+        return accumulated
+
+    def finish_channel_accumulator(self):
+        """
+        Converts the per channel accumulated time points into lists ordered by time.
+
+        """
         for index in self.channel_accumulator.keys():
             self.channel_accumulator[index] = [self.channel_accumulator[index][n]
                                                for n in sorted(self.channel_accumulator[index].keys())]
@@ -234,6 +269,93 @@ class TrackedPosition(object):
                 del self.channel_accumulator[k]
                 del self.cell_counts[k]
 
+    def add_time(self, t, image):
+        """
+        Adds one time point, aligning and tracking it incrementally, *e.g.* while the acquisition is still running.
+        Time points must be added in ascending order, and the position must be finished with
+        :py:meth:`finish_incremental` afterwards. The result is the same as if all time points had been
+        processed at once.
+
+        :param t: time point
+        :param image: image of the time point
+        """
+        if self.times is None:
+            self.times = {}
+
+        if image.flattened:
+            image.unflatten()
+
+        self.times[t] = image
+        self.timeslist.append(t)
+
+        if self.previous_image is None:
+            if len(image.channels) == 0:
+                self.logger.info("Skipping channel")
+                self.n += 1
+                return
+
+            self.first = image.channels
+            self.setup_channels()
+
+            self.previous_image = image
+
+        for c in self.align_image(self.previous_image, image, t):
+            current = self.channel_accumulator[c][t]
+
+            if c in self.previous_channels:
+                tracker = self.tracker_mapping[c]
+                tracker.tick()
+                analyse_cell_fates(tracker, self.previous_channels[c].cells, current.cells)
+
+            self.previous_channels[c] = current
+
+        self.previous_image = image
+
+    def finish_incremental(self):
+        """
+        Finishes a position which was tracked incrementally via :py:meth:`add_time`.
+
+        :return:
+        """
+        if self.previous_image is None:
+            # no time point with channels, mirror find_first_valid_time
+            self.n = max(0, len(self.timeslist) - 1)
+            self.first = self.times[self.timeslist[-1]].channels if len(self.timeslist) > 0 else []
+            self.setup_channels()
+
+        self.finish_channel_accumulator()
+        self.remove_empty_channels()
+        self.guess_channel_orientation()
+        self.remove_empty_channels_post_tracking()
+
+        self.previous_image = None
+        self.previous_channels = {}
+
+        return self
+
+    def channel_images(self):
+        """
+        Returns the kept channel images (and fluorescence channel images) of the position's channels,
+        *e.g.* to be stored separately from the remaining data.
+
+        :return: list of arrays
+        """
+        images = []
+
+        for image in (self.times or {}).values():
+            if image.channels is None:
+                continue
+
+            for channel in image.channels:
+                if getattr(channel, 'channel_image', None) is not None:
+                    images.append(channel.channel_image)
+
+                for fluorescence_image in getattr(channel, 'fluorescences_channel_image', None) or []:
+                    if fluorescence_image is not None:
+                        images.append(fluorescence_image)
+
+        return images
+
     def perform_everything(self, times):
         """
 
@@ -307,6 +307,17 @@ def get_object_unique_id(obj):
     return _unique_id_cache[id(obj)]
 
 
+def reset_object_unique_ids():
+    """
+    Resets the unique ids, so that the numbering of a new output starts anew.
+
+    """
+    global _unique_id_cache, _unique_id_value
+
+    _unique_id_cache = {}
+    _unique_id_value = 1
+
+
 def analyze_tracking(cells, receptor, meta=None):
     """
 
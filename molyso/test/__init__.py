@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """
-The test module at the time only contains a function to get a :py:func:`test_image`.
-If called, it will run the doctests.
+The test module contains a function to get a :py:func:`test_image`, helpers to write test stacks
+and run molyso on them, as well as the unit tests (test_*.py). If called, it will run the doctests and unit tests.
 
 .. code-block:: bash
 
@@ -9,9 +9,13 @@ If called, it will run the doctests.
 
 """
 import os
+import subprocess
+import sys
 
 import warnings
 
+import numpy as np
+
 with warnings.catch_warnings():
     warnings.simplefilter('ignore')
     # code tend to throw warnings because of missing C extensions
@@ -35,3 +39,76 @@ def test_image():
 
     return _test_image
 
+
+def write_test_stack(filename, positions=1, timepoints=4, fluorescence=False, seed=0):
+    """
+    Writes a test stack of the test image, randomly shifted and rotated from frame to frame, with noise added.
+
+    :param filename: file name of the TIFF file
+    :param positions: count of positions
+    :param timepoints: count of timepoints
+    :param fluorescence: whether to add a fluorescence channel
+    :param seed: seed of the random variations
+    """
+    from scipy import ndimage
+
+    random = np.random.RandomState(seed)
+
+    image = test_image().astype(np.float64)
+
+    stack = np.zeros((positions, timepoints, 2 if fluorescence else 1) + image.shape, dtype=np.uint16)
+
+    for pos in range(positions):
+        position_image = ndimage.shift(image, random.uniform(-5, 5, 2), order=1, mode='nearest')
+
+        for t in range(timepoints):
+            frame = ndimage.rotate(position_image, random.uniform(-0.4, 0.4), reshape=False, order=1, mode='nearest')
+            frame = ndimage.shift(frame, random.uniform(-2, 2, 2), order=1, mode='nearest')
+            stack[pos, t, 0] = np.clip(frame * (1 + 0.05 * t) * 40 + random.normal(0, 60, image.shape) + 500, 0, 65535)
+
+            if fluorescence:
+                stack[pos, t, 1] = np.clip(
+                    ndimage.gaussian_filter(255 - position_image, 2) * (5 + t) +
+                    random.normal(0, 20, image.shape) + 300, 0, 65535)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        from tifffile import imwrite
+
+    imwrite(filename, stack, metadata={'axes': 'RTCYX'})
+
+
+def run_molyso(*arguments):
+    """
+    Runs molyso (in a separate process, as it changes global state).
+
+    :param arguments: command line arguments
+    :raises RuntimeError: if molyso failed
+    """
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))] +
+        ([environment['PYTHONPATH']] if environment.get('PYTHONPATH') else []))
+
+    process = subprocess.Popen([sys.executable, '-m', 'molyso'] + list(arguments), env=environment,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, errors = process.communicate()
+
+    if process.returncode != 0:
+        raise RuntimeError("molyso %s failed:\n%s" % (' '.join(arguments), errors.decode('utf-8', 'replace')))
+
+
+def analyze(filename, *arguments):
+    """
+    Analyzes a test stack (without caching) and returns the result table.
+
+    :param filename: file name of the test stack
+    :param arguments: further command line arguments
+    :return: result table as string
+    """
+    table = '%s.%d.tsv' % (filename, len(os.listdir(os.path.dirname(os.path.abspath(filename)))))
+
+    run_molyso(filename, '-p', '-nb', '-q', '-nc', '-o', table, *arguments)
+
+    with open(table) as fp:
+        return fp.read()
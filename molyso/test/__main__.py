@@ -1,34 +1,35 @@
 # -*- coding: utf-8 -*-
 """
-The test module's __main__ contains the main() function to run the doctests.
+The test module's __main__ contains the main() function to run the doctests and unit tests.
 """
 
+import os
 import sys
 import doctest
+import unittest
 
 
 def main():
     """
-    Runs all the doctests.
+    Runs all the doctests and unit tests.
 
     """
     import molyso.generic.etc
+    import molyso.generic.executor
     import molyso.generic.fft
+    import molyso.generic.precision
     import molyso.generic.registration
     import molyso.generic.rotation
+    import molyso.generic.shared_memory
     import molyso.generic.signal
     import molyso.generic.smoothing
     import molyso.generic.tunable
 
-    import molyso.imageio.imagestack
-    import molyso.imageio.imagestack_ometiff
-    import molyso.imageio.imagestack_czi
-    import molyso.imageio.imagestack_nd2
-
     import molyso.debugging.debugplot
 
     import molyso.mm.cell_detection
     import molyso.mm.channel_detection
+    import molyso.mm.columnar
     import molyso.mm.fluorescence
     import molyso.mm.highlevel
     import molyso.mm.highlevel_interactive_ground_truth
@@ -39,26 +40,22 @@ def main():
     import molyso.mm.tracking_output
 
     modules_to_test = [
-        molyso.generic.rotation,
-        #
         molyso.generic.etc,
+        molyso.generic.executor,
         molyso.generic.fft,
-        #
+        molyso.generic.precision,
         molyso.generic.registration,
         molyso.generic.rotation,
+        molyso.generic.shared_memory,
         molyso.generic.signal,
         molyso.generic.smoothing,
         molyso.generic.tunable,
         #
-        molyso.imageio.imagestack,
-        molyso.imageio.imagestack_ometiff,
-        molyso.imageio.imagestack_czi,
-        molyso.imageio.imagestack_nd2,
-        #
         molyso.debugging.debugplot,
         #
         molyso.mm.cell_detection,
         molyso.mm.channel_detection,
+        molyso.mm.columnar,
         molyso.mm.fluorescence,
         molyso.mm.highlevel,
         molyso.mm.highlevel_interactive_ground_truth,
@@ -76,9 +73,15 @@ def main():
         total_failures += failures
         total_tests += tests
 
-    print("Run %d tests in total." % (total_tests,))
+    print("Run %d doctests in total." % (total_tests,))
+
+    unit_tests = unittest.defaultTestLoader.discover(
+        os.path.dirname(os.path.abspath(__file__)),
+        top_level_dir=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+    result = unittest.TextTestRunner().run(unit_tests)
 
-    if total_failures > 0:
+    if total_failures > 0 or not result.wasSuccessful():
         print("Test failures occurred, exiting with non-zero status.")
         sys.exit(1)
 
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the cache: values round trip with every codec, in chunks and with external arrays, pruning,
+and the memory budget spilling results to it.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..generic.etc import Sqlite3Cache, cache_codecs, prune_cache
+from ..mm.highlevel import MemoryBudget, Spilled, load_position, cache_stage_digests
+from . import write_test_stack
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.conn.close()
+            cache.conn = None
+        shutil.rmtree(self.directory)
+
+    def open_cache(self, name, codec='none'):
+        cache = Sqlite3Cache('file', cache_token=os.path.join(self.directory, name), codec=codec)
+        self.caches.append(cache)
+        return cache
+
+    def test_round_trip(self):
+        value = {'small': [1, 2.5, 'three'], 'large': np.random.RandomState(0).normal(size=(64, 64))}
+
+        for codec in ['none'] + sorted(cache_codecs.keys()):
+            cache = self.open_cache(codec, codec=codec)
+            # large values are stored in multiple chunks
+            cache.chunk_size = 1024
+
+            cache['key', 1] = value
+            self.assertGreater(cache.conn.execute('SELECT COUNT(*) FROM chunks').fetchone()[0], 1, codec)
+
+            cache['small'] = 42
+
+            self.assertTrue(('key', 1) in cache)
+            self.assertFalse(('key', 2) in cache)
+
+            loaded = cache['key', 1]
+            self.assertEqual(loaded['small'], value['small'], codec)
+            np.testing.assert_array_equal(loaded['large'], value['large'])
+            self.assertEqual(cache['small'], 42, codec)
+
+            # the codec is recorded with each value, hence values are read regardless of the cache's codec
+            other = self.open_cache(codec, codec='none')
+            np.testing.assert_array_equal(other['key', 1]['large'], value['large'])
+
+            # replacing a chunked value with a small one removes its chunks
+            cache['key', 1] = 0
+            self.assertEqual(cache['key', 1], 0)
+            self.assertEqual(cache.conn.execute('SELECT COUNT(*) FROM chunks').fetchone()[0], 0, codec)
+
+    def test_external(self):
+        cache = self.open_cache('external', codec='zlib')
+
+        array = np.arange(1000, dtype=np.uint16).reshape(10, 100)
+        value = {'array': array, 'view': array[2:4], 'other': 'value'}
+
+        size = cache.store('key', value, external=[array, value['view']])
+
+        self.assertGreater(size, 0)
+        self.assertTrue(os.path.isfile(cache.external_filename('key')))
+
+        loaded = cache['key']
+        self.assertIsInstance(loaded['array'], np.memmap)
+        np.testing.assert_array_equal(loaded['array'], array)
+        np.testing.assert_array_equal(loaded['view'], array[2:4])
+        self.assertEqual(loaded['other'], 'value')
+
+        # the mapping is copy-on-write
+        loaded['array'][0, 0] = 1234
+        np.testing.assert_array_equal(cache['key']['array'], array)
+
+        del cache['key']
+        self.assertFalse('key' in cache)
+        self.assertFalse(os.path.isfile(cache.external_filename('key')))
+
+    def test_ignored(self):
+        cache = Sqlite3Cache('file', cache_token=os.path.join(self.directory, 'ignored'), ignore_cache='tracking')
+        self.caches.append(cache)
+
+        self.assertEqual(cache.store(('tracking', 0), 1), 0)
+        self.assertFalse(('tracking', 0) in cache)
+        self.assertGreater(cache.store(('imageanalysis', 0), 1), 0)
+
+    def test_prune(self):
+        first, second = self.open_cache('first'), self.open_cache('second')
+
+        for cache in [first, second]:
+            for n in range(3):
+                cache['entry', n] = np.zeros(1000, dtype=np.uint8)
+                # the entries are accessed in order of their numbers, those of the first cache first
+                cache.conn.execute('UPDATE entries SET accessed = ? WHERE name = ?',
+                                   ((0 if cache is first else 10) + n, cache.prepare_key(('entry', n))))
+                cache.conn.commit()
+
+        size = sum(entry[1] for entry in first.entries() + second.entries())
+
+        count, evicted_size = prune_cache(self.directory, max_size=size // 2)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(evicted_size, size // 2)
+        self.assertEqual(first.keys(), [])
+        self.assertEqual(sorted(second.keys()), [second.prepare_key(('entry', n)) for n in range(3)])
+
+        self.assertEqual(prune_cache(self.directory, max_age=0), (3, size // 2))
+        self.assertEqual(second.keys(), [])
+
+    def test_memory_budget(self):
+        cache = self.open_cache('budget')
+
+        value = np.zeros(1000, dtype=np.uint8)
+        size = cache.store('size', value)
+
+        memory_budget = MemoryBudget(cache, int(2.5 * size))
+        results = {0: {}, 1: {}}
+
+        for t in range(3):
+            memory_budget.checkpoint(results, 0, t, value)
+
+        # the third result exceeds the budget
+        self.assertEqual([isinstance(results[0][t], Spilled) for t in range(3)], [False, False, True])
+        self.assertEqual(memory_budget.resident, 2 * size)
+
+        # once a position is released, its share of the budget is available again
+        memory_budget.release(results, 0)
+        self.assertEqual(memory_budget.resident, 0)
+        self.assertTrue(all(isinstance(result, Spilled) for result in results[0].values()))
+
+        for t in range(2):
+            memory_budget.checkpoint(results, 1, t, value)
+
+        self.assertFalse(any(isinstance(result, Spilled) for result in results[1].values()))
+
+        loaded = load_position(cache, 0, results[0])
+        for t in range(3):
+            np.testing.assert_array_equal(loaded[t], value)
+
+    def test_growing_input(self):
+        filename = os.path.join(self.directory, 'stack.tif')
+
+        def _digests(timepoints, seed=0):
+            write_test_stack(filename, timepoints=timepoints, seed=seed)
+            return cache_stage_digests(argparse.Namespace(
+                input=filename, keepchan=False, keepfluorchan=False, channel_bits=np.uint8,
+                channel_fluorescence_bits=np.float32, detect_once=False, rotation_interval=0, channel_region=False,
+                precision='float64', real_transforms=False, modules=None), {})
+
+        # results cached while an acquisition grows (e.g. with -f) are used once it finished
+        self.assertEqual(_digests(2), _digests(4))
+        # but not for another acquisition written to the same file
+        self.assertNotEqual(_digests(4), _digests(4, seed=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of processing only the channel region (-cr), which must yield the same results as processing whole frames,
+up to the rounding of the rotation (OpenCV interpolates the rotated rows in other blocks than the whole frame).
+"""
+from __future__ import division, unicode_literals, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from . import write_test_stack, analyze
+from ..generic.rotation import rotate_image, rotate_image_rows, apply_rotate_and_cleanup
+from ..mm.highlevel import compare_tables
+
+
+def parse_table(table):
+    lines = [line.split('\t') for line in table.splitlines() if line]
+    return lines[0], lines[1:]
+
+
+class RotateRowsTestCase(unittest.TestCase):
+    def test_rows_equal_full_rotation(self):
+        image = np.random.RandomState(0).rand(200, 150).astype(np.float32)
+
+        for angle in [-2.5, 0.0, 0.7, 3.0]:
+            full = rotate_image(image, angle)
+
+            for top, bottom in [(0, 200), (13, 77), (150, 200)]:
+                # the values of the image are within [0, 1)
+                np.testing.assert_allclose(rotate_image_rows(image, angle, top, bottom), full[top:bottom],
+                                           rtol=0, atol=1e-4)
+
+    def test_cleanup_rows(self):
+        image = np.random.RandomState(1).rand(120, 100)
+
+        full, angle, height, width = apply_rotate_and_cleanup(image, 1.5)
+        partial, partial_angle, partial_height, partial_width = apply_rotate_and_cleanup(image, 1.5, rows=(-5, 40))
+
+        self.assertEqual((angle, height, width), (partial_angle, partial_height, partial_width))
+        self.assertEqual(full.shape, partial.shape)
+        np.testing.assert_allclose(full[:40], partial[:40], rtol=0, atol=1e-4)
+        self.assertFalse(partial[40:].any())
+
+
+class ChannelRegionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_same_results(self):
+        for fluorescence in [False, True]:
+            filename = os.path.join(self.directory, 'stack_%d.tif' % fluorescence)
+            write_test_stack(filename, positions=2, timepoints=4, fluorescence=fluorescence)
+
+            region = parse_table(analyze(filename, '-cpu', '0', '-cr'))
+            full = parse_table(analyze(filename, '-cpu', '0'))
+
+            self.assertEqual(len(region[1]), len(full[1]))
+
+            for comparison in compare_tables(region, full, relative_tolerance=1e-5, absolute_tolerance=1e-6):
+                self.assertEqual(comparison.mismatches, 0, comparison)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the processing modes, which must all yield the same results as processing serially.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from . import write_test_stack, analyze, run_molyso
+from ..generic.shared_memory import SharedMemoryRing
+
+
+class ExecutorsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'stack.tif')
+        write_test_stack(self.filename, positions=3, timepoints=5, fluorescence=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameResults(self, reference, *arguments):
+        self.assertEqual(analyze(self.filename, *arguments), reference, ' '.join(arguments))
+
+    def test_executors(self):
+        reference = analyze(self.filename, '-cpu', '0')
+
+        for executor in ['process', 'thread', 'serial']:
+            self.assertSameResults(reference, '-cpu', '2', '-ex', executor)
+
+    def test_modes(self):
+        reference = analyze(self.filename, '-cpu', '0')
+
+        self.assertSameResults(reference, '-cpu', '0', '-pf', '0')
+        self.assertSameResults(reference, '-cpu', '2', '-pl')
+
+        if SharedMemoryRing.available:
+            self.assertSameResults(reference, '-cpu', '2', '-shm', '3')
+            self.assertSameResults(reference, '-cpu', '2', '-shm', '3', '-pl')
+
+    def test_chunk_length(self):
+        reference = analyze(self.filename, '-cpu', '0')
+
+        for chunk_length in ['1', '3']:
+            self.assertSameResults(reference, '-cpu', '2', '-cl', chunk_length)
+
+    def test_rotation_interval(self):
+        # the reused angles only depend on the timepoint, not on which frames a worker processed before
+        reference = analyze(self.filename, '-cpu', '0', '-ri', '2')
+
+        self.assertSameResults(reference, '-cpu', '2', '-ri', '2')
+        self.assertSameResults(reference, '-cpu', '2', '-ex', 'thread', '-ri', '2')
+
+        if SharedMemoryRing.available:
+            self.assertSameResults(reference, '-cpu', '2', '-shm', '3', '-ri', '2')
+
+
+    def test_incompatible_options(self):
+        other = os.path.join(self.directory, 'other.tif')
+        write_test_stack(other, positions=1, timepoints=2)
+
+        # rejected before any analysis, instead of being ignored during the run
+        with self.assertRaisesRegex(RuntimeError, "single input"):
+            run_molyso(self.filename, other, '-p', '-nb', '-q', '-nc', '-cpu', '2', '-shm', '3')
+        with self.assertRaisesRegex(RuntimeError, "single input"):
+            run_molyso(self.filename, other, '-p', '-nb', '-q', '-nc', '-f')
+        with self.assertRaisesRegex(RuntimeError, "following"):
+            run_molyso(self.filename, '-p', '-nb', '-q', '-nc', '-cpu', '2', '-shm', '3', '-f')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the phase correlation by real transforms (-rfft), which must match the complex transforms used by default.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import unittest
+
+import numpy as np
+
+from ..generic.fft import fft, ifft, rfft, irfft, set_fft_backend, set_real_transforms
+from ..generic.signal import find_phase, find_consecutive_phases
+
+
+class RealTransformsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = np.random.RandomState(0)
+
+    def tearDown(self):
+        set_real_transforms(False)
+        set_fft_backend('numpy')
+
+    def signals(self, length, dtype):
+        signal = np.cumsum(self.random.normal(size=length))
+        # circularly shifted copies with some noise, so that the correlation maximum is unambiguous
+        return np.array([np.roll(signal, shift) + self.random.normal(0, 0.1, length)
+                         for shift in self.random.randint(-length // 3, length // 3, 8)], dtype=dtype)
+
+    def test_correlation(self):
+        for backend in ['numpy', 'scipy']:
+            set_fft_backend(backend)
+            for length in [63, 64, 100]:
+                a, b = self.signals(length, np.float64)[:2]
+
+                complex_correlation = ifft(fft(a) * fft(b).conjugate())
+                real_correlation = irfft(rfft(a) * rfft(b).conjugate(), n=length)
+
+                self.assertEqual(real_correlation.shape, (length,))
+                np.testing.assert_allclose(real_correlation, complex_correlation.real, rtol=1e-9, atol=1e-9)
+
+    def test_phases(self):
+        for backend in ['numpy', 'scipy']:
+            set_fft_backend(backend)
+            for length in [63, 64, 100]:
+                for dtype in [np.float32, np.float64]:
+                    signals = self.signals(length, dtype)
+
+                    set_real_transforms(False)
+                    shifts = [find_phase(a, b) for a, b in zip(signals[:-1], signals[1:])]
+                    consecutive = find_consecutive_phases(signals)
+
+                    set_real_transforms(True)
+                    self.assertEqual([find_phase(a, b) for a, b in zip(signals[:-1], signals[1:])], shifts)
+                    np.testing.assert_array_equal(find_consecutive_phases(signals), consecutive)
+
+                    np.testing.assert_array_equal(consecutive, [shift for shift, in shifts])
+
+    def test_kept_transforms(self):
+        # transforms which are returned (e.g. kept for registration) remain complex ones of the whole signal
+        a, b = self.signals(64, np.float64)[:2]
+
+        set_real_transforms(True)
+        _, fft_a, fft_b = find_phase(a, b, return_1=True, return_2=True)
+
+        self.assertEqual(fft_a.shape, (64,))
+        np.testing.assert_allclose(fft_b, fft(b))
+
+
+if __name__ == '__main__':
+    unittest.main()
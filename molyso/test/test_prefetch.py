@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of reading frames ahead: the background thread and its image stack are released once closed.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from . import write_test_stack
+from ..generic.etc import Prefetcher
+from ..mm.highlevel import PrefetchingFrameSource, open_image_stack
+
+
+class PrefetcherTestCase(unittest.TestCase):
+    def test_close(self):
+        read = []
+
+        prefetcher = Prefetcher(lambda key: read.append(key) or key * 2, depth=2)
+        prefetcher.prefetch(range(10))
+
+        self.assertEqual(prefetcher.get(0), 0)
+
+        # the thread is stopped, even while it waits for read items to be requested
+        prefetcher.close()
+        self.assertFalse(prefetcher.thread.is_alive())
+
+        # nothing is read anymore, requests yield the default
+        count = len(read)
+        self.assertEqual(prefetcher.get(5, 'default'), 'default')
+        prefetcher.prefetch([7, 8])
+        self.assertEqual(prefetcher.get(7), None)
+        self.assertEqual(len(read), count)
+
+
+class PrefetchingFrameSourceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'stack.tif')
+        write_test_stack(self.filename, positions=2, timepoints=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_close(self):
+        threads = threading.active_count()
+
+        stack = open_image_stack(self.filename)
+        source = PrefetchingFrameSource(self.filename, stack, depth=2)
+        source.prefetch([(pos, t) for t in range(3) for pos in range(2)])
+
+        for t in range(3):
+            for pos in range(2):
+                np.testing.assert_array_equal(source[pos, t, 0], stack[pos, t, 0])
+
+        self.assertIsNotNone(source.prefetch_stack)
+
+        source.close()
+
+        self.assertEqual(threading.active_count(), threads)
+        self.assertIsNone(source.prefetch_stack)
+
+        # frames are still read, directly
+        np.testing.assert_array_equal(source[1, 2, 0], stack[1, 2, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of how frames are split into tasks for the worker pool, and how their results are collected.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import argparse
+import unittest
+
+from unittest import mock
+
+from ..generic.executor import SerialResult
+from ..mm import highlevel
+from ..mm.highlevel import position_affine_chunks, position_affine_tasks, processing_chunk_task, bounded_imap
+
+
+class DeferredResult(object):
+    def __init__(self, pool, value):
+        self.pool = pool
+        self.value = value
+
+    def get(self):
+        self.pool.outstanding -= 1
+        return self.value
+
+
+class DeferredPool(object):
+    """
+    Pool whose results are only computed once requested, keeping track of the outstanding ones.
+    """
+    def __init__(self):
+        self.outstanding = 0
+        self.maximum_outstanding = 0
+
+    def apply_async(self, function, args=()):
+        self.outstanding += 1
+        self.maximum_outstanding = max(self.maximum_outstanding, self.outstanding)
+        return DeferredResult(self, function(*args))
+
+
+class WorkersPool(object):
+    """
+    Pool of simulated workers, each with a first frame cache of its own, which are handed the tasks in turn.
+    """
+    def __init__(self, workers):
+        self.first_frame_caches = [{} for _ in range(workers)]
+        self.handed = 0
+
+    def run(self, function, task):
+        first_frame_cache = self.first_frame_caches[self.handed % len(self.first_frame_caches)]
+        self.handed += 1
+        with mock.patch.object(highlevel, 'first_frame_cache', first_frame_cache):
+            return function(task)
+
+    def apply_async(self, function, args=()):
+        return SerialResult(value=self.run(function, *args))
+
+    def imap_unordered(self, function, iterable):
+        for task in iterable:
+            yield self.run(function, task)
+
+
+def covered(chunks):
+    return sorted((pos, t) for pos, timepoints in chunks for t in timepoints)
+
+
+class PositionAffineChunksTestCase(unittest.TestCase):
+    work = {0: list(range(10)), 1: list(range(3, 10)), 2: [0, 5, 7], 3: []}
+
+    def test_coverage(self):
+        expected = sorted((pos, t) for pos, timepoints in self.work.items() for t in timepoints)
+
+        for workers in [1, 2, 3, 8, 32]:
+            chunks = position_affine_chunks(self.work, workers)
+
+            self.assertEqual(covered(chunks), expected)
+
+            # chunks are ordered by position, each one a contiguous, ordered part of its position's timepoints
+            self.assertEqual([pos for pos, _ in chunks], sorted(pos for pos, _ in chunks))
+            for pos, timepoints in chunks:
+                self.assertGreater(len(timepoints), 0)
+                start = self.work[pos].index(timepoints[0])
+                self.assertEqual(self.work[pos][start:start + len(timepoints)], timepoints)
+
+    def test_affinity(self):
+        # with enough positions to keep all workers busy, positions are not split
+        self.assertEqual(position_affine_chunks(self.work, 1, chunks_per_worker=2),
+                         [(pos, self.work[pos]) for pos in [0, 1, 2]])
+        # otherwise they are split into about as many chunks as desired
+        self.assertEqual(len(position_affine_chunks({0: list(range(96))}, 4, chunks_per_worker=4)), 16)
+        self.assertEqual(position_affine_chunks({0: []}, 4), [])
+
+    def test_length(self):
+        # a single position with few workers is split into chunks of bounded length, as evenly as possible
+        for max_length in [1, 5, 16]:
+            chunks = position_affine_chunks({0: list(range(100))}, 1, chunks_per_worker=1, max_length=max_length)
+
+            self.assertEqual(covered(chunks), [(0, t) for t in range(100)])
+            self.assertLessEqual(max(len(timepoints) for _, timepoints in chunks), max_length)
+            self.assertLessEqual(max(len(timepoints) for _, timepoints in chunks) -
+                                 min(len(timepoints) for _, timepoints in chunks), 1)
+
+
+class PositionAffineTasksTestCase(unittest.TestCase):
+    def test_first_frame_analyzed_once(self):
+        args = argparse.Namespace(frame_timeout=0)
+
+        analyzed = []
+
+        def _analyze_first_frame(pos, _args):
+            analyzed.append(pos)
+            return 'first frame of %d' % pos
+
+        def _processing_frame(_args, t, pos):
+            return t, highlevel.check_or_get_first_frame(pos, _args)
+
+        work = {pos: list(range(1000)) for pos in range(60)}
+
+        with mock.patch.object(highlevel, 'select_input', lambda _args: None), \
+                mock.patch.object(highlevel, 'analyze_first_frame', _analyze_first_frame), \
+                mock.patch.object(highlevel, 'processing_frame', _processing_frame):
+            for workers in [1, 16]:
+                del analyzed[:]
+
+                pool = WorkersPool(workers)
+                chunks = position_affine_chunks(work, workers)
+
+                frame_results = [frame_result
+                                 for chunk_results in pool.imap_unordered(
+                                     processing_chunk_task, position_affine_tasks(args, pool, chunks))
+                                 for frame_result in chunk_results]
+
+                # each position's first frame is analyzed once, although its chunks are spread over all workers
+                self.assertEqual(sorted(analyzed), sorted(work.keys()))
+                self.assertEqual(sorted((pos, t) for t, pos, _, _ in frame_results), covered(chunks))
+                for t, pos, result, error in frame_results:
+                    self.assertIsNone(error)
+                    self.assertEqual(result, (t, 'first frame of %d' % pos))
+
+        # positions whose first frame was analyzed by an earlier call are not analyzed again
+        references = {0: SerialResult(value='first frame of 0')}
+        pool = WorkersPool(4)
+        with mock.patch.object(highlevel, 'reference_task', lambda task: self.fail()):
+            self.assertEqual([task[3] for task in position_affine_tasks(args, pool, [(0, [0]), (0, [1])], references)],
+                             ['first frame of 0'] * 2)
+
+
+class BoundedImapTestCase(unittest.TestCase):
+    def test_order_and_bound(self):
+        for bound in [1, 2, 5, 100]:
+            pool = DeferredPool()
+
+            taken = []
+
+            def _tasks():
+                for n in range(20):
+                    taken.append(n)
+                    yield n
+
+            results = []
+
+            for result in bounded_imap(pool, lambda n: n * 2, _tasks(), bound):
+                # tasks are only taken from the iterable as results are collected
+                self.assertLessEqual(len(taken), len(results) + bound + 1)
+                results.append(result)
+
+            self.assertEqual(results, [n * 2 for n in range(20)])
+            self.assertLessEqual(pool.maximum_outstanding, bound)
+            self.assertEqual(pool.outstanding, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
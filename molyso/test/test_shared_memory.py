@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the delivery of frames via shared memory (-shm): every frame is read once, in acquisition order.
+"""
+from __future__ import division, unicode_literals, print_function
+
+import argparse
+import collections
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+
+import numpy as np
+
+from pilyso_io.imagestack import Dimensions
+
+from . import write_test_stack
+from ..mm import highlevel
+from ..mm.highlevel import shared_memory_blocks, shared_memory_reader, shared_memory_tasks, frame_references, \
+    reference_slots, shared_memory_reference_task, shared_memory_chunk_task, FrameSource, create_argparser, \
+    process_input, silent_progress_bar
+from ..generic.shared_memory import SharedMemoryRing
+from .test_scheduling import WorkersPool
+
+
+class FakeRing(object):
+    def __init__(self):
+        self.acquired = 0
+        self.pinned = {}
+
+    def acquire(self):
+        self.acquired += 1
+        return self.acquired - 1
+
+    @staticmethod
+    def slot(_):
+        return np.zeros((1, 2, 2))
+
+    def pin(self, slot, users):
+        self.pinned[slot] = users
+
+    def unpin(self, slot):
+        self.pinned[slot] -= 1
+
+    peek = read = slot
+
+    def close(self):
+        pass
+
+
+class FakeStack(object):
+    size = {Dimensions.Channel: 1}
+
+
+class ReadyList(list):
+    put = list.append
+
+    def get(self, timeout=None):
+        return self.pop(0)
+
+
+def arguments(rotation_interval=0, detect_once=False, chunk_length=16):
+    return argparse.Namespace(timepoints=list(range(2, 20)), rotation_interval=rotation_interval,
+                              detect_once=detect_once, chunk_length=chunk_length, mp=2, frame_timeout=0)
+
+
+class SharedMemoryBlocksTestCase(unittest.TestCase):
+    work = {0: list(range(2, 20)), 1: list(range(5, 20)), 2: [2, 9, 15, 16], 3: []}
+
+    def test_blocks(self):
+        expected = sorted((pos, t) for pos, timepoints in self.work.items() for t in timepoints)
+
+        for rotation_interval in [0, 1, 4]:
+            for detect_once in [False, True]:
+                for slots in [1, 3, 7, 100]:
+                    args = arguments(rotation_interval, detect_once, chunk_length=3)
+
+                    blocks = shared_memory_blocks(args, self.work, slots)
+
+                    chunks = [chunk for block in blocks for chunk in block if chunk[1] is not None]
+
+                    self.assertEqual(sorted((pos, t) for pos, timepoints, _ in chunks for t in timepoints), expected)
+
+                    # each position's first frame is announced once, before its chunks
+                    firsts = [(pos, references) for block in blocks for pos, timepoints, references in block
+                              if timepoints is None]
+                    self.assertEqual(sorted(firsts), [(pos, [2]) for pos in [0, 1, 2]])
+
+                    for pos, _ in firsts:
+                        announced = [timepoints for block in blocks for p, timepoints, _ in block if p == pos]
+                        self.assertIsNone(announced[0])
+
+                    reference_keys = set((pos, r) for pos, t in expected for r in frame_references(args, t))
+                    reference_keys |= set((pos, 2) for pos, _ in expected)
+
+                    previous = None
+
+                    for block in blocks:
+                        keys = sorted(((pos, t) for pos, timepoints, _ in block for t in timepoints or ()),
+                                      key=lambda key: (key[1], key[0]))
+
+                        # blocks follow each other in acquisition order
+                        if previous is not None:
+                            self.assertLess((previous[1], previous[0]), (keys[0][1], keys[0][0]))
+                        previous = keys[-1]
+
+                        self.assertLessEqual(len([key for key in keys if key not in reference_keys]), slots)
+
+                        if rotation_interval > 0 and not detect_once:
+                            self.assertLess(keys[-1][1] - keys[0][1], rotation_interval)
+
+                            # the reference ring can hold the references of all positions' chunks of a block
+                            for pos in range(4):
+                                self.assertLessEqual(
+                                    len(set(r for p, _, references in block for r in references if p == pos)), 3)
+
+                        for pos, timepoints, references in block:
+                            if timepoints is None:
+                                continue
+                            self.assertLessEqual(len(timepoints), 3)
+                            # the first frame is only needed if it is processed by the chunk itself
+                            self.assertNotIn(2, set(r for t in timepoints for r in frame_references(args, t)))
+                            self.assertEqual(set(references),
+                                             set(r for t in timepoints for r in frame_references(args, t)) |
+                                             set(t for t in timepoints if (pos, t) in reference_keys))
+
+    def test_reference_slots(self):
+        self.assertEqual(reference_slots(arguments(), 5), 5)
+        self.assertEqual(reference_slots(arguments(rotation_interval=3), 5), 15)
+        self.assertEqual(reference_slots(arguments(rotation_interval=3, detect_once=True), 5), 5)
+
+
+class SharedMemoryReaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.reads = []
+
+        def _read_frame(_, pos, t):
+            self.reads.append((pos, t))
+            return [np.full((2, 2), t)], {'pos': pos, 't': t}
+
+        self.original = highlevel.open_image_stack, highlevel.read_frame
+        highlevel.open_image_stack = lambda _: FakeStack()
+        highlevel.read_frame = _read_frame
+
+    def tearDown(self):
+        highlevel.open_image_stack, highlevel.read_frame = self.original
+
+    def test_reads(self):
+        # position 1's first frame (timepoint 2) is not processed, e.g. as it was cached, but needed nevertheless
+        work = {0: list(range(2, 20)), 1: list(range(5, 20)), 2: [2, 9, 15, 16]}
+
+        for rotation_interval in [0, 5]:
+            for slots in [1, 3, 8]:
+                del self.reads[:]
+
+                args = arguments(rotation_interval)
+                blocks = shared_memory_blocks(args, work, slots)
+
+                ring, reference_ring, ready = FakeRing(), FakeRing(), ReadyList()
+
+                shared_memory_reader('file', blocks, ring, reference_ring, ready)
+
+                needed = set((pos, t) for pos, timepoints in work.items() for t in timepoints)
+                needed |= set((pos, r) for pos, t in list(needed) for r in frame_references(args, t))
+                needed |= set((pos, 2) for pos in work.keys())
+
+                # every frame is read exactly once
+                self.assertEqual(sorted(self.reads), sorted(needed))
+
+                # the frames to process are read in acquisition order
+                processed = [key for key in self.reads if t_in(work, key)]
+                self.assertEqual(processed, sorted(processed, key=lambda key: (key[1], key[0])))
+
+                self.assertEqual(ready[-1], None)
+
+                users = collections.Counter()
+
+                firsts = set()
+
+                for pos, timepoints, frames in ready[:-1]:
+                    delivered = set(t for t, _, _, _ in frames)
+
+                    if timepoints is None:
+                        # the first frame is delivered once for its analysis, before the position's chunks
+                        self.assertNotIn(pos, firsts)
+                        firsts.add(pos)
+                        self.assertEqual(delivered, {2})
+                    else:
+                        self.assertIn(pos, firsts)
+                        self.assertTrue(set(timepoints) <= delivered)
+
+                    for t, slot, meta, pinned in frames:
+                        self.assertEqual(meta, {'pos': pos, 't': t})
+                        self.assertEqual(pinned, t == 2 or t in set(
+                            r for u in timepoints or () for r in frame_references(args, u)))
+                        if pinned:
+                            users[slot] += 1
+
+                self.assertEqual(firsts, set(work.keys()))
+
+                # pinned slots are released once all chunks needing them took them up
+                self.assertEqual(dict(users), reference_ring.pinned)
+                self.assertEqual(ring.acquired + reference_ring.acquired, len(needed))
+
+    def test_first_frame_analyzed_once(self):
+        analyzed = []
+
+        def _analyze_first_frame(pos, _args):
+            analyzed.append(pos)
+            return 'first frame of %d' % pos
+
+        def _processing_frame(_args, t, pos):
+            return t, highlevel.check_or_get_first_frame(pos, _args)
+
+        work = {0: list(range(2, 20)), 1: list(range(5, 20)), 2: [2, 9, 15, 16]}
+
+        args = arguments(chunk_length=2)
+
+        ring, reference_ring, ready = FakeRing(), FakeRing(), ReadyList()
+
+        shared_memory_reader('file', shared_memory_blocks(args, work, 3), ring, reference_ring, ready)
+
+        pool = WorkersPool(4)
+
+        with mock.patch.object(highlevel, 'select_input', lambda _args: None), \
+                mock.patch.object(highlevel, 'analyze_first_frame', _analyze_first_frame), \
+                mock.patch.object(highlevel, 'processing_frame', _processing_frame), \
+                mock.patch.object(highlevel, 'frame_ring', ring), \
+                mock.patch.object(highlevel, 'reference_frame_ring', reference_ring), \
+                mock.patch.object(highlevel, 'ims', FrameSource('file', FakeStack.size)):
+            frame_results = [frame_result
+                             for chunk_results in pool.imap_unordered(
+                                 shared_memory_chunk_task, shared_memory_tasks(args, pool, ready, None))
+                             for frame_result in chunk_results]
+
+        # each position's first frame is analyzed once, although its chunks are spread over all workers
+        self.assertEqual(sorted(analyzed), sorted(work.keys()))
+        self.assertEqual(sorted((pos, t) for t, pos, _, _ in frame_results),
+                         sorted((pos, t) for pos, timepoints in work.items() for t in timepoints))
+        for t, pos, result, error in frame_results:
+            self.assertIsNone(error)
+            self.assertEqual(result, (t, 'first frame of %d' % pos))
+
+        # all pinned frames were taken up
+        self.assertEqual(set(reference_ring.pinned.values()), {0})
+
+
+def announcing_reader(ready):
+    ready.put((0, None, [(0, 0, 'meta', True)]))
+    ready.put((0, [1], []))
+    ready.put(None)
+
+
+def dying_reader(ready):
+    ready.put((0, None, [(0, 0, 'meta', True)]))
+    ready.put((0, [1], []))
+    # the announced item is flushed, then the reader dies without announcing the end
+    ready.close()
+    ready.join_thread()
+    os._exit(1)
+
+
+class FakePool(object):
+    def __init__(self):
+        self.tasks = []
+
+    def apply_async(self, function, arguments):
+        self.tasks.append((function, arguments))
+        return FakeResult()
+
+
+class FakeResult(object):
+    @staticmethod
+    def get():
+        return 'first'
+
+
+class SharedMemoryTasksTestCase(unittest.TestCase):
+    def run_reader(self, target):
+        ready = multiprocessing.Queue()
+        reader = multiprocessing.Process(target=target, args=(ready,))
+        reader.start()
+        self.pool = FakePool()
+        try:
+            return shared_memory_tasks('args', self.pool, ready, reader, interval=0.1)
+        finally:
+            reader.join()
+
+    def test_end(self):
+        self.assertEqual(list(self.run_reader(announcing_reader)), [('args', 0, [1], [], 'first')])
+
+        # the first frame is analyzed once, by a task of its own
+        self.assertEqual(self.pool.tasks, [(shared_memory_reference_task, (('args', 0, [(0, 0, 'meta', True)]),))])
+
+    def test_dead_reader(self):
+        tasks = self.run_reader(dying_reader)
+
+        # the items announced before are yielded nevertheless
+        self.assertEqual(next(tasks), ('args', 0, [1], [], 'first'))
+
+        with self.assertRaises(RuntimeError):
+            next(tasks)
+
+
+class RecordedRing(SharedMemoryRing):
+    rings = []
+
+    def __init__(self, *args, **kwargs):
+        super(RecordedRing, self).__init__(*args, **kwargs)
+        self.rings.append(self)
+
+
+def dying_shared_memory_reader(*_):
+    os._exit(1)
+
+
+@unittest.skipUnless(SharedMemoryRing.available and multiprocessing.get_start_method() == 'fork',
+                     "the reader is replaced within forked processes only")
+class SharedMemoryCleanupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'stack.tif')
+        write_test_stack(self.filename, positions=2, timepoints=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_dead_reader(self):
+        args = create_argparser().parse_args([self.filename, '-p', '-nb', '-q', '-nc', '-cpu', '2', '-shm', '1'])
+        args.inputs = [self.filename]
+        args.input = self.filename
+
+        del RecordedRing.rings[:]
+
+        with mock.patch.object(highlevel, 'SharedMemoryRing', RecordedRing), \
+                mock.patch.object(highlevel, 'shared_memory_reader', dying_shared_memory_reader):
+            with self.assertRaises(RuntimeError):
+                for _ in process_input(args, logging.getLogger(__name__), silent_progress_bar):
+                    pass
+
+        # the shared memory is freed nevertheless
+        self.assertEqual(len(RecordedRing.rings), 2)
+        for ring in RecordedRing.rings:
+            self.assertIsNone(ring.memory)
+
+
+def t_in(work, key):
+    pos, t = key
+    return t in work.get(pos, [])
+
+
+if __name__ == '__main__':
+    unittest.main()